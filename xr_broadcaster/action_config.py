@@ -0,0 +1,44 @@
+"""
+按键动作配置表 (Oculus Touch)
+
+动作及各交互配置的绑定定义在 actions.json，见 action_manifest。
+与 btn.py 分开存放，录制 / 回放等模块可以直接引用而不必初始化 OpenXR。
+"""
+
+import numpy as np
+import xr
+
+from xr_broadcaster.action_manifest import HANDS, load_manifest
+
+# 所有按键配置表，来自 actions.json（Oculus Touch 下的绑定路径）
+# {名称: {"type": xr.ActionType, "localized": str, "paths": [...], "subaction": bool}}
+ACTION_CONFIG = load_manifest().action_config()
+
+
+def input_dtype(config=None):
+    """
+    按配置表生成一帧按键状态的 NumPy 结构化 dtype（不含 pose 动作）
+
+    BOOLEAN → bool, FLOAT → float32, VECTOR2F → float32[2]；
+    带 subaction 的动作多一维 (左, 右)。
+    """
+    if config is None:
+        config = ACTION_CONFIG
+
+    fields = []
+    for name, cfg in config.items():
+        t = cfg["type"]
+        if t == xr.ActionType.POSE_INPUT:
+            continue
+        if t == xr.ActionType.BOOLEAN_INPUT:
+            base, shape = "?", ()
+        elif t == xr.ActionType.FLOAT_INPUT:
+            base, shape = "<f4", ()
+        elif t == xr.ActionType.VECTOR2F_INPUT:
+            base, shape = "<f4", (2,)
+        else:
+            raise ValueError(f"unsupported action type for {name!r}: {t}")
+        if cfg.get("subaction"):
+            shape = (len(HANDS),) + shape
+        fields.append((name, base, shape))
+    return np.dtype(fields)
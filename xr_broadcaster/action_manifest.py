@@ -0,0 +1,360 @@
+"""
+声明式动作清单: 动作 × 交互配置 (interaction profile)
+
+清单文件 (JSON / TOML，默认 actions.json) 描述一个 ActionSet、其中的动作，
+以及每个交互配置下各动作绑定到的输入路径。路径中的 {hand} 展开为左右手。
+加载时完整校验，compile() 一次性完成:
+
+    * 收集所有路径字符串，去重后经 xr_paths 的驻留缓存批量解析
+    * 创建 ActionSet / Action
+    * 每个交互配置一次 suggest_interaction_profile_bindings
+      （运行时不支持的配置记录后跳过）
+    * 各阶段耗时写入 CompiledActions.report
+
+    manifest = load_manifest()
+    compiled = manifest.compile(instance)
+    compiled.actions["trigger"], compiled.action_set
+    print(compiled.format_report())
+
+新增一个交互配置只需要在清单的 profiles 中增加一节。
+
+devices 一节供 XRDeviceRegistry 使用: 每类可跟踪设备（grip / aim /
+vive_tracker ...）一个 pose 动作，各交互配置下绑定到设备路径之下的哪个
+分量（相对路径，如 input/grip/pose），设备路径在注册设备时确定。
+注意: 同一 instance 上对同一交互配置的多次建议绑定会互相覆盖，
+需要共用配置的动作应放在同一次 compile() 中。
+"""
+
+import json
+import logging
+import os
+import re
+import time
+
+import xr
+
+from xr_broadcaster.xr_paths import path_cache
+
+log = logging.getLogger(__name__)
+
+HANDS = ("left", "right")
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "actions.json")
+
+ACTION_TYPES = {
+    "boolean": xr.ActionType.BOOLEAN_INPUT,
+    "float": xr.ActionType.FLOAT_INPUT,
+    "vector2f": xr.ActionType.VECTOR2F_INPUT,
+    "pose": xr.ActionType.POSE_INPUT,
+}
+
+_NAME_RE = re.compile(r"^[a-z0-9_\-.]+$")
+_PROFILE_RE = re.compile(r"^/interaction_profiles/[a-z0-9_\-.]+/[a-z0-9_\-.]+$")
+_BINDING_RE = re.compile(r"^/user/[a-z0-9_\-./]+$")
+_COMPONENT_RE = re.compile(r"^[a-z0-9_\-.]+(/[a-z0-9_\-.]+)*$")
+
+# 各类型动作允许绑定的分量（路径最后一段）
+_POSE_LEAF = {"pose"}
+_SCALAR_LEAF = {"click", "touch", "value", "force"}
+
+
+class ManifestError(ValueError):
+    """清单内容不合法；errors 为所有问题的列表"""
+
+    def __init__(self, source, errors):
+        self.errors = errors
+        super().__init__(f"{source}: " + "; ".join(errors))
+
+
+def load_manifest(path=DEFAULT_MANIFEST):
+    """按扩展名读取 JSON / TOML 清单并校验"""
+    t0 = time.perf_counter_ns()
+    if path.endswith(".toml"):
+        import tomllib  # Python 3.11+
+
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    manifest = ActionManifest(data, source=path)
+    manifest.load_ns = time.perf_counter_ns() - t0
+    return manifest
+
+
+def _expand(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    out = []
+    for p in paths:
+        if "{hand}" in p:
+            out.extend(p.format(hand=h) for h in HANDS)
+        else:
+            out.append(p)
+    return out
+
+
+class ActionManifest:
+    def __init__(self, data, source="<manifest>"):
+        self.source = source
+        self.load_ns = 0
+
+        set_info = data.get("action_set", {})
+        self.set_name = set_info.get("name", "")
+        self.set_localized = set_info.get("localized", self.set_name)
+        self.set_priority = set_info.get("priority", 0)
+
+        self.actions = dict(data.get("actions", {}))  # 名称 → {type, localized, subaction}
+        # 交互配置 → {动作名: [展开后的绑定路径]}
+        self.profiles = {
+            profile: {name: _expand(paths) for name, paths in binds.items()}
+            for profile, binds in data.get("profiles", {}).items()
+        }
+        # 设备类型 → {localized, profiles: {交互配置: 设备路径下的分量}}
+        self.devices = dict(data.get("devices", {}))
+        self.validate()
+
+    # -------------------- 校验 --------------------
+
+    def validate(self):
+        errors = []
+        if not _NAME_RE.match(self.set_name or ""):
+            errors.append(f"invalid action set name {self.set_name!r}")
+        if not self.actions:
+            errors.append("no actions defined")
+
+        for name, cfg in self.actions.items():
+            if not _NAME_RE.match(name):
+                errors.append(f"invalid action name {name!r}")
+            if cfg.get("type") not in ACTION_TYPES:
+                errors.append(f"action {name!r}: unknown type {cfg.get('type')!r}, "
+                              f"expected one of {sorted(ACTION_TYPES)}")
+            if not cfg.get("localized"):
+                errors.append(f"action {name!r}: missing localized name")
+
+        if not self.profiles:
+            errors.append("no interaction profiles defined")
+        for profile, binds in self.profiles.items():
+            if not _PROFILE_RE.match(profile):
+                errors.append(f"invalid interaction profile path {profile!r}")
+            for name, paths in binds.items():
+                cfg = self.actions.get(name)
+                if cfg is None:
+                    errors.append(f"{profile}: binding for undefined action {name!r}")
+                    continue
+                for path in paths:
+                    errors.extend(self._check_binding(profile, name, cfg, path))
+
+        for kind, cfg in self.devices.items():
+            if not _NAME_RE.match(kind):
+                errors.append(f"invalid device kind {kind!r}")
+            if not cfg.get("localized"):
+                errors.append(f"device {kind!r}: missing localized name")
+            if not cfg.get("profiles"):
+                errors.append(f"device {kind!r}: no interaction profiles")
+            for profile, component in cfg.get("profiles", {}).items():
+                where = f"device {kind!r}: {profile} → {component}"
+                if not _PROFILE_RE.match(profile):
+                    errors.append(f"{where}: invalid interaction profile path")
+                if not isinstance(component, str) or not _COMPONENT_RE.match(component):
+                    errors.append(f"{where}: component must be a relative path")
+                elif component.rsplit("/", 1)[-1] not in _POSE_LEAF:
+                    errors.append(f"{where}: must bind to a .../pose component")
+
+        if errors:
+            raise ManifestError(self.source, errors)
+
+    @staticmethod
+    def _check_binding(profile, name, cfg, path):
+        where = f"{profile}: {name} → {path}"
+        if not _BINDING_RE.match(path) or "//" in path or path.endswith("/"):
+            return [f"{where}: malformed path"]
+        errors = []
+        leaf = path.rsplit("/", 1)[-1]
+        t = cfg.get("type")
+        if t == "pose" and leaf not in _POSE_LEAF:
+            errors.append(f"{where}: pose action must bind to a .../pose component")
+        elif t in ("boolean", "float") and leaf not in _SCALAR_LEAF:
+            errors.append(f"{where}: {t} action must bind to click/touch/value/force")
+        elif t == "vector2f" and (leaf in _SCALAR_LEAF or leaf in _POSE_LEAF):
+            errors.append(f"{where}: vector2f action must bind to a 2D component")
+        if cfg.get("subaction") and not any(
+            path.startswith(f"/user/hand/{h}/") for h in HANDS
+        ):
+            errors.append(f"{where}: subaction action must bind under /user/hand/<hand>")
+        return errors
+
+    # -------------------- 派生 --------------------
+
+    def subset(self, names):
+        """只包含指定动作（及其绑定）的新清单"""
+        missing = set(names) - set(self.actions)
+        if missing:
+            raise KeyError(f"actions not in manifest: {sorted(missing)}")
+        return ActionManifest({
+            "action_set": {
+                "name": self.set_name,
+                "localized": self.set_localized,
+                "priority": self.set_priority,
+            },
+            "actions": {n: self.actions[n] for n in self.actions if n in names},
+            "profiles": {
+                profile: {n: p for n, p in binds.items() if n in names}
+                for profile, binds in self.profiles.items()
+                if any(n in names for n in binds)
+            },
+            "devices": self.devices,
+        }, source=self.source)
+
+    def action_config(self, profile="/interaction_profiles/oculus/touch_controller"):
+        """
+        转换为 ACTION_CONFIG 格式:
+        {名称: {"type": xr.ActionType, "localized", "paths": 该配置下的绑定, "subaction"}}
+        """
+        binds = self.profiles.get(profile, {})
+        config = {}
+        for name, cfg in self.actions.items():
+            entry = {
+                "type": ACTION_TYPES[cfg["type"]],
+                "localized": cfg["localized"],
+                "paths": list(binds.get(name, [])),
+            }
+            if cfg.get("subaction"):
+                entry["subaction"] = True
+            config[name] = entry
+        return config
+
+    def device_bindings(self, kind, target):
+        """设备类型 kind 在设备路径 target 下的绑定: {交互配置: 完整绑定路径}"""
+        profiles = self.devices[kind]["profiles"]
+        return {profile: f"{target}/{component}" for profile, component in profiles.items()}
+
+    def path_strings(self):
+        """compile() 需要解析的全部路径字符串（去重，保持顺序）"""
+        paths = {f"/user/hand/{h}": None for h in HANDS}
+        for profile, binds in self.profiles.items():
+            paths[profile] = None
+            for p in binds.values():
+                paths.update(dict.fromkeys(p))
+        return list(paths)
+
+    # -------------------- 编译 --------------------
+
+    def compile(self, instance, action_set=None):
+        """
+        创建动作并建议绑定；action_set 为 None 时按清单创建 ActionSet
+        返回 CompiledActions
+        """
+        report = {"load_ms": self.load_ns / 1e6}
+        t0 = time.perf_counter_ns()
+
+        strings = self.path_strings()
+        cache = path_cache(instance)
+        misses = cache.misses
+        paths = cache.to_paths(strings)
+        t1 = time.perf_counter_ns()
+        report["paths"] = len(strings)
+        report["paths_resolved"] = cache.misses - misses  # 其余命中缓存
+        report["resolve_ms"] = (t1 - t0) / 1e6
+
+        if action_set is None:
+            action_set = xr.create_action_set(
+                instance=instance,
+                create_info=xr.ActionSetCreateInfo(
+                    action_set_name=self.set_name,
+                    localized_action_set_name=self.set_localized,
+                    priority=self.set_priority,
+                ),
+            )
+        hand_paths = (xr.Path * len(HANDS))(*[paths[f"/user/hand/{h}"] for h in HANDS])
+        actions = {}
+        for name, cfg in self.actions.items():
+            subaction = bool(cfg.get("subaction"))
+            actions[name] = xr.create_action(
+                action_set=action_set,
+                create_info=xr.ActionCreateInfo(
+                    action_type=ACTION_TYPES[cfg["type"]],
+                    action_name=name,
+                    localized_action_name=cfg["localized"],
+                    count_subaction_paths=len(HANDS) if subaction else 0,
+                    subaction_paths=hand_paths if subaction else None,
+                ),
+            )
+        t2 = time.perf_counter_ns()
+        report["actions"] = len(actions)
+        report["create_ms"] = (t2 - t1) / 1e6
+
+        suggested, rejected = {}, {}
+        for profile, binds in self.profiles.items():
+            pairs = [(actions[name], paths[p]) for name, ps in binds.items() for p in ps]
+            bindings = (xr.ActionSuggestedBinding * len(pairs))(*[
+                xr.ActionSuggestedBinding(action=a, binding=b) for a, b in pairs
+            ])
+            try:
+                xr.suggest_interaction_profile_bindings(
+                    instance=instance,
+                    suggested_bindings=xr.InteractionProfileSuggestedBinding(
+                        interaction_profile=paths[profile],
+                        count_suggested_bindings=len(bindings),
+                        suggested_bindings=bindings,
+                    ),
+                )
+            except xr.XrException as e:
+                # 运行时不支持的配置 / 分量，跳过该配置
+                log.warning("interaction profile %s rejected: %r", profile, e)
+                rejected[profile] = repr(e)
+            else:
+                suggested[profile] = len(pairs)
+        t3 = time.perf_counter_ns()
+        report["suggest_ms"] = (t3 - t2) / 1e6
+        report["total_ms"] = report["load_ms"] + (t3 - t0) / 1e6
+
+        if not suggested:
+            raise RuntimeError(f"no interaction profile accepted: {rejected}")
+
+        return CompiledActions(self, action_set, actions, paths, suggested, rejected, report)
+
+
+class CompiledActions:
+    def __init__(self, manifest, action_set, actions, paths, suggested, rejected, report):
+        self.manifest = manifest
+        self.action_set = action_set
+        self.actions = actions  # 名称 → xr.Action
+        self.paths = paths  # 路径字符串 → xr.Path
+        self.suggested = suggested  # 交互配置 → 绑定数
+        self.rejected = rejected  # 交互配置 → 错误
+        self.report = report
+
+    def format_report(self):
+        r = self.report
+        lines = [
+            f"动作清单 {os.path.basename(self.manifest.source)}: "
+            f"{r['actions']} 个动作, {r['paths']} 条路径 "
+            f"(新解析 {r['paths_resolved']}), 共 {r['total_ms']:.2f} ms "
+            f"(读取 {r['load_ms']:.2f} / 解析路径 {r['resolve_ms']:.2f} / "
+            f"创建动作 {r['create_ms']:.2f} / 建议绑定 {r['suggest_ms']:.2f})"
+        ]
+        for profile, n in self.suggested.items():
+            lines.append(f"  ✓ {profile}: {n} 个绑定")
+        for profile, err in self.rejected.items():
+            lines.append(f"  ✗ {profile}: {err}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # 校验清单并打印动作 × 交互配置的绑定数量，不需要 OpenXR 运行时
+    import sys
+
+    manifest = load_manifest(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MANIFEST)
+    profiles = list(manifest.profiles)
+    short = [p.rsplit("/", 2)[-2] + "/" + p.rsplit("/", 1)[-1] for p in profiles]
+    print(f"{manifest.source}: OK, 读取 + 校验 {manifest.load_ns / 1e6:.2f} ms")
+    print(f"{'action':<18}{'type':<10}" + "".join(f"{s:>28}" for s in short))
+    for name, cfg in manifest.actions.items():
+        counts = [len(manifest.profiles[p].get(name, [])) for p in profiles]
+        print(f"{name:<18}{cfg['type']:<10}" + "".join(f"{c or '-':>28}" for c in counts))
+    for kind, cfg in manifest.devices.items():
+        print(f"{kind:<18}{'device':<10}" + ", ".join(
+            f"{p.rsplit('/', 2)[-2]}/{p.rsplit('/', 1)[-1]}: {c}"
+            for p, c in cfg["profiles"].items()
+        ))
@@ -1,53 +1,291 @@
+import argparse
 import platform
-import xr
 import time
+import xr
 
-from xr_system import XRSystem
-from xr_time import XRTimeProvider
-from xr_actions import XRControllerActions
-from xr_tracker import XRControllerTracker
+from xr_broadcaster.xr_system import XRSystem, LOSS_ERRORS
+from xr_broadcaster.xr_time import XRTimeProvider
+from xr_broadcaster.xr_devices import XRDeviceRegistry
+from xr_broadcaster.xr_tracker import XRControllerTracker
 
 from xr_broadcaster.panel import ControlPanel
+from xr_broadcaster.panel_stats import RateMeter, StreamStat
 from xr_broadcaster.visualizer import ControllerVisualizer
+from xr_broadcaster.viz_process import VisualizerProcess
+from xr_broadcaster.rate_loop import FixedRateLoop
+from xr_broadcaster.pose_udp import PoseBroadcaster, DEFAULT_GROUP, DEFAULT_PORT
+from xr_broadcaster.stream_server import StreamServer
+from xr_broadcaster.shm_ring import PoseRing
+from xr_broadcaster.recorder import SessionRecorder, record_dtype
+from xr_broadcaster.replay import ReplaySession
+from xr_broadcaster.sampling_thread import SamplingThread
+from xr_broadcaster.pose_filter import FilteredTracker, PoseFilter
+
 
+def make_sources(replay_path=None, speed=1.0, predict_ns=0, devices=(), restart_on_exit=True):
+    """
+    返回 (xr_sys, timer, tracker, n_devices)；回放没有速度数据，不支持预测
+    devices: 除双手 grip 外额外跟踪的设备，可包含 "hmd" / "aim" / "vive_trackers"
+    双手 grip 的 id 固定为 0 (左) / 1 (右)
+    运行时丢失后 xr_sys 重建 instance / session，这里注册的钩子随之重建
+    时间换算、设备动作 / 空间，并把 tracker 换到新空间上（输出数组不变）
+    restart_on_exit: 运行时发出 EXITING（如 SteamVR 重启）时也自动重建
+    """
+    if replay_path:
+        replay = ReplaySession(replay_path, speed=speed)
+        return replay.system, replay.time, replay.tracker, replay.n_devices
 
-def main():
     # 扩展
     extensions = [xr.MND_HEADLESS_EXTENSION_NAME]
     if platform.system() == "Windows":
         extensions.append(xr.KHR_WIN32_CONVERT_PERFORMANCE_COUNTER_TIME_EXTENSION_NAME)
     else:
         extensions.append(xr.KHR_CONVERT_TIMESPEC_TIME_EXTENSION_NAME)
+    if "vive_trackers" in devices:
+        extensions.append(xr.HTCX_VIVE_TRACKER_INTERACTION_EXTENSION_NAME)
 
     # 初始化模块
-    xr_sys = XRSystem(extensions)
-    timer = XRTimeProvider(xr_sys.instance)
-    actions = XRControllerActions(xr_sys.instance, xr_sys.session)
-    tracker = XRControllerTracker(actions, timer)
+    xr_sys = XRSystem(extensions, restart_on_exit=restart_on_exit)
+    timer = XRTimeProvider(xr_sys.instance, calibrated=True)
+
+    registry = XRDeviceRegistry(xr_sys.instance, xr_sys.session)
+    registry.add_hands(("grip",))
+    if "hmd" in devices:
+        registry.add_view()
+    if "aim" in devices:
+        registry.add_hands(("aim",))
+    if "vive_trackers" in devices:
+        registry.add_vive_trackers()
+    registry.build()
+
+    tracker = XRControllerTracker(registry, timer, predict_ns=predict_ns)
+
+    def rebuild(system):
+        timer.rebind(system.instance)
+        registry.rebuild(system.instance, system.session)
+        tracker.rebind()
+
+    xr_sys.add_hooks(setup=rebuild)
+    return xr_sys, timer, tracker, len(registry)
+
+
+def main(rate_hz=90, udp_host=DEFAULT_GROUP, udp_port=DEFAULT_PORT, record_path=None,
+         replay_path=None, speed=1.0, visualize=True, predict_ms=0, devices=(),
+         sample_rate=0, pose_filter=None, exit_with_runtime=False, viz_process=True):
+    """
+    sample_rate: >0 时由独立线程以该频率采样并广播，主循环 (rate_hz) 只负责
+                 会话事件和 UI，读取线程发布的最新快照
+    pose_filter: "one_euro" / "kalman" 时面板和可视化显示滤波后的位姿
+                 （广播、录制仍用原始位姿）
+    exit_with_runtime: 运行时发出 EXITING 时退出，而不是等待运行时恢复后重建
+    viz_process: 可视化在独立进程中绘制，主循环只把位姿写入共享内存；
+                 False 时在主循环内同步绘制
+    """
+    xr_sys, timer, tracker, n_devices = make_sources(
+        replay_path, speed, predict_ns=int(predict_ms * 1e6), devices=devices,
+        restart_on_exit=not exit_with_runtime,
+    )
+    if pose_filter:
+        tracker = FilteredTracker(tracker, PoseFilter(n_devices, method=pose_filter))
+        xr_sys.add_hooks(setup=lambda _: tracker.filter.reset())
+    predicting = getattr(tracker, "predict_ns", 0) > 0
 
     panel = ControlPanel(); panel.start()
-    viz = ControllerVisualizer()
+    # 面板上的滚动统计: 主循环只做 add / tick，格式化在面板线程
+    rate_stat = RateMeter()
+    poll_stat = StreamStat(unit="µs", hi=2000)
+    latency_stat = StreamStat(unit="µs", hi=20000)
+    panel.attach("采样率", rate_stat)
+    panel.attach("采样耗时", poll_stat)
+    panel.attach("快照延迟" if sample_rate else "循环耗时", latency_stat)
+    viz = None
+    if visualize:
+        viz = VisualizerProcess(n_devices=n_devices) if viz_process else ControllerVisualizer()
+    caster = PoseBroadcaster(udp_host, udp_port, n_devices=n_devices)
+    server = StreamServer(); server.start()
+    ring = PoseRing.create(n_devices=n_devices)
+    recorder = None
+    if record_path:
+        recorder = SessionRecorder(record_path, record_dtype(n_devices))
+
+    def broadcast(poses, valid, xr_time, predicted=None, predicted_time=0):
+        if predicted is not None:
+            # 网络消费者拿到的是外推到预计接收时刻的位姿
+            caster.publish(predicted, valid, predicted_time)
+        else:
+            caster.publish(poses, valid, xr_time)
+        ring.publish(poses, valid, xr_time)
+        if recorder:
+            recorder.append(xr_time, poses, valid)
+        if server.clients:
+            server.publish({
+                "t": xr_time,
+                "poses": poses.tolist(),
+                "valid": valid.tolist(),
+            })
+
+    def show(source):
+        # source: tracker 或 Snapshot，都提供 poses / valid / pose(i)，
+        # 开启滤波时还有 filtered / filtered_pose(i)
+        if viz_process and viz:
+            # 只拷贝到共享内存，窗口关闭后照样写，不影响跟踪
+            viz.publish(source.filtered if pose_filter else source.poses, source.valid)
+        if source.valid[0] and source.valid[1]:
+            pose = source.filtered_pose if pose_filter else source.pose
+            l_pose, r_pose = pose(0), pose(1)
+            panel.update({
+                "L_xyz": l_pose.position, "L_q": l_pose.orientation,
+                "R_xyz": r_pose.position, "R_q": r_pose.orientation
+            })
+            if viz and not viz_process:
+                viz.update(l_pose, r_pose)
+
+    sampling = None
+    if sample_rate:
+        sampling = SamplingThread(tracker, rate_hz=sample_rate, sinks=[
+            lambda snap: broadcast(snap.poses, snap.valid, snap.xr_time,
+                                   snap.predicted, snap.predicted_time)
+        ])
+        sampling.active = False
+        # 运行时丢失: 销毁旧句柄前先等采样线程停下
+        xr_sys.add_hooks(teardown=lambda _: sampling.pause())
+
+    loop = FixedRateLoop(rate_hz=rate_hz)
+
+    # 各阶段累计耗时 (ns)，用于测量整条链路的吞吐
+    stage_ns = dict.fromkeys(("poll", "broadcast", "ui"), 0)
+    samples = 0
+    frames = 0
+    last_seq = 0
+    t_start = time.perf_counter_ns()
 
     # 主循环
     try:
-        while True:
+        if sampling:
+            sampling.start()
+        for _ in loop:
             xr_sys.poll_events()
+            if xr_sys.state == xr.SessionState.EXITING:
+                break
+
+            focused = xr_sys.state == xr.SessionState.FOCUSED
+            if sampling:
+                if isinstance(sampling.last_error, LOSS_ERRORS):
+                    # 采样线程里的调用先发现了运行时丢失
+                    error, sampling.last_error = sampling.last_error, None
+                    xr_sys.handle_loss(error)
+                    continue
+                sampling.active = focused
+                snap = sampling.latest
+                if snap is not None and snap.seq != last_seq:
+                    rate_stat.tick(snap.seq - last_seq)
+                    poll_stat.add(sampling.sample_ns_last / 1e3)
+                    latency_stat.add((time.monotonic_ns() - snap.sampled_ns) / 1e3)
+                    panel.update({"循环超时": sampling.loop.overruns})
+                    last_seq = snap.seq
+                    t0 = time.perf_counter_ns()
+                    show(snap)
+                    stage_ns["ui"] += time.perf_counter_ns() - t0
+                    frames += 1
 
-            if xr_sys.state == xr.SessionState.FOCUSED:
-                l_pose, r_pose = tracker.poll()
+            elif focused:
+                t0 = time.perf_counter_ns()
+                try:
+                    tracker.poll_batch()
+                except LOSS_ERRORS as e:
+                    xr_sys.handle_loss(e)
+                    continue
+                samples += 1
 
-                if l_pose and r_pose:
-                    panel.update({
-                        "L_xyz": l_pose.position, "L_q": l_pose.orientation,
-                        "R_xyz": r_pose.position, "R_q": r_pose.orientation
-                    })
-                    viz.update(l_pose, r_pose)
+                t1 = time.perf_counter_ns()
+                if predicting:
+                    broadcast(tracker.poses, tracker.valid, tracker.last_time,
+                              tracker.predicted, tracker.predicted_time)
+                else:
+                    broadcast(tracker.poses, tracker.valid, tracker.last_time)
 
-            time.sleep(0.05)
+                t2 = time.perf_counter_ns()
+                show(tracker)
+
+                t3 = time.perf_counter_ns()
+                stage_ns["poll"] += t1 - t0
+                stage_ns["broadcast"] += t2 - t1
+                stage_ns["ui"] += t3 - t2
+                rate_stat.tick()
+                poll_stat.add((t1 - t0) / 1e3)
+                latency_stat.add((t3 - t0) / 1e3)
+                panel.update({"循环超时": loop.overruns})
 
     except KeyboardInterrupt:
         print("Stopped.")
+    finally:
+        if sampling:
+            sampling.stop()
+        panel.stop()
+        elapsed = (time.perf_counter_ns() - t_start) / 1e9
+        print(loop.stats())
+        if sampling:
+            print(f"采样线程: {sampling.stats()}")
+            if frames:
+                print(f"UI 帧: {frames}, {frames / elapsed:.1f}/s, "
+                      f"平均耗时 {stage_ns['ui'] / frames / 1e3:.1f} µs")
+        elif samples:
+            print(f"samples: {samples}, {samples / elapsed:.1f}/s, 各阶段平均耗时 (µs): "
+                  + ", ".join(f"{k}={v / samples / 1e3:.1f}" for k, v in stage_ns.items()))
+        if predicting:
+            print(f"预测误差: {tracker.prediction_errors.summary()}")
+        if pose_filter:
+            print(f"位姿滤波: {tracker.filter.stats()}")
+        if xr_sys.stats().get("losses"):
+            print(f"运行时恢复: {xr_sys.stats()}")
+        if caster.errors:
+            print(f"UDP 广播: {caster.stats()}")
+        caster.close()
+        server.stop()
+        ring.close()
+        if viz_process and viz:
+            viz.close()
+        if recorder:
+            recorder.close()
+        xr_sys.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="XR 控制器位姿广播")
+    parser.add_argument("--rate", type=float, default=90, help="主循环频率 (Hz)，0 表示不限速")
+    parser.add_argument("--udp-host", default=DEFAULT_GROUP)
+    parser.add_argument("--udp-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--record", metavar="PATH", help="把采样录制到文件")
+    parser.add_argument("--replay", metavar="PATH", help="回放录制文件代替头显")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示尽快")
+    parser.add_argument("--no-viz", action="store_true", help="不打开 matplotlib 窗口")
+    parser.add_argument("--viz-inline", action="store_true",
+                        help="在主循环内同步绘制（默认在独立进程中绘制）")
+    parser.add_argument("--predict-ms", type=float, default=0,
+                        help="UDP 广播的位姿按速度外推的时长 (ms)，0 表示不预测")
+    parser.add_argument("--devices", nargs="*", default=[],
+                        choices=["hmd", "aim", "vive_trackers"],
+                        help="除双手 grip 外额外跟踪的设备")
+    parser.add_argument("--sample-rate", type=float, default=0,
+                        help="独立采样线程的频率 (Hz)，0 表示在主循环中采样")
+    parser.add_argument("--filter", choices=["one_euro", "kalman"],
+                        help="面板 / 可视化显示滤波后的位姿")
+    parser.add_argument("--exit-with-runtime", action="store_true",
+                        help="运行时退出时一起退出（默认等待运行时恢复并自动重建会话）")
+    args = parser.parse_args()
+
+    main(
+        rate_hz=args.rate,
+        udp_host=args.udp_host,
+        udp_port=args.udp_port,
+        record_path=args.record,
+        replay_path=args.replay,
+        speed=args.speed,
+        visualize=not args.no_viz,
+        predict_ms=args.predict_ms,
+        devices=args.devices,
+        sample_rate=args.sample_rate,
+        pose_filter=args.filter,
+        exit_with_runtime=args.exit_with_runtime,
+        viz_process=not args.viz_inline,
+    )
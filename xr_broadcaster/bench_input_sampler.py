@@ -0,0 +1,86 @@
+"""
+按键读取每帧开销对比: btn.py 原来的逐动作读取 + 字典拼装 vs InputSampler
+
+运行: python -m xr_broadcaster.bench_input_sampler
+
+分别在两种运行时桩下测量:
+    callback  xr_stub 的 Python 回调，会写入状态，单次调用较贵
+    native    原生空函数，运行时开销近似为 0，结果即纯 Python / ctypes 侧开销
+"""
+
+import xr
+
+from xr_broadcaster.action_config import ACTION_CONFIG
+from xr_broadcaster.bench_tracker import measure
+from xr_broadcaster.conditioning import DEFAULT_CONDITIONING
+from xr_broadcaster.input_sampler import InputSampler
+from xr_broadcaster.xr_stub import stub_runtime, FakeActions, FakeTimeProvider
+
+
+def dict_loop(instance, session, actions, active_set, timer):
+    """btn.py 原主循环中的按键读取部分（不含 pose）"""
+
+    def read_action_state(name, action, sub_path=None):
+        t = ACTION_CONFIG[name]["type"]
+        if sub_path:
+            get_info = xr.ActionStateGetInfo(
+                action=action,
+                subaction_path=xr.string_to_path(instance, sub_path),
+            )
+        else:
+            get_info = xr.ActionStateGetInfo(action=action)
+        if t == xr.ActionType.BOOLEAN_INPUT:
+            return xr.get_action_state_boolean(session, get_info).current_state
+        if t == xr.ActionType.FLOAT_INPUT:
+            return xr.get_action_state_float(session, get_info).current_state
+        if t == xr.ActionType.VECTOR2F_INPUT:
+            v = xr.get_action_state_vector2f(session, get_info).current_state
+            return (v.x, v.y)
+
+    def frame():
+        xr.sync_actions(
+            session=session,
+            sync_info=xr.ActionsSyncInfo(active_action_sets=[active_set]),
+        )
+        timer.now()
+        panel_data = {}
+        for name, cfg in ACTION_CONFIG.items():
+            if cfg["type"] == xr.ActionType.POSE_INPUT:
+                continue
+            act = actions[name]
+            if cfg.get("subaction"):
+                panel_data[f"{name}_left"] = read_action_state(name, act, "/user/hand/left")
+                panel_data[f"{name}_right"] = read_action_state(name, act, "/user/hand/right")
+            else:
+                panel_data[name] = read_action_state(name, act)
+        return panel_data
+
+    return frame
+
+
+def main(n=20_000):
+    for native in (False, True):
+        with stub_runtime(native=native):
+            fake = FakeActions()
+            instance = xr.Instance()
+            actions = {name: xr.Action() for name in ACTION_CONFIG}
+            timer = FakeTimeProvider()
+
+            sampler = InputSampler(instance, fake.session, actions, fake.active_set, timer)
+            conditioned = InputSampler(instance, fake.session, actions, fake.active_set, timer,
+                                       conditioning=DEFAULT_CONDITIONING)
+            loop = dict_loop(instance, fake.session, actions, fake.active_set, timer)
+
+            print(f"[{'native' if native else 'callback'}] "
+                  f"{len(sampler._calls)} 次状态读取/帧")
+            results = {}
+            for name, fn in (("dict loop", loop), ("InputSampler", sampler.sample),
+                             ("conditioned", conditioned.sample)):
+                per_call, allocs = measure(fn, n)
+                results[name] = per_call
+                print(f"  {name:>12}: {per_call / 1e3:7.2f} µs/帧, 残留分配 {allocs:.2f} 块/帧")
+            print(f"  加速: {results['dict loop'] / results['InputSampler']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+中控面板开销: 生产者线程上的 update() 与刷新线程上的表格构建
+
+运行: python -m xr_broadcaster.bench_panel
+
+面板数据仿照 btn.py: 约 30 个键，每帧只有位姿和计数等少数键变化。
+1. 单次 update() 耗时，与旧实现（每次 update 都在调用线程上重建整张表）对比
+2. 生产者以 1 kHz 持续 update 2 秒，面板线程按 refresh_hz 在后台构建 / 绘制面板，
+   统计生产者循环的超时次数、重绘次数和每次重绘重新生成的行数；
+   之后空闲 1 秒，面板线程不应再重绘
+3. 滚动统计控件: 生产者侧 add / tick 的每样本开销，以及面板线程上 render() 的开销
+终端输出写入内存缓冲区，不占用当前终端
+"""
+
+import io
+import random
+import time
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from xr_broadcaster.bench_tracker import measure
+from xr_broadcaster.panel import ControlPanel
+from xr_broadcaster.panel_stats import RateMeter, StreamStat
+from xr_broadcaster.rate_loop import FixedRateLoop
+
+N_KEYS = 30
+
+
+def frame_data(i):
+    """第 i 帧的面板数据: 4 个键每帧变化，其余为不常变化的按键 / 模拟量"""
+    data = {f"input_{k}": (i // 500 + k) % 2 == 0 for k in range(N_KEYS - 6)}
+    data.update({
+        "会话状态": "FOCUSED",
+        "帧计数": i,
+        "grip_left_pos": (round(0.1 + i * 1e-4, 3), 1.2, -0.3),
+        "grip_left_rot": (0.0, 0.0, round(random.random(), 3), 1.0),
+        "grip_right_pos": (0.3, 1.1, round(-0.3 - i * 1e-4, 3)),
+        "grip_right_rot": (0.0, 0.0, 0.0, 1.0),
+    })
+    return data
+
+
+def legacy_update(data, store):
+    """旧实现: update 时在调用线程上重建整张表"""
+    store.update(data)
+    table = Table(expand=True)
+    table.add_column("项目")
+    table.add_column("值")
+    for k, v in store.items():
+        table.add_row(str(k), str(v))
+    return Panel(table, title="中控面板", border_style="cyan")
+
+
+def main(n=20_000, rate_hz=1000, seconds=2.0):
+    frames = [frame_data(i) for i in range(1000)]
+    clock = [0]
+
+    def next_frame():
+        clock[0] += 1
+        return frames[clock[0] % len(frames)]
+
+    panel = ControlPanel()
+    store = {}
+    print(f"{N_KEYS} 个键，每帧约 4 个变化")
+    for name, fn in (
+        ("旧实现", lambda: legacy_update(next_frame(), store)),
+        ("update", lambda: panel.update(next_frame())),
+    ):
+        per_call, allocs = measure(fn, n)
+        print(f"  {name:>6}: {per_call / 1e3:7.2f} µs/次, 残留分配 {allocs:.2f} 块/次")
+
+    # 1 kHz 生产者 + 后台刷新
+    sink = io.StringIO()
+    panel = ControlPanel(refresh_hz=8)
+    panel.console = Console(file=sink, force_terminal=True, width=100, height=50)
+    panel.start()
+    loop = FixedRateLoop(rate_hz=rate_hz)
+    worst = total = 0
+    count = int(rate_hz * seconds)
+    for i, _ in zip(range(count), loop):
+        t0 = time.perf_counter_ns()
+        panel.update(frames[i % len(frames)])
+        dt = time.perf_counter_ns() - t0
+        total += dt
+        worst = max(worst, dt)
+    busy_renders = panel.renders
+    time.sleep(1.0)
+    idle_renders = panel.renders - busy_renders
+    panel.stop()
+    stats = panel.stats()
+    print(f"  {rate_hz} Hz x {seconds:.0f} s: update 平均 {total / count / 1e3:.2f} µs, "
+          f"最大 {worst / 1e3:.1f} µs, 循环超时 {loop.overruns} 次")
+    print(f"  重绘 {stats['renders']} 次, 平均每次重建 "
+          f"{stats['rows_rebuilt'] / max(stats['renders'], 1):.1f} / {stats['keys']} 行, "
+          f"输出 {len(sink.getvalue()) / 1024:.0f} KiB, 空闲 1 s 内重绘 {idle_renders} 次")
+
+
+    # 滚动统计控件
+    stat = StreamStat(unit="µs", hi=2000)
+    rate = RateMeter()
+    values = [random.expovariate(1 / 80) for _ in range(4096)]
+    it = iter(range(1 << 62))
+
+    def add():
+        stat.add(values[next(it) & 4095])
+
+    print("统计控件")
+    for name, fn in (("StreamStat.add", add), ("RateMeter.tick", rate.tick),
+                     ("StreamStat.render", stat.render), ("RateMeter.render", rate.render)):
+        per_call, allocs = measure(fn, n if "render" not in name else n // 20)
+        print(f"  {name:>17}: {per_call:9.0f} ns/次")
+    print(f"  {stat.summary()}")
+
+
+if __name__ == "__main__":
+    main()
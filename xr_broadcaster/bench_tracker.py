@@ -0,0 +1,45 @@
+"""
+XRControllerTracker 每次 poll 的开销对比: poll() vs poll_batch()
+
+运行: python -m xr_broadcaster.bench_tracker [设备数 ...]
+默认依次测量 2 / 8 / 18 个设备，观察开销随设备数的增长
+"""
+
+import sys
+import time
+import tracemalloc
+
+from xr_broadcaster.xr_stub import stub_runtime, FakeActions, FakeTimeProvider
+from xr_broadcaster.xr_tracker import XRControllerTracker
+
+
+def measure(fn, n):
+    for _ in range(1000):  # 预热
+        fn()
+    t0 = time.perf_counter_ns()
+    for _ in range(n):
+        fn()
+    per_call = (time.perf_counter_ns() - t0) / n
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(1000):
+        fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(s.count_diff for s in after.compare_to(before, "filename"))
+    return per_call, blocks / 1000
+
+
+def main(n_spaces=2, n=100_000):
+    with stub_runtime():
+        tracker = XRControllerTracker(FakeActions(n_spaces), FakeTimeProvider())
+        for name, fn in (("poll", tracker.poll), ("poll_batch", tracker.poll_batch)):
+            per_call, allocs = measure(fn, n)
+            print(f"N={n_spaces:>2} {name:>10}: {per_call / 1e3:7.2f} µs/次 "
+                  f"({per_call / n_spaces / 1e3:.2f} µs/设备), 残留分配 {allocs:.2f} 块/次")
+
+
+if __name__ == "__main__":
+    for count in [int(a) for a in sys.argv[1:]] or [2, 8, 18]:
+        main(count)
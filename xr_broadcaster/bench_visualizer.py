@@ -0,0 +1,133 @@
+"""
+ControllerVisualizer 每帧开销（Agg 后端，不需要显示器）
+
+运行: python -m xr_broadcaster.bench_visualizer
+
+1. 旧实现: 每帧删除并重建 2 个散点和 6 条轴线，再完整 canvas.draw()
+2. 新实现不限速 (max_fps=0): 每帧就地更新数据 + 恢复背景 / blit
+3. 新实现默认限速 (max_fps=60)，以 90 Hz 调用 update 时的实际调用开销与重绘频率
+4. 独立进程 (VisualizerProcess): 跟踪循环侧 publish 的开销，以及可视化进程
+   被关掉之后 publish 照常进行
+目标: 不限速时单帧重绘 < 16.7 ms（60 Hz）
+"""
+
+import time
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from scipy.spatial.transform import Rotation as R  # noqa: E402
+
+from xr_broadcaster.bench_tracker import measure  # noqa: E402
+from xr_broadcaster.visualizer import ControllerVisualizer, quat_axes  # noqa: E402
+from xr_broadcaster.viz_process import VisualizerProcess  # noqa: E402
+from xr_broadcaster.xr_tracker import XRControllerTracker  # noqa: E402
+
+
+def poses(n):
+    """n 帧绕圈运动的双手位姿"""
+    t = np.linspace(0, 4 * np.pi, n)
+    quats = R.from_euler("xyz", np.stack([t, 0.5 * t, 0.25 * t], axis=1)).as_quat()
+    rows = np.zeros((n, 2, 7), np.float32)
+    rows[:, :, :4] = quats[:, None]
+    rows[:, 0, 4:] = np.stack([0.3 * np.cos(t) - 0.2, 1.0 + 0.2 * np.sin(t), -0.5 + 0 * t], axis=1)
+    rows[:, 1, 4:] = np.stack([0.3 * np.cos(t) + 0.2, 1.0 - 0.2 * np.sin(t), -0.5 + 0 * t], axis=1)
+    pose = XRControllerTracker.pose
+    holder = type("Rows", (), {"poses": None, "pose": pose})()
+    frames = []
+    for frame in rows:
+        holder.poses = frame
+        frames.append((holder.pose(0), holder.pose(1)))
+    return frames
+
+
+def legacy_update(viz, left, right, state):
+    """旧实现的 update: 删除 / 重建所有动态对象 + 完整重绘"""
+    ax = viz.ax
+    for artist in state:
+        artist.remove()
+    state.clear()
+    for pose, color in ((left, "blue"), (right, "red")):
+        p, o = pose.position, pose.orientation
+        state.append(ax.scatter(p.x, p.y, p.z, c=color, s=100))
+        axes = R.from_quat((o.x, o.y, o.z, o.w)).apply(np.eye(3) * 0.1)
+        for axis, c in zip(axes, ("red", "green", "blue")):
+            state.append(ax.plot([p.x, p.x + axis[0]], [p.y, p.y + axis[1]],
+                                 [p.z, p.z + axis[2]], color=c, linewidth=2)[0])
+    viz.fig.canvas.draw()
+    viz.fig.canvas.flush_events()
+
+
+def timed(fn, frames):
+    t0 = time.perf_counter()
+    for left, right in frames:
+        fn(left, right)
+    return (time.perf_counter() - t0) / len(frames)
+
+
+def main(n=300):
+    warnings.filterwarnings("ignore", message=".*non-interactive.*")
+    frames = poses(n)
+
+    # quat_axes 与 scipy 一致
+    q = R.random(100, random_state=0).as_quat()
+    ref = R.from_quat(q).apply(np.eye(3)[:, None] * 0.1)  # (3, 100, 3)
+    err = max(np.abs(quat_axes(qi) - ref[:, i]).max() for i, qi in enumerate(q))
+    print(f"quat_axes 与 scipy 最大偏差: {err:.2e}")
+
+    viz = ControllerVisualizer(max_fps=0)
+    state = []
+    per = timed(lambda l, r: legacy_update(viz, l, r, state), frames[: n // 3])
+    print(f"  旧实现: {per * 1e3:7.2f} ms/帧 ({1 / per:6.1f} Hz)")
+    plt.close(viz.fig)
+
+    viz = ControllerVisualizer(max_fps=0)
+    per = timed(viz.update, frames)
+    print(f"  blit 不限速: {per * 1e3:7.2f} ms/帧 ({1 / per:6.1f} Hz)")
+
+    # 背景重新缓存（如拖动视角）后仍然正确
+    viz.ax.view_init(elev=20, azim=60)
+    viz.fig.canvas.draw()
+    per = timed(viz.update, frames[: n // 3])
+    print(f"  旋转视角后: {per * 1e3:7.2f} ms/帧 ({1 / per:6.1f} Hz)")
+    plt.close(viz.fig)
+
+    viz = ControllerVisualizer(max_fps=60)
+    t0 = time.perf_counter()
+    period = 1 / 90
+    cost = 0.0
+    for i, (left, right) in enumerate(frames):
+        while time.perf_counter() - t0 < i * period:
+            time.sleep(0.0005)
+        t1 = time.perf_counter()
+        viz.update(left, right)
+        cost += time.perf_counter() - t1
+    elapsed = time.perf_counter() - t0
+    print(f"  限速 60 Hz, 90 Hz 调用: update 平均 {cost / n * 1e3:.2f} ms, "
+          f"重绘 {viz.draws} 次 / {viz.updates} 次更新 ({viz.draws / elapsed:.1f} Hz)")
+    plt.close(viz.fig)
+
+    # 独立进程: 跟踪循环只写共享内存
+    remote = VisualizerProcess(n_devices=2)
+    rows = np.zeros((2, 7), np.float32)
+    rows[:, 3] = 1
+    valid = np.ones(2, bool)
+    per_call, allocs = measure(lambda: remote.publish(rows, valid), 20_000)
+    print(f"  独立进程 publish: {per_call / 1e3:.2f} µs/次, 残留分配 {allocs:.2f} 块/次")
+    per = timed(remote.update, frames)
+    print(f"  独立进程 update(Posef): {per * 1e6:.2f} µs/次")
+    print(f"  可视化进程运行中: {remote.alive}")
+    remote.process.terminate()  # 相当于用户关掉窗口
+    remote.process.join()
+    for left, right in frames:
+        remote.update(left, right)
+    print(f"  可视化进程退出后继续写入 {len(frames)} 帧, alive={remote.alive}")
+    remote.close()
+
+
+if __name__ == "__main__":
+    main()
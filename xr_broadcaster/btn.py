@@ -4,11 +4,23 @@ Quest 3 无头模式按键读取示例 (修复版)
 使用正确的 Oculus Touch 控制器交互配置文件
 """
 
+import collections
 import ctypes
 import platform
 import time
+import types
 import xr
 from xr_broadcaster.panel import ControlPanel
+from xr_broadcaster.xr_time import XRTimeProvider
+from xr_broadcaster.stream_server import StreamServer
+from xr_broadcaster.action_manifest import HANDS, load_manifest
+from xr_broadcaster.xr_paths import destroy_instance, path_cache
+from xr_broadcaster.input_sampler import InputSampler
+from xr_broadcaster.conditioning import DEFAULT_CONDITIONING
+from xr_broadcaster.input_events import InputEventStream
+from xr_broadcaster.gestures import GestureEngine
+from xr_broadcaster.xr_tracker import XRControllerTracker
+from xr_broadcaster.sampling_thread import SamplingThread
 
 # 枚举必需的实例扩展
 extensions = [xr.MND_HEADLESS_EXTENSION_NAME]  # 允许在没有图形显示的情况下使用
@@ -40,264 +52,28 @@ session = xr.create_session(
     ),
 )
 
-# 时间转换函数设置
-if platform.system() == "Windows":
-    import ctypes.wintypes
-
-    pc_time = ctypes.wintypes.LARGE_INTEGER()
-    kernel32 = ctypes.WinDLL("kernel32")
-    pxrConvertWin32PerformanceCounterToTimeKHR = ctypes.cast(
-        xr.get_instance_proc_addr(
-            instance=instance,
-            name="xrConvertWin32PerformanceCounterToTimeKHR",
-        ),
-        xr.PFN_xrConvertWin32PerformanceCounterToTimeKHR,
-    )
-
-    def get_xr_time():
-        kernel32.QueryPerformanceCounter(ctypes.byref(pc_time))
-        xr_time = xr.Time()
-        result = pxrConvertWin32PerformanceCounterToTimeKHR(
-            instance,
-            ctypes.pointer(pc_time),
-            ctypes.byref(xr_time),
-        )
-        result = xr.check_result(result)
-        if result.is_exception():
-            raise result
-        return xr_time
-else:
-    timespecTime = xr.timespec()
-    pxrConvertTimespecTimeToTimeKHR = ctypes.cast(
-        xr.get_instance_proc_addr(
-            instance=instance,
-            name="xrConvertTimespecTimeToTimeKHR",
-        ),
-        xr.PFN_xrConvertTimespecTimeToTimeKHR,
-    )
-
-    def get_xr_time():
-        current_time_s = time.time()
-        timespecTime.tv_sec = int(current_time_s)
-        timespecTime.tv_nsec = int(
-            (current_time_s - timespecTime.tv_sec) * 1_000_000_000
-        )
-        xr_time = xr.Time()
-        result = pxrConvertTimespecTimeToTimeKHR(
-            instance,
-            ctypes.pointer(timespecTime),
-            ctypes.byref(xr_time),
-        )
-        result = xr.check_result(result)
-        if result.is_exception():
-            raise result
-        return xr_time
+# 时间转换: 校准后直接由 CLOCK_MONOTONIC 换算 XrTime
+timer = XRTimeProvider(instance, calibrated=True)
+get_xr_time = timer.now
 
 
 print("正在设置动作系统...")
 
-# 创建动作集
-action_set = xr.create_action_set(
-    instance=instance,
-    create_info=xr.ActionSetCreateInfo(
-        action_set_name="quest3_input",
-        localized_action_set_name="Quest 3 Input",
-        priority=0,
-    ),
-)
-
-# 定义控制器路径
-controller_paths = (xr.Path * 2)(
-    xr.string_to_path(instance, "/user/hand/left"),
-    xr.string_to_path(instance, "/user/hand/right"),
-)
-
-
-# 所有按键配置表
-ACTION_CONFIG = {
-    "a_click": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "A Click",
-        "paths": ["/user/hand/right/input/a/click"],
-    },
-    "a_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "A Touch",
-        "paths": ["/user/hand/right/input/a/touch"],
-    },
-    "b_click": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "B Click",
-        "paths": ["/user/hand/right/input/b/click"],
-    },
-    "b_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "B Touch",
-        "paths": ["/user/hand/right/input/b/touch"],
-    },
-    # 左手按钮
-    "x_click": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "X Click",
-        "paths": ["/user/hand/left/input/x/click"],
-    },
-    "x_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "X Touch",
-        "paths": ["/user/hand/left/input/x/touch"],
-    },
-    "y_click": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Y Click",
-        "paths": ["/user/hand/left/input/y/click"],
-    },
-    "y_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Y Touch",
-        "paths": ["/user/hand/left/input/y/touch"],
-    },
-    # 扳机（双手）
-    "trigger": {
-        "type": xr.ActionType.FLOAT_INPUT,
-        "localized": "Trigger",
-        "paths": [
-            "/user/hand/left/input/trigger/value",
-            "/user/hand/right/input/trigger/value",
-        ],
-        "subaction": True,
-    },
-    "trigger_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Trigger Touch",
-        "paths": [
-            "/user/hand/left/input/trigger/touch",
-            "/user/hand/right/input/trigger/touch",
-        ],
-        "subaction": True,
-    },
-    # 握把
-    "grip": {
-        "type": xr.ActionType.FLOAT_INPUT,
-        "localized": "Grip",
-        "paths": [
-            "/user/hand/left/input/squeeze/value",
-            "/user/hand/right/input/squeeze/value",
-        ],
-        "subaction": True,
-    },
-    # 摇杆（二维）
-    "thumbstick": {
-        "type": xr.ActionType.VECTOR2F_INPUT,
-        "localized": "Thumbstick",
-        "paths": [
-            "/user/hand/left/input/thumbstick",
-            "/user/hand/right/input/thumbstick",
-        ],
-        "subaction": True,
-    },
-    "thumbstick_click": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Thumbstick Click",
-        "paths": [
-            "/user/hand/left/input/thumbstick/click",
-            "/user/hand/right/input/thumbstick/click",
-        ],
-        "subaction": True,
-    },
-    "thumbstick_touch": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Thumbstick Touch",
-        "paths": [
-            "/user/hand/left/input/thumbstick/touch",
-            "/user/hand/right/input/thumbstick/touch",
-        ],
-        "subaction": True,
-    },
-    # 左菜单、右系统
-    "menu": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "Menu",
-        "paths": ["/user/hand/left/input/menu/click"],
-    },
-    "system": {
-        "type": xr.ActionType.BOOLEAN_INPUT,
-        "localized": "System",
-        "paths": ["/user/hand/right/input/system/click"],
-    },
-    # 控制器姿态（双手）
-    "pose": {
-        "type": xr.ActionType.POSE_INPUT,
-        "localized": "Controller Pose",
-        "paths": [
-            "/user/hand/left/input/grip/pose",
-            "/user/hand/right/input/grip/pose",
-        ],
-        "subaction": True,
-    },
-}
-
-button_actions = {}  # name → action object
-action_types = {}  # name → action type
-
-for name, cfg in ACTION_CONFIG.items():
-    sub_paths = None
-    if cfg.get("subaction"):
-        sub_paths = (xr.Path * 2)(
-            xr.string_to_path(instance, "/user/hand/left"),
-            xr.string_to_path(instance, "/user/hand/right"),
-        )
-
-    action = xr.create_action(
-        action_set=action_set,
-        create_info=xr.ActionCreateInfo(
-            action_type=cfg["type"],
-            action_name=name,
-            localized_action_name=cfg["localized"],
-            count_subaction_paths=2 if sub_paths else 0,
-            subaction_paths=sub_paths,
-        ),
-    )
-
-    # 保存动作对象
-    button_actions[name] = action
-
-    # 保存动作类型（按名称，而不是 Action 对象）
-    action_types[name] = cfg["type"]
-
-
-print("正在配置输入绑定...")
-
-# Oculus Touch 控制器绑定 - 使用正确的路径
-oculus_bindings = []
-
-for name, cfg in ACTION_CONFIG.items():
-    action = button_actions[name]
-    for path in cfg["paths"]:
-        oculus_bindings.append(
-            xr.ActionSuggestedBinding(
-                action=action,
-                binding=xr.string_to_path(instance, path),
-            )
-        )
-
+# 按动作清单 (actions.json) 创建动作集、动作，并为清单中的每个交互配置建议绑定
 try:
-    # 使用 Oculus Touch 控制器交互配置文件
-    xr.suggest_interaction_profile_bindings(
-        instance=instance,
-        suggested_bindings=xr.InteractionProfileSuggestedBinding(
-            interaction_profile=xr.string_to_path(
-                instance, "/interaction_profiles/oculus/touch_controller"
-            ),
-            count_suggested_bindings=len(oculus_bindings),
-            suggested_bindings=(xr.ActionSuggestedBinding * len(oculus_bindings))(
-                *oculus_bindings
-            ),
-        ),
-    )
-    print("✓ Oculus Touch 控制器绑定成功")
+    compiled = load_manifest().compile(instance)
 except Exception as e:
     print(f"✗ 绑定失败: {e}")
     exit(1)
+print(compiled.format_report())
+
+action_set = compiled.action_set
+button_actions = compiled.actions  # name → action object
+
+# 定义控制器路径
+controller_paths = (xr.Path * 2)(
+    *[compiled.paths[f"/user/hand/{hand}"] for hand in HANDS]
+)
 
 # 附加动作集到会话
 xr.attach_session_action_sets(
@@ -317,14 +93,14 @@ controller_pose_spaces = [
         session=session,
         create_info=xr.ActionSpaceCreateInfo(
             action=controller_pose_action,
-            subaction_path=xr.string_to_path(instance, "/user/hand/left"),
+            subaction_path=controller_paths[0],
         ),
     ),
     xr.create_action_space(
         session=session,
         create_info=xr.ActionSpaceCreateInfo(
             action=controller_pose_action,
-            subaction_path=xr.string_to_path(instance, "/user/hand/right"),
+            subaction_path=controller_paths[1],
         ),
     ),
 ]
@@ -356,31 +132,53 @@ reference_space = xr.create_reference_space(
 )
 
 
-# 通用动作读取函数
-def read_action_state(session, name, action, instance, sub_path=None):
-    t = action_types[name]
+# 独立采样线程: 同步 + 左右手 pose + 所有按键，频率与下面 0.1 s 的 UI 循环无关
+SAMPLE_RATE_HZ = 250
+active_action_set = xr.ActiveActionSet(
+    action_set=action_set,
+    subaction_path=xr.NULL_PATH,  # type: ignore
+)
+tracker = XRControllerTracker(
+    types.SimpleNamespace(
+        session=session,
+        spaces=controller_pose_spaces,
+        ref_space=reference_space,
+        active_set=active_action_set,
+    ),
+    timer,
+)
+# 预编译的按键采样器；同步已由 tracker 完成，pose 与按键共用一个时间戳
+# 摇杆 / 扳机 / 握把先经死区、响应曲线调理再进入面板和网络
+sampler = InputSampler(
+    instance, session, button_actions,
+    config=compiled.manifest.action_config(), conditioning=DEFAULT_CONDITIONING,
+)
+# 只把变化的按键推给面板和网络
+input_events = InputEventStream(sampler, epsilon=0.02)
+# 手势识别（A 双击、握把长按、摇杆甩动、双手捏合）也在采样线程内逐样本推进
+gestures = GestureEngine(sampler, tracker).add_defaults().compile()
+# 采样线程产生的增量，主循环取走（deque 的 append / popleft 是线程安全的）
+input_deltas = collections.deque(maxlen=1024)
+gesture_events = collections.deque(maxlen=256)
+
+
+def collect_input_deltas(snapshot):
+    events = input_events.update()
+    if len(events):
+        input_deltas.append(input_events.changes(events))
 
-    if sub_path:
-        get_info = xr.ActionStateGetInfo(
-            action=action,
-            subaction_path=xr.string_to_path(instance, sub_path),
-        )
-    else:
-        get_info = xr.ActionStateGetInfo(action=action)
 
-    try:
-        if t == xr.ActionType.BOOLEAN_INPUT:
-            return xr.get_action_state_boolean(session, get_info).current_state
+def collect_gestures(snapshot):
+    events = gestures.sink(snapshot)
+    if len(events):
+        gesture_events.extend(gestures.describe(events))
 
-        if t == xr.ActionType.FLOAT_INPUT:
-            return xr.get_action_state_float(session, get_info).current_state
 
-        if t == xr.ActionType.VECTOR2F_INPUT:
-            v = xr.get_action_state_vector2f(session, get_info).current_state
-            return (v.x, v.y)
-    except xr.XrException:
-        print(f"XR Exception: {xr.XrException}")
-        return None
+sampling = SamplingThread(
+    tracker, rate_hz=SAMPLE_RATE_HZ, inputs=sampler,
+    sinks=[collect_input_deltas, collect_gestures],
+)
+sampling.active = False
 
 
 session_state = xr.SessionState.UNKNOWN
@@ -395,6 +193,16 @@ print("  按 Ctrl+C 退出\n")
 panel = ControlPanel(title="Quest 3 控制器状态")
 panel.start()
 
+# 向 TCP / WebSocket 客户端推送同样的数据
+server = StreamServer()
+server.start()
+
+# 增量流需要先有一帧完整状态: 进入 FOCUSED、客户端数量变化时补发，之后定期补发
+KEYFRAME_INTERVAL = 50
+need_keyframe = True
+n_clients = 0
+
+sampling.start()
 
 # 主循环
 try:
@@ -427,92 +235,51 @@ try:
         if session_state == xr.SessionState.STOPPING:
             break
 
-        # 准备面板数据
+        # 准备面板数据（增量）
         panel_data = {
             "会话状态": session_state.name,
             "帧计数": frame_index,
         }
 
+        sampling.active = session_state == xr.SessionState.FOCUSED
         if session_state == xr.SessionState.FOCUSED:
-            # 同步动作状态
-            active_action_set = xr.ActiveActionSet(
-                action_set=action_set,
-                subaction_path=xr.NULL_PATH,  # type: ignore
-            )
-            xr.sync_actions(
-                session=session,
-                sync_info=xr.ActionsSyncInfo(
-                    count_active_action_sets=1,
-                    active_action_sets=ctypes.pointer(active_action_set),
-                ),
-            )
-
-            try:
-                panel_data = {
-                    "会话状态": session_state.name,
-                    "帧计数": frame_index,
-                }
-
-                # 自动读取所有动作
-                for name, cfg in ACTION_CONFIG.items():
-                    act = button_actions[name]
-
-                    # 特殊处理 pose (跳过通用处理逻辑)
-                    if cfg["type"] == xr.ActionType.POSE_INPUT:
-                        for side, space in zip(
-                            ["left", "right"], 
-                            controller_pose_spaces
-                        ):
-                            try:
-                                state = xr.locate_space(
-                                    space=space,
-                                    base_space=reference_space,
-                                    time=get_xr_time(),
-                                )
-
-                                pos = state.pose.position
-                                rot = state.pose.orientation
-
-                                panel_data[f"{name}_{side}_pos"] = (
-                                    round(pos.x, 3),
-                                    round(pos.y, 3),
-                                    round(pos.z, 3),
-                                )
-                                panel_data[f"{name}_{side}_rot"] = (
-                                    round(rot.x, 3),
-                                    round(rot.y, 3),
-                                    round(rot.z, 3),
-                                    round(rot.w, 3),
-                                )
-                            except Exception as e:
-                                panel_data[f"{name}_{side}_pos"] = None
-                                panel_data[f"{name}_{side}_rot"] = None
-                        continue
-
-                    # 处理其他类型的输入
-                    if cfg.get("subaction"):
-                        panel_data[f"{name}_left"] = read_action_state(
-                            session, name, act, instance, "/user/hand/left"
-                        )
-                        panel_data[f"{name}_right"] = read_action_state(
-                            session, name, act, instance, "/user/hand/right"
-                        )
+            # 先取走增量再读快照，快照一定不比这些增量旧
+            while input_deltas:
+                panel_data.update(input_deltas.popleft())
+            while gesture_events:
+                gesture = gesture_events.popleft()
+                print(f"✋ 手势: {gesture['gesture']} {gesture['phase']} ({gesture['value']})")
+                panel_data["手势"] = f"{gesture['gesture']} {gesture['phase']}"
+            snap = sampling.latest
+
+            if snap is not None:
+                if len(server.clients) != n_clients:
+                    n_clients = len(server.clients)
+                    need_keyframe = True
+                if need_keyframe or frame_index % KEYFRAME_INTERVAL == 0:
+                    panel_data.update(sampler.as_dict(snap.inputs))
+                    panel_data.update(sampler.conditioner.digital_dict())
+                    need_keyframe = False
+
+                for i, side in enumerate(HANDS):
+                    if snap.valid[i]:
+                        row = [round(v, 3) for v in snap.poses[i].tolist()]
+                        panel_data[f"{POSE_NAME}_{side}_pos"] = tuple(row[4:])
+                        panel_data[f"{POSE_NAME}_{side}_rot"] = tuple(row[:4])
                     else:
-                        panel_data[name] = read_action_state(
-                            session, name, act, instance
-                        )
-                    
+                        panel_data[f"{POSE_NAME}_{side}_pos"] = None
+                        panel_data[f"{POSE_NAME}_{side}_rot"] = None
 
-            except Exception as e:
-                print(f"DEBUG: 读取摇杆数据时出错: {e}")
-                pass
+        else:
+            need_keyframe = True
 
-        elif session_state == xr.SessionState.IDLE:
+        if session_state == xr.SessionState.IDLE:
             if frame_index % 60 == 0:  # 每分钟提醒一次
                 print("⏳ 等待头显激活...")
 
         # 更新中控面板
         panel.update(panel_data)
+        server.publish(panel_data, merge=True)
 
         # 减慢循环
         time.sleep(0.1)
@@ -528,6 +295,12 @@ except Exception as e:
 finally:
     # 清理资源
     print("🧹 清理资源...")
+    sampling.stop()
+    panel.stop()
+    print(f"采样线程: {sampling.stats()}")
+    print(f"手势: {gestures.stats()}")
+    print(f"路径缓存: {path_cache(instance).stats()}")
+    server.stop()
     if session:
         try:
             xr.destroy_session(session)
@@ -535,7 +308,7 @@ finally:
             pass
     if instance:
         try:
-            xr.destroy_instance(instance)
+            destroy_instance(instance)
         except:
             pass
     print("✅ 清理完成，程序退出")
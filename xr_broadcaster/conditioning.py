@@ -0,0 +1,234 @@
+"""
+模拟量调理: 死区、响应曲线、数字阈值迟滞、速率限制
+
+所有 float / vector2f 通道排成一个分量数组（与 InputSampler 的暂存区布局相同:
+先 float，再每个 vector2f 的 x, y），每个通道的参数在构造时编译成查找数组，
+apply() 对全部通道做固定次数的向量运算，通道再多也不增加 Python 层开销。
+
+处理顺序（每个通道）:
+    1. 轴向死区（仅 vector2f，mode 为 "axial" / "both"）: 每个分量各自去掉死区并重新归一化
+    2. 径向死区: 幅值 (float 取绝对值、vector2f 取半径) 在 [deadzone, outer] 间映射到 [0, 1]
+    3. 响应曲线: 对归一化幅值查表（线性插值），方向 / 符号保持不变
+    4. 速率限制: 每个分量每秒最多变化 rate（0 表示不限制）
+    5. 数字输出: 曲线后的幅值达到 press 为按下，降到 release 以下才松开（迟滞）
+
+    cond = AnalogConditioner(sampler.slots[FLOAT], sampler.slots[VECTOR2F], DEFAULT_CONDITIONING)
+    cond.apply(stage, xr_time)     # 就地调理
+    cond.floats / cond.sticks / cond.digital / cond.changed
+"""
+
+import numpy as np
+
+from xr_broadcaster.action_config import HANDS
+
+# 键为动作名，或 "动作名_left" / "动作名_right" 单独覆盖一只手；未列出的通道只做 [0, 1] 归一化
+DEFAULT_CONDITIONING = {
+    "thumbstick": {"deadzone": 0.12, "outer": 0.95, "mode": "radial", "curve": ("power", 1.5)},
+    "trigger": {"deadzone": 0.04, "outer": 0.98, "press": 0.6, "release": 0.4},
+    "grip": {"deadzone": 0.04, "outer": 0.98, "press": 0.7, "release": 0.5},
+}
+
+_DEFAULTS = {
+    "deadzone": 0.0, "outer": 1.0, "mode": "radial", "curve": "linear",
+    "rate": 0.0, "press": 0.5, "release": 0.5,
+}
+_MODES = ("radial", "axial", "both")
+
+LUT_SIZE = 257  # 响应曲线查找表的采样点数（[0, 1] 上等距）
+
+
+def curve_table(curve, size=LUT_SIZE):
+    """
+    响应曲线 → 查找表
+    curve: "linear"；("power", 指数)；("expo", 系数 0..1，x 与 x^3 的混合)；
+           或控制点序列 [(x, y), ...]（x 递增，分段线性）
+    """
+    x = np.linspace(0.0, 1.0, size)
+    if curve == "linear":
+        y = x
+    elif isinstance(curve, tuple) and curve[0] == "power":
+        y = x ** float(curve[1])
+    elif isinstance(curve, tuple) and curve[0] == "expo":
+        k = float(curve[1])
+        y = (1 - k) * x + k * x ** 3
+    else:
+        points = np.asarray(curve, np.float64)
+        if points.ndim != 2 or points.shape[1] != 2 or np.any(np.diff(points[:, 0]) <= 0):
+            raise ValueError(f"invalid response curve: {curve!r}")
+        y = np.interp(x, points[:, 0], points[:, 1])
+    return np.clip(y, 0.0, 1.0).astype(np.float32)
+
+
+class AnalogConditioner:
+    """
+    float_slots / vec2_slots: InputSampler.slots 中对应类型的 [(动作名, 手序号)]
+    config: 见 DEFAULT_CONDITIONING；每项可含 deadzone, outer, mode, curve, rate, press, release
+
+    输出（apply 后就地更新）:
+        values   分量数组，floats / sticks 是它的视图
+        digital  每个通道的按下状态（迟滞后）
+        changed  每个通道本次 apply 输出是否变化（速率限制收敛中的通道也算）
+    """
+
+    def __init__(self, float_slots, vec2_slots, config=None):
+        if config is None:
+            config = DEFAULT_CONDITIONING
+        self.slots = list(float_slots) + list(vec2_slots)
+        self.keys = [name if hand is None else f"{name}_{HANDS[hand]}" for name, hand in self.slots]
+        n_float, n_vec2 = len(float_slots), len(vec2_slots)
+        n = len(self.slots)
+        params = [self._params(config, name, hand) for name, hand in self.slots]
+
+        # 通道参数
+        inner = np.array([p["deadzone"] for p in params], np.float32)
+        outer = np.array([p["outer"] for p in params], np.float32)
+        if np.any(outer <= inner):
+            raise ValueError("outer must be greater than deadzone")
+        self._inner = inner
+        self._inv_span = (1.0 / (outer - inner)).astype(np.float32)
+        self._press = np.array([p["press"] for p in params], np.float32)
+        self._release = np.array([p["release"] for p in params], np.float32)
+        if np.any(self._release > self._press):
+            raise ValueError("release threshold must not exceed press threshold")
+
+        # 响应曲线: 所有通道的表首尾相接，按 通道起点 + 下标 取值
+        tables = {}
+        lut_index = []
+        for p in params:
+            key = repr(p["curve"])
+            if key not in tables:
+                tables[key] = (len(tables), curve_table(p["curve"]))
+            lut_index.append(tables[key][0])
+        self._lut = np.concatenate([t for _, t in tables.values()])
+        self._lut_base = np.array(lut_index, np.intp) * LUT_SIZE
+        self._linear = all(p["curve"] == "linear" for p in params)
+
+        # 分量 ↔ 通道
+        self.n_components = n_float + 2 * n_vec2
+        comp_channel = list(range(n_float)) + [n_float + i for i in range(n_vec2) for _ in range(2)]
+        self._comp_channel = np.array(comp_channel, np.intp)
+        self._starts = np.array(
+            list(range(n_float)) + [n_float + 2 * i for i in range(n_vec2)], np.intp
+        )
+
+        # 轴向死区（分量级，float 通道恒为 0）
+        axial = np.zeros(self.n_components, np.float32)
+        for ch, p in enumerate(params[n_float:], n_float):
+            if p["mode"] not in _MODES:
+                raise ValueError(f"unknown deadzone mode {p['mode']!r}")
+            if p["mode"] in ("axial", "both"):
+                axial[self._comp_channel == ch] = p["deadzone"]
+                if p["mode"] == "axial":
+                    # 仅轴向: 径向只做归一化
+                    inner[ch] = 0.0
+                    self._inv_span[ch] = 1.0 / outer[ch]
+        self._axial = axial if axial.any() else None
+        self._axial_scale = (1.0 / (1.0 - axial)).astype(np.float32)
+
+        # 速率限制（单位 / 秒，分量级）
+        rate = np.array([p["rate"] for p in params], np.float64)[self._comp_channel]
+        self._rate = np.where(rate > 0, rate, np.inf) if np.any(rate > 0) else None
+
+        # 工作区与输出
+        k = self.n_components
+        self.values = np.zeros(k, np.float32)
+        self.floats = self.values[:n_float]
+        self.sticks = self.values[n_float:].reshape(-1, 2)
+        self.digital = np.zeros(n, np.bool_)
+        self.changed = np.zeros(n, np.bool_)
+        self._work = np.zeros(k, np.float32)
+        self._work2 = np.zeros(k, np.float32)
+        self._mag = np.zeros(n, np.float32)
+        self._norm = np.zeros(n, np.float32)
+        self._scale = np.zeros(n, np.float32)
+        self._pos = np.zeros(n, np.float32)
+        self._idx = np.zeros(n, np.intp)
+        self._lo = np.zeros(n, np.float32)
+        self._hi = np.zeros(n, np.float32)
+        self._held = np.zeros(n, np.bool_)
+        self._comp_changed = np.zeros(k, np.bool_)
+        self._last_time = None
+
+    @staticmethod
+    def _params(config, name, hand):
+        params = dict(_DEFAULTS)
+        params.update(config.get(name, {}))
+        if hand is not None:
+            params.update(config.get(f"{name}_{HANDS[hand]}", {}))
+        return params
+
+    def apply(self, components, xr_time=None):
+        """
+        就地调理一帧: components 为分量数组（InputSampler 暂存区），结果同时写入 self.values
+        xr_time: 纳秒时间戳，仅速率限制需要
+        """
+        c = components
+        if not len(self.slots):
+            return c
+        if self._axial is not None:
+            w = self._work
+            np.abs(c, out=w)
+            w -= self._axial
+            np.maximum(w, 0, out=w)
+            w *= self._axial_scale
+            np.copysign(w, c, out=c)
+
+        # 幅值 → 径向死区归一化
+        w = self._work
+        np.multiply(c, c, out=w)
+        mag = self._mag
+        np.add.reduceat(w, self._starts, out=mag)
+        np.sqrt(mag, out=mag)
+        norm = self._norm
+        np.subtract(mag, self._inner, out=norm)
+        norm *= self._inv_span
+        np.clip(norm, 0.0, 1.0, out=norm)
+
+        # 响应曲线（查表 + 线性插值）
+        if not self._linear:
+            pos = self._pos
+            np.multiply(norm, LUT_SIZE - 1, out=pos)
+            idx = self._idx
+            idx[:] = pos
+            np.minimum(idx, LUT_SIZE - 2, out=idx)
+            pos -= idx
+            idx += self._lut_base
+            np.take(self._lut, idx, out=self._lo)
+            idx += 1
+            np.take(self._lut, idx, out=self._hi)
+            self._hi -= self._lo
+            self._hi *= pos
+            np.add(self._lo, self._hi, out=norm)
+
+        # 方向 / 符号不变，按幅值比例缩放
+        scale = self._scale
+        scale[:] = 0
+        np.divide(norm, mag, out=scale, where=mag > 0)
+        out = self._work2
+        np.multiply(c, scale[self._comp_channel], out=out)
+
+        # 速率限制
+        if self._rate is not None and xr_time is not None:
+            dt = 0 if self._last_time is None else xr_time - self._last_time
+            if dt > 0:
+                step = self._rate * (dt / 1e9)
+                out -= self.values
+                np.clip(out, -step, step, out=out)
+                out += self.values
+            self._last_time = xr_time
+
+        np.not_equal(out, self.values, out=self._comp_changed)
+        np.logical_or.reduceat(self._comp_changed, self._starts, out=self.changed)
+        np.copyto(self.values, out)
+        np.copyto(c, out)
+
+        # 迟滞: 按下中只要高于 release 就保持
+        np.greater(norm, self._release, out=self._held)
+        self._held &= self.digital
+        np.greater_equal(norm, self._press, out=self.digital)
+        self.digital |= self._held
+        return c
+
+    def digital_dict(self):
+        """{键名_pressed: bool}，仅供面板 / 调试输出"""
+        return {f"{key}_pressed": v for key, v in zip(self.keys, self.digital.tolist())}
@@ -0,0 +1,396 @@
+"""
+增量手势识别: 预编译的表驱动状态机，按样本 O(1) 推进
+
+每个手势是一台小状态机，输入只有两个量:
+    level      信号相对两个阈值的档位 0 / 1 / 2（低于 off / 介于两者之间 / 达到 on）
+    timed_out  当前状态停留时间是否已达到该状态的时限
+compile() 把所有手势的转移表拼成一个整数数组，状态用"行偏移"表示，
+每次 update() 对全部手势（所有手、所有设备）只做固定次数的向量运算:
+
+    取信号 → 算档位 / 超时 → 查表得到下一行 → 与当前行比较
+
+与手势数量无关；没有状态变化时直接返回。手势事件的时间取触发边沿的
+XrTime（按键的 last_change_time；超时触发的取进入状态时间 + 时限）。
+
+    gestures = GestureEngine(sampler, tracker)
+    gestures.add_defaults()          # A 双击、握把长按、摇杆甩动、双手捏合
+    gestures.compile()
+    ...
+    sampler.sample()
+    events = gestures.update(sampler.last_time)
+    gestures.describe(events)
+"""
+
+import numpy as np
+import xr
+
+from xr_broadcaster.action_config import HANDS
+
+_BOOL = xr.ActionType.BOOLEAN_INPUT
+_FLOAT = xr.ActionType.FLOAT_INPUT
+_VEC2 = xr.ActionType.VECTOR2F_INPUT
+
+TRIGGER = 1
+BEGIN = 2
+END = 3
+
+PHASES = {TRIGGER: "trigger", BEGIN: "begin", END: "end"}
+
+# 一个事件: 触发边沿的 XrTime、手势序号 (见 GestureEngine.names)、阶段、值
+#   值: 摇杆甩动为方向角 (度, 0 = 右, 90 = 上)；双手捏合为两设备间距 (米)；其余为信号值
+GESTURE_EVENT_DTYPE = np.dtype([
+    ("xr_time", "<i8"),
+    ("gesture", "<u2"),
+    ("phase", "u1"),
+    ("value", "<f4"),
+])
+
+_N_SYMBOLS = 6  # level (0..2) * 2 + timed_out
+_NO_TIMEOUT = np.iinfo(np.int64).max
+
+
+# ---- 状态机定义: (状态名, 转移函数 (state, level, timed_out) → state, {进入该状态时发出的事件阶段})
+
+def _double_tap(s, level, timed_out):
+    idle, down, up, fired, wait = range(5)
+    if s == idle:
+        return down if level == 2 else idle
+    if s == down:  # 第一次按下，按太久就不算点击
+        if timed_out:
+            return idle if level == 0 else wait
+        return up if level == 0 else down
+    if s == up:  # 等第二次按下
+        if level == 2:
+            return down if timed_out else fired
+        return idle if timed_out else up
+    return idle if level == 0 else wait  # fired / wait: 等松开
+
+
+def _long_press(s, level, timed_out):
+    idle, down, fired, held, end = range(5)
+    if s == idle:
+        return down if level == 2 else idle
+    if s == down:  # level 1 保持（迟滞）
+        if level == 0:
+            return idle
+        return fired if timed_out else down
+    if s in (fired, held):
+        return end if level == 0 else held
+    return down if level == 2 else idle  # end
+
+
+def _flick(s, level, timed_out):
+    rest, moving, fired, wait = range(4)
+    if s == rest:
+        return (rest, moving, fired)[level]
+    if s == moving:  # 离开中心后需在时限内推到边缘
+        if level == 0:
+            return rest
+        if timed_out:
+            return wait
+        return fired if level == 2 else moving
+    return rest if level == 0 else wait  # fired / wait: 等回中
+
+
+def _hold(s, level, timed_out):
+    idle, begin, held, end = range(4)
+    if s == idle:
+        return begin if level == 2 else idle
+    if s in (begin, held):
+        return end if level == 0 else held
+    return begin if level == 2 else idle  # end
+
+
+_MACHINES = {
+    "double_tap": (("idle", "down", "up", "fired", "wait"), _double_tap, {3: TRIGGER}),
+    "long_press": (("idle", "down", "fired", "held", "end"), _long_press, {2: BEGIN, 4: END}),
+    "flick": (("rest", "moving", "fired", "wait"), _flick, {2: TRIGGER}),
+    "pinch": (("idle", "begin", "held", "end"), _hold, {1: BEGIN, 3: END}),
+}
+
+
+def _compile_machine(kind):
+    """转移函数 → (状态数, 6) 的下一状态表"""
+    states, fn = _MACHINES[kind][:2]
+    return np.array([
+        [fn(s, sym // 2, sym % 2) for sym in range(_N_SYMBOLS)]
+        for s in range(len(states))
+    ], np.int64)
+
+
+_TABLES = {kind: _compile_machine(kind) for kind in _MACHINES}
+
+
+class GestureEngine:
+    """
+    sampler: InputSampler，update() 前应已调用 sample()（直接读它的状态数组）
+    tracker: 提供 poses (N, 7) 的 XRControllerTracker / ReplayTracker，仅双手捏合需要
+
+    声明 (add_*) → compile() → 每个样本 update(xr_time)，在同一线程中调用
+    （如作为 SamplingThread 的 sink）。subaction 动作的 hand=None 表示两只手各一个手势。
+    """
+
+    def __init__(self, sampler, tracker=None):
+        self.sampler = sampler
+        self.tracker = tracker
+        self.gestures = []  # (名称, 类型, 参数)
+        self.names = []
+        self._compiled = False
+
+        # 所有按键槽位的信号向量: bool → float → vector2f (半径) → 捏合 (两手较小值)
+        slots = sampler.slots
+        self._slot_index = {}
+        offset = 0
+        for t in (_BOOL, _FLOAT, _VEC2):
+            for i, key in enumerate(slots[t]):
+                self._slot_index[key] = (t, offset + i)
+            offset += len(slots[t])
+        self._n_slots = offset
+
+        self.ticks = 0
+        self.emitted = 0
+
+    # ---- 声明
+
+    def add_double_tap(self, action, hand=None, max_gap_ms=300, name=None):
+        """max_gap_ms: 两次按下之间（以及每次按住）的最长时间"""
+        for h in self._hands(action, hand):
+            timeout = int(max_gap_ms * 1e6)
+            self._add(name, "double_tap", action, h, on=0.5, off=0.5,
+                      timeouts={1: timeout, 2: timeout})
+
+    def add_long_press(self, action, hand=None, hold_ms=800, on=0.8, off=0.6, name=None):
+        """on / off: 模拟量的按下 / 松开阈值（迟滞）；布尔动作用默认值即可"""
+        for h in self._hands(action, hand):
+            self._add(name, "long_press", action, h, on=on, off=off,
+                      timeouts={1: int(hold_ms * 1e6)})
+
+    def add_flick(self, action="thumbstick", hand=None, window_ms=150, on=0.9, off=0.25,
+                  name=None):
+        """摇杆半径从 off 以下在 window_ms 内推到 on 以上"""
+        for h in self._hands(action, hand):
+            self._add(name, "flick", action, h, on=on, off=off, timeouts={1: int(window_ms * 1e6)})
+
+    def add_pinch(self, action="grip", devices=(0, 1), on=0.8, off=0.6, name=None):
+        """两手 action 同时按下开始、任一松开结束；值为 devices 两个设备（默认双手 grip）的间距"""
+        if self.tracker is None:
+            raise ValueError("pinch gestures need a tracker")
+        self._add(name, "pinch", action, None, on=on, off=off, timeouts={},
+                  devices=tuple(devices))
+
+    def add_defaults(self):
+        self.add_double_tap("a_click")
+        self.add_long_press("grip")
+        self.add_flick("thumbstick")
+        if self.tracker is not None:
+            self.add_pinch("grip")
+        return self
+
+    def _hands(self, action, hand):
+        if hand is not None or (action, None) in self._slot_index:
+            return [hand]
+        return list(range(len(HANDS)))
+
+    def _add(self, name, kind, action, hand, on, off, timeouts, devices=None):
+        if self._compiled:
+            raise RuntimeError("gestures must be added before compile()")
+        if kind == "pinch":
+            keys = [(action, h) for h in range(len(HANDS))]
+        else:
+            keys = [(action, hand)]
+        for key in keys:
+            if key not in self._slot_index:
+                raise KeyError(f"no sampled input for {key}")
+        if name is None:
+            name = f"{kind}_{action}" if hand is None else f"{kind}_{action}_{HANDS[hand]}"
+        if name in self.names:
+            raise ValueError(f"duplicate gesture {name!r}")
+        self.gestures.append((name, kind, {
+            "keys": keys, "on": on, "off": off, "timeouts": timeouts, "devices": devices,
+        }))
+        self.names.append(name)
+
+    # ---- 编译
+
+    def compile(self):
+        n = len(self.gestures)
+        tables, emits, timeouts = [], [], []
+        channels = np.zeros(n, np.intp)
+        pinch_a, pinch_b, pinch_dev = [], [], []
+        self._kinds = []
+        for g, (name, kind, params) in enumerate(self.gestures):
+            base = sum(len(t) for t in tables)
+            table = _TABLES[kind]
+            tables.append((table + base) * _N_SYMBOLS)  # 下一状态 → 全局行偏移
+            states, _, emit = _MACHINES[kind]
+            emits.extend(emit.get(s, 0) for s in range(len(states)))
+            timeouts.extend(params["timeouts"].get(s, _NO_TIMEOUT) for s in range(len(states)))
+            if kind == "pinch":
+                channels[g] = self._n_slots + len(pinch_a)
+                a, b = (self._slot_index[k][1] for k in params["keys"])
+                pinch_a.append(a)
+                pinch_b.append(b)
+                pinch_dev.append(params["devices"])
+            else:
+                channels[g] = self._slot_index[params["keys"][0]][1]
+            self._kinds.append(kind)
+
+        self._table = np.concatenate([t.ravel() for t in tables]) if n else np.zeros(0, np.int64)
+        self._emit = np.array(emits, np.uint8)
+        self._timeout = np.array(timeouts, np.int64)
+        self._initial = np.cumsum([0] + [len(t) for t in tables[:-1]], dtype=np.int64) * _N_SYMBOLS
+        self._row = self._initial.copy()  # 当前状态 = 全局行偏移
+        self._deadline = np.full(n, _NO_TIMEOUT, np.int64)
+
+        self._on = np.array([p["on"] for _, _, p in self.gestures], np.float32)
+        self._off = np.array([p["off"] for _, _, p in self.gestures], np.float32)
+        # level 只需区分 0 / 1 / 2；on == off 时 (按键) 直接在 0 / 2 之间跳
+        self._channels = channels
+        self._pinch_a = np.array(pinch_a, np.intp)
+        self._pinch_b = np.array(pinch_b, np.intp)
+        self._pinch_dev = np.array(pinch_dev, np.intp).reshape(-1, 2)
+        self._flick = np.array([k == "flick" for k in self._kinds], np.bool_)
+        self._pinch = np.array([k == "pinch" for k in self._kinds], np.bool_)
+
+        s = self.sampler
+        self._views = [s.state_view(t, "current_state") for t in (_BOOL, _FLOAT, _VEC2)]
+        self._time_views = [s.state_view(t, "last_change_time") for t in (_BOOL, _FLOAT, _VEC2)]
+        n_bool, n_float = len(self._views[0]), len(self._views[1])
+        self._signal_all = np.zeros(self._n_slots + len(pinch_a), np.float32)
+        self._sig_bool = self._signal_all[:n_bool]
+        self._sig_float = self._signal_all[n_bool:n_bool + n_float]
+        self._sig_vec2 = self._signal_all[n_bool + n_float:self._n_slots]
+        self._sig_pinch = self._signal_all[self._n_slots:]
+        self._vec2_offset = n_bool + n_float
+        self._times_all = np.zeros(len(self._signal_all), np.int64)
+
+        self._signal = np.zeros(n, np.float32)
+        self._lo = np.zeros(n, np.bool_)
+        self._hi = np.zeros(n, np.bool_)
+        self._index = np.zeros(n, np.int64)
+        self._next = np.zeros(n, np.int64)
+        self._buffer = np.zeros(n, GESTURE_EVENT_DTYPE)  # 每个手势每步至多一个事件
+        self._compiled = True
+        return self
+
+    # ---- 热路径
+
+    def update(self, xr_time):
+        """推进所有手势一步，返回本步事件（内部缓冲区的视图，下次 update 前有效）"""
+        self.ticks += 1
+        bools, floats, vec2 = self._views
+        np.copyto(self._sig_bool, bools, casting="unsafe")
+        np.copyto(self._sig_float, floats)
+        np.hypot(vec2[:, 0], vec2[:, 1], out=self._sig_vec2)
+        if len(self._sig_pinch):
+            np.minimum(self._signal_all[self._pinch_a], self._signal_all[self._pinch_b],
+                       out=self._sig_pinch)
+
+        signal = np.take(self._signal_all, self._channels, out=self._signal)
+        np.greater_equal(signal, self._off, out=self._lo)
+        np.greater_equal(signal, self._on, out=self._hi)
+        # 行偏移 + 2 * level + timed_out; level = lo + hi（on == off 时按键只有 0 / 2）
+        index = self._index
+        np.add(self._row, self._deadline <= xr_time, out=index)
+        index += self._lo
+        index += self._lo
+        index += self._hi
+        index += self._hi
+        np.take(self._table, index, out=self._next)
+        if np.array_equal(self._next, self._row):
+            return self._buffer[:0]
+        return self._advance(xr_time)
+
+    def _advance(self, xr_time):
+        changed = np.flatnonzero(self._next != self._row)
+        rows = self._next[changed]
+        states = rows // _N_SYMBOLS
+
+        # 事件时间: 通道的 last_change_time（无则当前时间）；已超时且截止之后
+        # 通道没有再变化的，是超时触发，取截止时间
+        self._fill_times(xr_time)
+        edge = self._times_all[self._channels[changed]]
+        known = (edge > 0) & (edge <= xr_time)
+        deadline = self._deadline[changed]
+        when = np.where(
+            deadline <= xr_time,
+            np.where(known, np.maximum(deadline, edge), deadline),
+            np.where(known, edge, xr_time),
+        )
+
+        self._row[changed] = rows
+        timeout = self._timeout[states]
+        limited = timeout != _NO_TIMEOUT
+        deadline[:] = _NO_TIMEOUT
+        deadline[limited] = when[limited] + timeout[limited]
+        self._deadline[changed] = deadline
+
+        phase = self._emit[states]
+        fire = phase != 0
+        count = int(fire.sum())
+        out = self._buffer[:count]
+        if count:
+            g = changed[fire]
+            out["xr_time"] = when[fire]
+            out["gesture"] = g
+            out["phase"] = phase[fire]
+            out["value"] = self._values(g)
+            self.emitted += count
+        return out
+
+    def _fill_times(self, xr_time):
+        n_bool, n_float = len(self._sig_bool), len(self._sig_float)
+        t = self._times_all
+        np.copyto(t[:n_bool], self._time_views[0])
+        np.copyto(t[n_bool:n_bool + n_float], self._time_views[1])
+        np.copyto(t[n_bool + n_float:self._n_slots], self._time_views[2])
+        t[self._n_slots:] = xr_time
+
+    def _values(self, g):
+        values = self._signal[g].copy()
+        flick = self._flick[g]
+        if flick.any():
+            vec2 = self._views[2][self._channels[g[flick]] - self._vec2_offset]
+            values[flick] = np.degrees(np.arctan2(vec2[:, 1], vec2[:, 0]))
+        pinch = self._pinch[g]
+        if pinch.any():
+            values[pinch] = self.pinch_distance()[self._pinch_slot(g[pinch])]
+        return values
+
+    def _pinch_slot(self, g):
+        return self._channels[g] - self._n_slots
+
+    def pinch_distance(self):
+        """每个捏合手势当前两设备的间距 (米)，与添加顺序一致"""
+        positions = self.tracker.poses[:, 4:7]
+        d = positions[self._pinch_dev[:, 0]] - positions[self._pinch_dev[:, 1]]
+        return np.sqrt((d * d).sum(axis=1))
+
+    def sink(self, snapshot):
+        """作为 SamplingThread 的 sink 使用，返回本步事件"""
+        return self.update(snapshot.xr_time)
+
+    # ---- 非热路径
+
+    def states(self):
+        """{手势名: 当前状态名}"""
+        out = {}
+        rows = (self._row - self._initial) // _N_SYMBOLS
+        for name, kind, s in zip(self.names, self._kinds, rows.tolist()):
+            out[name] = _MACHINES[kind][0][s]
+        return out
+
+    def reset(self):
+        self._row[:] = self._initial
+        self._deadline[:] = _NO_TIMEOUT
+
+    def describe(self, events):
+        """事件 → 便于打印 / JSON 的字典列表"""
+        return [
+            {"t": t, "gesture": self.names[g], "phase": PHASES[p], "value": round(v, 3)}
+            for t, g, p, v in zip(events["xr_time"].tolist(), events["gesture"].tolist(),
+                                  events["phase"].tolist(), events["value"].tolist())
+        ]
+
+    def stats(self):
+        return {"gestures": len(self.gestures), "ticks": self.ticks, "emitted": self.emitted}
@@ -0,0 +1,191 @@
+"""
+基于 changed_since_last_sync 的按键增量事件流
+
+InputSampler.sample() 之后调用 InputEventStream.update()，只为本次同步中
+运行时标记为已变化的动作生成事件:
+
+    PRESS / RELEASE   布尔动作的上升沿 / 下降沿
+    ANALOG            float / vector2f 相对上次发出的值变化超过 epsilon，
+                      或回到 0（松开扳机 / 摇杆回中一定会发出）
+
+InputSampler 开启了模拟量调理时，float / vector2f 事件基于调理后的值，
+并且每个模拟通道的数字输出（AnalogConditioner.digital，带迟滞）翻转时
+另发一个 PRESS / RELEASE，键名为 "<通道>_pressed"（如 trigger_right_pressed）。
+事件时间取运行时给出的 last_change_time；用户不操作时 update() 只做
+三次向量比较，不产生任何事件。
+"""
+
+import numpy as np
+import xr
+
+from xr_broadcaster.action_config import HANDS
+
+_TYPES = (
+    xr.ActionType.BOOLEAN_INPUT,
+    xr.ActionType.FLOAT_INPUT,
+    xr.ActionType.VECTOR2F_INPUT,
+)
+
+PRESS = 1
+RELEASE = 2
+ANALOG = 3
+
+EVENT_KINDS = {PRESS: "press", RELEASE: "release", ANALOG: "analog"}
+
+# 一个事件: 时间 (XrTime)、槽位序号 (见 InputEventStream.slots)、类型、值 (bool / float 只用第 0 个分量)
+EVENT_DTYPE = np.dtype([
+    ("xr_time", "<i8"),
+    ("slot", "<u2"),
+    ("kind", "u1"),
+    ("value", "<f4", (2,)),
+])
+
+
+class InputEventStream:
+    """
+    events = stream.update()     # EVENT_DTYPE 数组（内部缓冲区的视图，下次 update 前有效）
+    stream.changes(events)       # {"a_click": True, "trigger_right": 0.42,
+                                 #  "trigger_right_pressed": False, ...}
+
+    epsilon: 模拟量的合并阈值，小于它的抖动不发事件（vector2f 按分量最大差）
+    """
+
+    def __init__(self, sampler, epsilon=0.02):
+        self.sampler = sampler
+        self.epsilon = np.float32(epsilon)
+
+        # 全局槽位: bool → float → vector2f，与 sampler.slots 顺序一致
+        self.slots = []
+        self.keys = []  # 槽位 → btn.py / as_dict 的键名
+        for t in _TYPES:
+            for name, hand in sampler.slots[t]:
+                self.slots.append((name, hand))
+                self.keys.append(name if hand is None else f"{name}_{HANDS[hand]}")
+        bool_t, float_t, vec2_t = _TYPES
+        self._n_bool = len(sampler.slots[bool_t])
+        self._n_float = len(sampler.slots[float_t])
+        self._n_analog = len(self.slots) - self._n_bool
+
+        self._bool, self._float, self._vec2 = [
+            tuple(sampler.state_view(t, field) for field in
+                  ("current_state", "changed_since_last_sync", "last_change_time"))
+            for t in _TYPES
+        ]
+        cond = sampler.conditioner
+        self._digital = None
+        if cond is not None:
+            # 模拟量改用调理后的值；"变化"以调理输出为准（死区内的抖动不算，速率限制收敛中算）
+            self._float = (cond.floats, cond.changed[:self._n_float], self._float[2])
+            self._vec2 = (cond.sticks, cond.changed[self._n_float:], self._vec2[2])
+            # 数字输出槽位接在模拟量之后，与 cond.digital 的通道顺序一致
+            for name, hand in cond.slots:
+                self.slots.append((name, hand))
+            self.keys.extend(f"{key}_pressed" for key in cond.keys)
+            self._digital = cond.digital
+            self._digital_sent = np.zeros(len(cond.slots), np.bool_)
+            self._digital_changed = np.zeros(len(cond.slots), np.bool_)
+
+        # 上次发出的模拟量，用于合并抖动
+        self._float_sent = np.zeros(self._n_float, np.float32)
+        self._vec2_sent = np.zeros((len(sampler.slots[vec2_t]), 2), np.float32)
+
+        self._buffer = np.zeros(len(self.slots), EVENT_DTYPE)
+        self._count = 0
+
+        self.syncs = 0
+        self.emitted = 0
+        self.coalesced = 0  # 运行时报告变化但被 epsilon 合并掉的次数
+
+    def update(self):
+        self.syncs += 1
+        self._count = 0
+
+        current, changed, times = self._bool
+        idx = np.flatnonzero(changed)
+        if len(idx):
+            pressed = current[idx] != 0
+            self._emit(idx, times[idx], np.where(pressed, PRESS, RELEASE), pressed)
+
+        self._update_analog(self._float, self._float_sent, self._n_bool)
+        self._update_analog(self._vec2, self._vec2_sent, self._n_bool + self._n_float)
+        if self._digital is not None:
+            self._update_digital()
+
+        self.emitted += self._count
+        return self._buffer[:self._count]
+
+    def _update_analog(self, views, sent, offset):
+        current, changed, times = views
+        idx = np.flatnonzero(changed)
+        if not len(idx):
+            return
+        value = current[idx]
+        last = sent[idx]
+        delta = np.abs(value - last)
+        at_rest = value == 0
+        if value.ndim > 1:
+            delta = delta.max(axis=1)
+            at_rest = at_rest.all(axis=1)
+        keep = (delta > self.epsilon) | (at_rest & (delta > 0))
+        self.coalesced += len(idx) - int(keep.sum())
+        if not keep.any():
+            return
+        idx, value = idx[keep], value[keep]
+        sent[idx] = value
+        self._emit(idx + offset, times[idx], ANALOG, value)
+
+    def _update_digital(self):
+        changed = np.not_equal(self._digital, self._digital_sent, out=self._digital_changed)
+        if not changed.any():
+            return
+        idx = np.flatnonzero(changed)
+        pressed = self._digital[idx]
+        self._digital_sent[idx] = pressed
+        # 翻转时间取对应模拟通道的 last_change_time
+        is_float = idx < self._n_float
+        times = np.empty(len(idx), np.int64)
+        times[is_float] = self._float[2][idx[is_float]]
+        times[~is_float] = self._vec2[2][idx[~is_float] - self._n_float]
+        self._emit(idx + self._n_bool + self._n_analog, times,
+                   np.where(pressed, PRESS, RELEASE), pressed)
+
+    def _emit(self, slots, xr_time, kind, value):
+        n = len(slots)
+        out = self._buffer[self._count:self._count + n]
+        out["slot"] = slots
+        out["xr_time"] = xr_time
+        out["kind"] = kind
+        if value.ndim > 1:
+            out["value"] = value
+        else:
+            out["value"][:, 0] = value
+            out["value"][:, 1] = 0
+        self._count += n
+
+    def changes(self, events):
+        """事件 → {键名: 新值}，键名与 InputSampler.as_dict 一致，供面板 / 网络增量更新"""
+        out = {}
+        for slot, kind, value in zip(events["slot"].tolist(), events["kind"].tolist(),
+                                     events["value"].tolist()):
+            if kind != ANALOG:
+                out[self.keys[slot]] = kind == PRESS
+            elif slot >= self._n_bool + self._n_float:
+                out[self.keys[slot]] = (round(value[0], 3), round(value[1], 3))
+            else:
+                out[self.keys[slot]] = round(value[0], 3)
+        return out
+
+    def describe(self, events):
+        """事件 → 便于打印 / JSON 的字典列表"""
+        return [
+            {"t": t, "key": self.keys[s], "kind": EVENT_KINDS[k], "value": v}
+            for t, s, k, v in zip(events["xr_time"].tolist(), events["slot"].tolist(),
+                                  events["kind"].tolist(), events["value"].tolist())
+        ]
+
+    def stats(self):
+        return {
+            "syncs": self.syncs,
+            "emitted": self.emitted,
+            "coalesced": self.coalesced,
+        }
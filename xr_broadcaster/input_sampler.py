@@ -0,0 +1,230 @@
+"""
+按 ACTION_CONFIG 预编译的按键采样器
+
+构造时把配置表编译成:
+    * 每个 (动作, 手) 一个预分配的 ActionStateGetInfo + 状态结构体
+    * 直接调用 xr.raw_functions.xrGetActionState* 的调用表
+    * 按类型分组的状态数组上的 NumPy 跨步视图，以及到输出记录的字节索引
+
+每帧 sample() 只做: 一次 xrSyncActions、一次取时间、逐个 raw 调用、
+几次向量化拷贝到同一条预分配的记录 (dtype 见 action_config.input_dtype)。
+不再有 string_to_path、结构体构造或字典拼装。
+"""
+
+import ctypes
+
+import numpy as np
+import xr
+
+from xr_broadcaster.action_config import ACTION_CONFIG, HANDS, input_dtype
+from xr_broadcaster.conditioning import AnalogConditioner
+from xr_broadcaster.xr_paths import path_cache
+
+# 各动作类型: (状态结构体, raw 函数名)
+_STATE_TYPES = {
+    xr.ActionType.BOOLEAN_INPUT: (xr.ActionStateBoolean, "xrGetActionStateBoolean"),
+    xr.ActionType.FLOAT_INPUT: (xr.ActionStateFloat, "xrGetActionStateFloat"),
+    xr.ActionType.VECTOR2F_INPUT: (xr.ActionStateVector2f, "xrGetActionStateVector2f"),
+}
+# xr.raw_functions 的返回值会被转换成 xr.Result 枚举，参数也要逐个做类型检查，
+# 单次调用的包装开销约是裸调用的 3 倍；热路径上改用同一地址、
+# 参数全部为 void* 的原型，传入预先取好的整数地址
+_LEAN_PROTOS = {
+    n: ctypes.CFUNCTYPE(ctypes.c_int32, *[ctypes.c_void_p] * n) for n in (2, 3)
+}
+
+_BOOL = xr.ActionType.BOOLEAN_INPUT
+_FLOAT = xr.ActionType.FLOAT_INPUT
+_VEC2 = xr.ActionType.VECTOR2F_INPUT
+
+
+def _lean(fn):
+    return _LEAN_PROTOS[len(fn.argtypes)](_address(fn))
+
+
+def _address(obj):
+    return ctypes.cast(obj, ctypes.c_void_p).value
+
+
+def _check(result):
+    if result < 0:
+        try:
+            code = xr.Result(result)
+        except ValueError:  # 扩展 / 厂商错误码不在 xr.Result 枚举里
+            raise xr.ErrorResult(f"XrResult {result}") from None
+        raise xr.check_result(code)
+
+
+def _field_view(struct, states, field, dtype, width=1):
+    """states 数组中每个结构体的某个字段组成的跨步视图"""
+    stride = ctypes.sizeof(struct)
+    shape, strides = (len(states),), (stride,)
+    if width > 1:
+        shape, strides = shape + (width,), strides + (4,)
+    if not len(states):
+        return np.zeros(shape, dtype)
+    return np.ndarray(
+        shape, dtype, buffer=states,
+        offset=getattr(struct, field).offset, strides=strides,
+    )
+
+
+class InputSampler:
+    """
+    一帧读取所有按键状态到 self.record (0 维结构化数组)
+
+        sampler = InputSampler(instance, session, button_actions, active_set, timer)
+        rec = sampler.sample()       # 同步 + 读取，返回 self.record
+        rec["trigger"][1]            # 右手扳机
+        sampler.last_time            # 本帧唯一的时间戳，可直接用于 locate_space
+
+    actions: 名称 → xr.Action，与 config 一一对应（pose 动作被忽略）
+    active_set: 为 None 时不做同步，由调用方负责 xrSyncActions
+    time_provider: 为 None 时不取时间戳
+    conditioning: 模拟量调理配置 (见 conditioning.DEFAULT_CONDITIONING)；为 None 时记录中是原始值，
+        否则 float / vector2f 写入记录前先经 self.conditioner 调理（速率限制需要 time_provider）
+
+    同一类型的状态结构体放在一个连续数组里 (self.states[类型])，
+    self.slots[类型] 给出每个元素对应的 (动作名, 手序号)，非 subaction 动作为 None。
+    """
+
+    def __init__(self, instance, session, actions, active_set=None,
+                 time_provider=None, config=None, conditioning=None):
+        if config is None:
+            config = ACTION_CONFIG
+        self.session = session
+        self._session = _address(session)
+        self.time = time_provider
+        self.config = config
+        self.record = np.zeros((), input_dtype(config))
+        self.last_time = 0
+
+        self._sync = None
+        if active_set is not None:
+            self._sync_info = xr.ActionsSyncInfo(active_action_sets=[active_set])
+            self._sync_info_ptr = ctypes.addressof(self._sync_info)
+            self._sync = _lean(xr.raw_functions.xrSyncActions)
+
+        hand_paths = path_cache(instance).preload([f"/user/hand/{h}" for h in HANDS])
+
+        # 按类型分组: 类型 → [(动作名, 手序号)]
+        self.slots = {t: [] for t in _STATE_TYPES}
+        for name, cfg in config.items():
+            t = cfg["type"]
+            if t == xr.ActionType.POSE_INPUT:
+                continue
+            if cfg.get("subaction"):
+                self.slots[t].extend((name, i) for i in range(len(HANDS)))
+            else:
+                self.slots[t].append((name, None))
+
+        self.states = {}
+        self._infos = {}  # 保持 get_info 结构体引用
+        self._calls = []  # (raw 函数, get_info 地址, state 地址)
+        for t, slots in self.slots.items():
+            struct, fn_name = _STATE_TYPES[t]
+            fn = _lean(getattr(xr.raw_functions, fn_name))
+            states = (struct * len(slots))()
+            infos = (xr.ActionStateGetInfo * len(slots))()
+            for i, (name, hand) in enumerate(slots):
+                states[i] = struct()
+                infos[i] = xr.ActionStateGetInfo(
+                    action=actions[name],
+                    subaction_path=xr.NULL_PATH if hand is None else hand_paths[hand],
+                )
+                self._calls.append((
+                    fn, ctypes.addressof(infos[i]), ctypes.addressof(states[i])
+                ))
+            self.states[t] = states
+            self._infos[t] = infos
+
+        # 状态 → 记录: bool 一次比较 + 一次散射；float / vector2f 先拼到
+        # 一块连续暂存区，再按字节散射进记录（记录是紧凑布局，float 不一定对齐）
+        self._bool_view = self.state_view(_BOOL, "current_state")
+        self._float_view = self.state_view(_FLOAT, "current_state")
+        self._vec2_view = self.state_view(_VEC2, "current_state")
+        n_float = len(self.slots[_FLOAT])
+        self._bool_out = np.zeros(len(self.slots[_BOOL]), np.bool_)
+        self._stage = np.zeros(n_float + 2 * len(self.slots[_VEC2]), np.float32)
+        self._stage_float = self._stage[:n_float]
+        self._stage_vec2 = self._stage[n_float:].reshape(-1, 2)
+
+        self._bytes = self.record.reshape(1).view(np.uint8)
+        self._bool_index = np.array(
+            [self._byte_offset(name, hand) for name, hand in self.slots[_BOOL]], np.intp
+        )
+        float_offsets = [self._byte_offset(name, hand) for name, hand in self.slots[_FLOAT]]
+        float_offsets += [self._byte_offset(name, hand) + 4 * j
+                          for name, hand in self.slots[_VEC2] for j in range(2)]
+        self._float_index = (np.array(float_offsets, np.intp)[:, None] + np.arange(4)).ravel()
+
+        self.conditioner = None
+        if conditioning is not None:
+            self.conditioner = AnalogConditioner(
+                self.slots[_FLOAT], self.slots[_VEC2], conditioning
+            )
+
+    def state_view(self, action_type, field):
+        """
+        某类型所有状态结构体中一个字段的跨步视图（与 self.slots[action_type] 一一对应）
+        field: current_state / changed_since_last_sync / last_change_time / is_active
+        """
+        struct = _STATE_TYPES[action_type][0]
+        if field == "last_change_time":
+            return _field_view(struct, self.states[action_type], field, np.int64)
+        if field != "current_state" or action_type == _BOOL:
+            return _field_view(struct, self.states[action_type], field, np.uint32)
+        return _field_view(struct, self.states[action_type], field, np.float32,
+                           width=2 if action_type == _VEC2 else 1)
+
+    def _byte_offset(self, name, hand):
+        sub, offset = self.record.dtype.fields[name][:2]
+        if hand is not None:
+            offset += hand * (sub.itemsize // sub.shape[0])
+        return offset
+
+    def sample(self):
+        """同步并读取所有动作，结果就地写入 self.record 并返回"""
+        session = self._session
+        if self._sync is not None:
+            _check(self._sync(session, self._sync_info_ptr))
+        if self.time is not None:
+            self.last_time = self.time.now()
+
+        for fn, info, state in self._calls:
+            result = fn(session, info, state)
+            if result < 0:
+                _check(result)
+
+        np.not_equal(self._bool_view, 0, out=self._bool_out)
+        self._bytes[self._bool_index] = self._bool_out.view(np.uint8)
+        np.copyto(self._stage_float, self._float_view)
+        np.copyto(self._stage_vec2, self._vec2_view)
+        if self.conditioner is not None:
+            self.conditioner.apply(self._stage, self.last_time or None)
+        self._bytes[self._float_index] = self._stage.view(np.uint8)
+        return self.record
+
+    def as_dict(self, record=None, ndigits=3):
+        """
+        按 btn.py 原来的键名展开记录（name 或 name_left / name_right），
+        默认为当前 self.record；仅供面板 / 调试输出，不在热路径上使用
+        """
+        out = {}
+        rec = self.record if record is None else record
+        for name in rec.dtype.names:
+            value = rec[name].tolist()
+            if self.config[name].get("subaction"):
+                for side, v in zip(HANDS, value):
+                    out[f"{name}_{side}"] = _round(v, ndigits)
+            else:
+                out[name] = _round(value, ndigits)
+        return out
+
+
+def _round(value, ndigits):
+    if isinstance(value, float):
+        return round(value, ndigits)
+    if isinstance(value, list):
+        return tuple(round(v, ndigits) for v in value)
+    return value
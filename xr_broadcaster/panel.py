@@ -2,11 +2,28 @@ from rich.console import Console
 from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
+from rich.text import Text
 import time
 import threading
 
+_MISSING = object()
+
+
 class ControlPanel:
-    """终端底部中控面板，可使用 dict 更新数据"""
+    """
+    终端底部中控面板，可使用 dict 更新数据
+
+    双缓冲: update() 在生产者线程上把变化的键写入后台缓冲（只做 dict 写入，
+    不做任何格式化），并在缓冲由空变非空时唤醒面板线程；面板线程等到下一个
+    刷新截止时间（间隔 1 / refresh_hz）后交换缓冲，把变化合并进 self.data，
+    只为这些键重新生成单元格，再自行重绘。没有变化时面板线程完全休眠。
+
+    self.data 只由面板线程写入；生产者侧比较用的是自己的 _latest。
+
+    attach(键, 控件) 把 panel_stats 中的滚动统计控件挂到一行上: 生产者只调用
+    控件的 add / tick，控件的 render() 在面板线程上每个刷新周期调用一次；
+    挂有控件时面板线程按 refresh_hz 周期醒来，否则只在数据变化时醒来。
+    """
 
     def __init__(self, refresh_hz=8, title="中控面板"):
         self.console = Console()
@@ -14,45 +31,133 @@ class ControlPanel:
         self.title = title
         self.data = {}
         self._live = None
+        self._thread = None
+
+        # 生产者侧（_lock 保护 _back 的写入与交换）
+        self._lock = threading.Lock()
+        self._latest = {}  # 已提交的最新值，用于跳过未变化的键
+        self._back = {}  # 上次交换以来变化的键 → 值
+        self._spare = {}  # 交换回来的空缓冲，循环使用
+        self._wake = threading.Event()  # _back 非空
+        self._stop = threading.Event()
+        self._widgets = {}  # 键 → 控件，attach 时整体替换，面板线程只读
+
+        # 以下只在面板线程上访问
+        self._keys = []  # 行顺序（首次出现的顺序）
+        self._rows = {}  # 键 → (键 Text, 值 Text)
+        self._panel = None
+        self.renders = 0
+        self.rows_rebuilt = 0
 
-    # 构建面板
+    # 构建面板（面板线程）
     def _make_panel(self):
+        with self._lock:
+            changes, self._back = self._back, self._spare
+            self._wake.clear()
+        widgets = self._widgets
+        if not changes and not widgets and self._panel is not None:
+            self._spare = changes
+            return self._panel
+
+        self.data.update(changes)
+        rows = self._rows
+        for k, v in changes.items():
+            row = rows.get(k)
+            if row is None:
+                self._keys.append(k)
+                rows[k] = (Text(str(k)), Text(str(v)))
+            else:
+                rows[k] = (row[0], Text(str(v)))
+        self.rows_rebuilt += len(changes)
+        changes.clear()
+        self._spare = changes
+        for k, widget in widgets.items():
+            row = rows.get(k)
+            if row is None:
+                self._keys.append(k)
+                row = (Text(str(k)), None)
+            rows[k] = (row[0], widget.render())
+
         table = Table(expand=True)
         table.add_column("项目")
         table.add_column("值")  #, justify="right")
+        for k in self._keys:
+            table.add_row(*rows[k])
 
-        for k, v in self.data.items():
-            table.add_row(str(k), str(v))
-
-        return Panel(table, title=self.title, border_style="cyan")
+        self._panel = Panel(table, title=self.title, border_style="cyan")
+        self.renders += 1
+        return self._panel
 
     # 更新接口 —— 推荐的版本
     def update(self, data: dict):
         """
-        更新面板数据:
+        更新面板数据（只记录变化，格式化与重绘在面板线程上进行）:
         panel.update({"CPU": "33%", "FPS": 99, "温度": "60°C"})
         """
-        self.data.update(data)
+        latest = self._latest
+        with self._lock:
+            back = self._back
+            was_empty = not back
+            for k, v in data.items():
+                old = latest.get(k, _MISSING)
+                try:
+                    if old is v or old == v:
+                        continue
+                except ValueError:  # numpy 数组等无法直接比较真值
+                    pass
+                latest[k] = v
+                back[k] = v
+            if was_empty and back:
+                self._wake.set()
 
-        if self._live:
-            self._live.update(self._make_panel())
+    def attach(self, key, widget):
+        """把统计控件（需提供 render()）挂到 key 对应的行上"""
+        with self._lock:
+            self._widgets = {**self._widgets, key: widget}
+            self._wake.set()
+
+    def stats(self):
+        """重绘次数与重新生成的单元格行数"""
+        return {"keys": len(self._latest), "renders": self.renders, "rows_rebuilt": self.rows_rebuilt}
 
     # 后台启动
     def start(self):
-        thread = threading.Thread(target=self.run, daemon=True)
-        thread.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """唤醒并结束面板线程（Live 退出时恢复终端和 stdout）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
 
     # 主循环
     def run(self):
+        period = 1.0 / self.refresh_hz
         with Live(
             self._make_panel(),
-            refresh_per_second=self.refresh_hz,
+            auto_refresh=False,
             console=self.console,
             screen=False,
         ) as live:
             self._live = live
-            while True:
-                time.sleep(0.1)
+            next_render = time.monotonic()
+            while not self._stop.is_set():
+                if self._widgets:
+                    self._wake.wait(max(next_render - time.monotonic(), 0))
+                else:
+                    self._wake.wait()  # 没有变化时一直休眠
+                # 不早于刷新截止时间，其间的变化合并到同一次重绘
+                delay = next_render - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                live.update(self._make_panel(), refresh=True)
+                next_render = time.monotonic() + period
+            live.update(self._make_panel(), refresh=True)
+        self._live = None
 
 
 if __name__ == "__main__":
@@ -71,4 +176,4 @@ if __name__ == "__main__":
             "温度": f"{random.randint(30, 90)}°C",
         })
 
-        time.sleep(0.3)
\ No newline at end of file
+        time.sleep(0.3)
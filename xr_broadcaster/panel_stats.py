@@ -0,0 +1,236 @@
+"""
+中控面板的滚动统计控件
+
+生产者每个样本只做 O(1) 的少量算术与列表写入（add / tick），不分配、不格式化；
+分位数、滑动窗口 min / max、速率和迷你折线图全部在面板线程的 render() 中计算。
+样本列表只由生产者写、面板线程读，单个元素的读写在 CPython 中是原子的，
+render() 读到的最多是正在写入的那一个样本前后的状态，对显示没有影响。
+控件输出单行、不换行，终端过窄时折线图被截掉。
+
+    poll_us = StreamStat(unit="µs", hi=2000)
+    rate = RateMeter(unit="Hz")
+    panel.attach("poll 耗时", poll_us)
+    panel.attach("采样率", rate)
+    ...
+    poll_us.add(dt_ns / 1e3)       # 生产者线程，每样本约数百纳秒
+    rate.tick()
+"""
+
+import itertools
+import math
+import time
+
+from rich.text import Text
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values, lo=None, hi=None):
+    """数值序列 → 单行方块字符折线图；lo / hi 缺省取序列的最小 / 最大值"""
+    if not values:
+        return ""
+    if lo is None:
+        lo = min(values)
+    if hi is None:
+        hi = max(values)
+    top = len(SPARK_CHARS) - 1
+    scale = top / (hi - lo) if hi > lo else math.inf
+    if math.isinf(scale):  # 全部相等（或差值小到溢出）
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[min(max(int((v - lo) * scale + 0.5), 0), top)] for v in values)
+
+
+def _fmt(value):
+    """按量级保留有效数字"""
+    a = abs(value)
+    if a >= 100:
+        return f"{value:.0f}"
+    if a >= 10:
+        return f"{value:.1f}"
+    return f"{value:.2f}"
+
+
+class StreamStat:
+    """
+    标量流（耗时、延迟等）的滚动统计
+
+    EWMA: alpha 为新样本权重
+    分位数: [lo, hi) 等宽直方图（bins 个桶，低于 lo 的样本计入首桶），分辨率 (hi - lo) / bins；
+            >= hi 的样本单独计入溢出桶，分位数落在其中时返回 inf（显示为 ">hi"），
+            不会被压成 hi 而掩盖饱和；
+            两组桶交替使用，每 hist_window 个样本把较旧的一组清零后接着写，
+            分位数取两组之和，即最近 hist_window ~ 2 * hist_window 个样本
+    滑动窗口: 最近 window 个样本的 min / max（render 时扫描），也是折线图的数据
+    全局最大值: 自创建或 reset() 以来
+    分位数与窗口 min / max 覆盖的样本数不同，render() 分别标出各自的样本数
+    """
+
+    def __init__(self, unit="", lo=0.0, hi=1000.0, bins=200, window=64, alpha=0.05,
+                 quantiles=(0.5, 0.99), spark_width=16, hist_window=1024):
+        if hi <= lo or bins < 1 or hist_window < 1:
+            raise ValueError("need hi > lo, bins >= 1 and hist_window >= 1")
+        self.unit = unit
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.alpha = alpha
+        self.quantiles = tuple(quantiles)
+        self.spark_width = spark_width
+        self._scale = bins / (hi - lo)
+        self._top = bins - 1
+        self._window = window
+        self.hist_window = hist_window
+        self._zeros = [0] * (bins + 1)  # 含溢出桶
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.ewma = 0.0
+        self.max = float("-inf")
+        self._hist = [0] * (self.bins + 1)  # 正在写入的一组，最后一个是溢出桶
+        self._prev_hist = [0] * (self.bins + 1)  # 上一组（已满）
+        self._hist_n = 0
+        self._ring = [0.0] * self._window
+        self._pos = 0
+
+    def add(self, x):
+        """记录一个样本（生产者线程）"""
+        n = self.count
+        self.ewma = x if not n else self.ewma + self.alpha * (x - self.ewma)
+        if x > self.max:
+            self.max = x
+        b = int((x - self.lo) * self._scale)
+        if b < 0:
+            b = 0
+        elif b > self._top:
+            b = self.bins  # 溢出桶
+        self._hist[b] += 1
+        self._hist_n += 1
+        if self._hist_n >= self.hist_window:
+            # 交换两组桶，较旧的一组就地清零（每 hist_window 个样本一次 O(bins) 拷贝）
+            old = self._prev_hist
+            self._prev_hist = self._hist
+            old[:] = self._zeros
+            self._hist = old
+            self._hist_n = 0
+        pos = self._pos
+        self._ring[pos] = x
+        self._pos = pos + 1 if pos + 1 < self._window else 0
+        self.count = n + 1
+
+    # ---------- 以下在面板线程上调用 ----------
+
+    def recent(self):
+        """最近 window 个样本（从旧到新）"""
+        n = min(self.count, self._window)
+        pos = self._pos
+        ring = self._ring
+        if n < self._window:
+            return ring[:n]
+        return ring[pos:] + ring[:pos]
+
+    def _merged(self):
+        return [a + b for a, b in zip(self._hist, self._prev_hist)]
+
+    def quantile(self, q, hist=None):
+        """
+        最近一到两个 hist_window 内的直方图分位数（桶内线性插值）；
+        落在溢出桶（>= hi）时返回 inf，没有样本时返回 0
+        """
+        if hist is None:
+            hist = self._merged()
+        total = sum(hist)
+        if not total:
+            return 0.0
+        target = q * total
+        width = 1.0 / self._scale
+        for i, acc in enumerate(itertools.accumulate(hist)):
+            if acc >= target:
+                if i == self.bins:
+                    return math.inf
+                c = hist[i]
+                frac = (target - (acc - c)) / c if c else 0.0
+                return self.lo + (i + frac) * width
+        return math.inf
+
+    def summary(self):
+        """
+        {ewma, p50, p99, ..., quantile_n, over, min, max, window_n, max_all, count}
+        quantile_n / over: 分位数覆盖的样本数及其中 >= hi 的个数；
+        min / max: 最近 window_n 个样本
+        """
+        recent = self.recent()
+        hist = self._merged()
+        out = {"ewma": self.ewma}
+        for q in self.quantiles:
+            out[f"p{q * 100:g}"] = self.quantile(q, hist)
+        out["quantile_n"] = sum(hist)
+        out["over"] = hist[self.bins]
+        out["min"] = min(recent) if recent else 0.0
+        out["max"] = max(recent) if recent else 0.0
+        out["window_n"] = len(recent)
+        out["max_all"] = self.max if self.count else 0.0
+        out["count"] = self.count
+        return out
+
+    def render(self):
+        if not self.count:
+            return Text("-", style="dim")
+        s = self.summary()
+        text = Text(f"{_fmt(s['ewma'])}{self.unit}", no_wrap=True, overflow="crop")
+        for q in self.quantiles:
+            key = f"p{q * 100:g}"
+            value = s[key]
+            text.append(f"  {key} " + (f">{_fmt(self.hi)}" if math.isinf(value) else _fmt(value)))
+        text.append(f" /{s['quantile_n']}", style="dim")
+        text.append(f"  近{s['window_n']} {_fmt(s['min'])}..{_fmt(s['max'])}  max {_fmt(s['max_all'])}")
+        recent = self.recent()[-self.spark_width:]
+        text.append("  " + sparkline(recent, lo=0.0 if self.lo >= 0 else None), style="cyan")
+        return text
+
+
+class RateMeter:
+    """
+    事件速率: 生产者只做 tick() 计数，速率在每次 render() 时按
+    (计数差 / 时间差) 计算，再做 EWMA 平滑；最近的速率画成折线图
+    """
+
+    def __init__(self, unit="Hz", alpha=0.5, history=16):
+        self.unit = unit
+        self.alpha = alpha
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.rate = 0.0
+        self._last_count = 0
+        self._last_t = time.perf_counter()
+        self._rates = []
+
+    def tick(self, n=1):
+        """记录 n 个事件（生产者线程）"""
+        self.count += n
+
+    # ---------- 以下在面板线程上调用 ----------
+
+    def sample(self):
+        """更新并返回当前速率"""
+        now = time.perf_counter()
+        dt = now - self._last_t
+        if dt <= 0:
+            return self.rate
+        count = self.count
+        rate = (count - self._last_count) / dt
+        self.rate = rate if not self._rates else self.rate + self.alpha * (rate - self.rate)
+        self._last_count = count
+        self._last_t = now
+        self._rates.append(self.rate)
+        del self._rates[:-self.history]
+        return self.rate
+
+    def render(self):
+        rate = self.sample()
+        text = Text(f"{_fmt(rate)} {self.unit}  共 {self.count}", no_wrap=True, overflow="crop")
+        text.append("  " + sparkline(self._rates, lo=0.0), style="cyan")
+        return text
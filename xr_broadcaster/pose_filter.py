@@ -0,0 +1,444 @@
+"""
+位姿滤波: One Euro / 匀速 Kalman（位置）+ 自适应四元数平滑（朝向）
+
+所有设备一起做向量运算，状态和中间结果都在预分配的数组上用 out= 就地计算，
+update() 不分配新数组；参数可以是标量（所有设备相同）或长度为 N 的序列（逐设备）。
+位姿数组布局同 xr_tracker.POSE_COLUMNS。
+
+每个设备按自己上一个有效样本计算 dt；丢失跟踪超过 max_gap_s 后重新出现的设备
+直接用新测量重新初始化，不从旧状态追赶。
+
+    one_euro  位置: 自适应截止频率的一阶低通，cutoff = min_cutoff + beta * |速度|
+              慢动作时强平滑去抖，快动作时截止频率升高、滞后变小
+    kalman    位置: 每轴 [位置, 速度] 的匀速模型；q 为加速度噪声谱密度 (m²/s³)，
+              r 为测量噪声方差 (m²)。匀速运动时稳态无滞后
+    朝向      两种方法都用 One Euro 的自适应系数在相邻四元数间做 nlerp
+              （先对齐到同一半球），角速度越大平滑越弱
+
+延迟报告: 对每个设备，用原始位姿的速度把 (原始 - 滤波) 位移换算成时间滞后，
+取 EWMA（只统计速度超过 min_speed 的样本），另外统计每次 update 的计算耗时。
+
+耗时: 一次 update 约 60-150 µs（视负载而定，one_euro 略低于 kalman），其中延迟估计约 10 µs。
+设备只有几个时几乎全是近百次小数组 ufunc 调用的固定开销（每次约 0.5-1 µs），
+与设备数基本无关；所以所有设备放在一个实例里一起算，工作数组保持连续
+（跨步视图上的 ufunc 慢约 2.5 倍）。在 500 Hz 采样线程上约占 3-8%。
+
+    filt = PoseFilter(n_devices, method="one_euro", min_cutoff=[1.0, 1.0, 0.5])
+    filtered = filt.update(poses, valid, xr_time)
+    filt.stats()
+"""
+
+import time
+
+import numpy as np
+import xr
+
+METHODS = ("one_euro", "kalman")
+
+# 位置单位为米、速度为 m/s: 0.5 m/s 时截止频率约 21 Hz（90 Hz 采样、0.5 mm 噪声下
+# 滞后约 5 ms），静止时约 1 Hz（抖动约为原始噪声的 1/4）
+ONE_EURO_DEFAULTS = {"min_cutoff": 1.0, "beta": 40.0, "d_cutoff": 1.0}
+# 匀速模型在静止时去抖有限: 90 Hz、0.5 mm 噪声下默认参数的静止抖动约为原始噪声的 0.8 倍，
+# 1 Hz / ±15 cm 往复运动时误差约 0.9 倍；q 降到 0.05 静止时约 0.65 倍，但运动时误差
+# 升到原始噪声的 1.7 倍。需要静止时强去抖请用 one_euro（约 0.25 倍）
+KALMAN_DEFAULTS = {"q": 0.5, "r": 1e-6}
+ROTATION_DEFAULTS = {"rot_min_cutoff": 1.5, "rot_beta": 0.3, "rot_d_cutoff": 1.0}
+# 作用于 (N, 3) 位置数组的参数存成 (N, 1) 便于广播，其余为 (N,)
+_COLUMN_PARAMS = ("min_cutoff", "beta", "d_cutoff", "q", "r")
+
+
+def _alpha(cutoff, dt_2pi, out):
+    """一阶低通的平滑系数 1 / (1 + tau / dt)，tau = 1 / (2π f)，就地写入 out；dt_2pi = 2π dt"""
+    np.multiply(cutoff, dt_2pi, out=out)
+    out += 1.0
+    np.reciprocal(out, out=out)
+    np.subtract(1.0, out, out=out)
+    return out
+
+
+class PoseFilter:
+    """
+    n_devices: 设备数
+    method: "one_euro" 或 "kalman"（位置滤波方法）
+    params: ONE_EURO_DEFAULTS / KALMAN_DEFAULTS / ROTATION_DEFAULTS 中的参数，标量或逐设备序列
+    min_speed: 延迟估计只统计速度超过它 (m/s) 的样本
+    max_gap_s: 设备丢失跟踪超过该时长后重新出现时，直接以新测量重新初始化，
+               不从旧状态追赶；0 表示任何一帧无效之后都重新初始化
+    """
+
+    def __init__(self, n_devices, method="one_euro", min_speed=0.1, max_gap_s=0.1, **params):
+        if method not in METHODS:
+            raise ValueError(f"unknown filter method {method!r}, expected one of {METHODS}")
+        self.n_devices = n = n_devices
+        self.method = method
+        self.min_speed = min_speed
+        self.max_gap_s = max_gap_s
+
+        defaults = dict(ROTATION_DEFAULTS)
+        defaults.update(ONE_EURO_DEFAULTS if method == "one_euro" else KALMAN_DEFAULTS)
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise TypeError(f"unknown {method} parameters: {sorted(unknown)}")
+        self.params = {}
+        for name, default in defaults.items():
+            self.set_param(name, params.get(name, default))
+
+        self.filtered = np.zeros((n, 7), np.float32)
+        self.filtered[:, 3] = 1.0
+        self._initialized = np.zeros(n, np.bool_)
+        self._last_valid = np.zeros(n, np.int64)  # 每个设备上一个有效样本的 XrTime
+
+        # 输入 / 输出的 float64 工作副本（保持连续: 跨步视图上的 ufunc 慢约 2.5 倍）
+        self._pos = np.zeros((n, 3))
+        self._quat = np.zeros((n, 4))
+        self._fpos = np.zeros((n, 3))  # 滤波后位置
+        self._fquat = np.zeros((n, 4))  # 滤波后朝向
+        self._fquat[:, 3] = 1.0
+        # _fquat 是否已由非零四元数初始化；_unseeded: 有已初始化的设备还没有
+        self._has_orientation = np.zeros(n, np.bool_)
+        self._unseeded = False
+        # One Euro: 导数估计（位置 m/s，朝向 rad/s）
+        self._dx = np.zeros((n, 3))
+        self._dq = np.zeros(n)
+        # Kalman: 每轴状态 [位置, 速度] 与协方差 (P00, P01, P11)
+        self._v = np.zeros((n, 3))
+        self._p00 = np.zeros((n, 3))
+        self._p01 = np.zeros((n, 3))
+        self._p11 = np.zeros((n, 3))
+        # 延迟估计: 原始位置的上一帧与平滑后的速度
+        self._raw_prev = np.zeros((n, 3))
+        self._raw_velocity = np.zeros((n, 3))
+
+        # 每帧的中间结果，全部用 out= 就地计算
+        self._dt_ns = np.zeros(n, np.int64)
+        self._dt = np.zeros(n)  # 距该设备上一个有效样本的秒数
+        self._dt_col = self._dt[:, None]
+        self._dt_2pi = np.zeros(n)  # 2π dt，供 _alpha 使用
+        self._dt_2pi_col = self._dt_2pi[:, None]
+        self._step = np.zeros(n, np.bool_)  # 本帧推进滤波的设备
+        self._rows = self._step[:, None]
+        self._fresh = np.zeros(n, np.bool_)  # 本帧（重新）初始化的设备
+        self._mask = np.zeros(n, np.bool_)
+        self._mask_col = self._mask[:, None]
+        self._turn = np.zeros(n, np.bool_)  # 本帧推进朝向平滑的设备
+        self._turn_col = self._turn[:, None]
+        self._w3 = [np.zeros((n, 3)) for _ in range(8)]
+        self._w4 = [np.zeros((n, 4)) for _ in range(2)]
+        self._w1 = [np.zeros(n) for _ in range(4)]
+        self._col = [w[:, None] for w in self._w1]
+        self.reset_stats()
+
+    def set_param(self, name, value):
+        """设置某个参数，value 为标量或逐设备序列"""
+        array = np.broadcast_to(np.asarray(value, np.float64), (self.n_devices,)).copy()
+        self.params[name] = array[:, None] if name in _COLUMN_PARAMS else array
+
+    def reset(self):
+        """丢弃滤波状态（如跟踪中断很久），下一个有效样本直接作为输出"""
+        self._initialized[:] = False
+
+    def reset_stats(self):
+        self.updates = 0
+        self.update_ns_sum = 0
+        self.update_ns_max = 0
+        self.reseeds = 0  # 中断超过 max_gap_s 后重新初始化的次数
+        self.lag_s = np.zeros(self.n_devices)  # EWMA
+        self.lag_samples = np.zeros(self.n_devices, np.int64)
+
+    def update(self, poses, valid, xr_time):
+        """滤波一帧，结果写入并返回 self.filtered；无效设备保持上一次的输出"""
+        t0 = time.perf_counter_ns()
+        xr_time = int(getattr(xr_time, "value", xr_time))
+
+        # 每个设备按自己上一个有效样本计算 dt；中断过久（或时间倒退）的设备重新初始化
+        np.subtract(xr_time, self._last_valid, out=self._dt_ns)
+        dt = np.multiply(self._dt_ns, 1e-9, out=self._dt)
+        stale = np.greater(dt, self.max_gap_s, out=self._mask)
+        stale |= np.less(dt, 0.0, out=self._fresh)
+        stale &= valid
+        stale &= self._initialized
+        if stale.any():
+            self._initialized[stale] = False
+            self.reseeds += int(stale.sum())
+        # dt = 0（同一样本重复送入）时不推进
+        step = np.greater(dt, 0.0, out=self._step)
+        step &= valid
+        step &= self._initialized
+        # 不推进的设备 dt 置 1，避免无意义的除零
+        np.logical_not(step, out=self._mask)
+        np.copyto(dt, 1.0, where=self._mask)
+        np.multiply(dt, 2.0 * np.pi, out=self._dt_2pi)
+
+        np.copyto(self._pos, poses[:, 4:])
+        np.copyto(self._quat, poses[:, :4])
+        if step.any():
+            if self.method == "one_euro":
+                self._one_euro_position()
+            else:
+                self._kalman_position()
+            self._smooth_orientation()
+            self._measure_lag()
+
+        fresh = np.logical_not(self._initialized, out=self._fresh)
+        fresh &= valid
+        if fresh.any():
+            self._initialize(fresh)
+        np.copyto(self._last_valid, xr_time, where=valid)
+        np.copyto(self._raw_prev, self._pos, where=valid[:, None])
+
+        self.filtered[:, 4:] = self._fpos
+        self.filtered[:, :4] = self._fquat
+
+        elapsed = time.perf_counter_ns() - t0
+        self.updates += 1
+        self.update_ns_sum += elapsed
+        if elapsed > self.update_ns_max:
+            self.update_ns_max = elapsed
+        return self.filtered
+
+    # ---- 位置（只提交 self._step 为 True 的设备）
+
+    def _one_euro_position(self):
+        p = self.params
+        dt, rows = self._dt_col, self._rows
+        prev = self._fpos
+        delta, dx, sq = self._w3[:3]
+        speed, cutoff = self._col[:2]
+        np.subtract(self._pos, prev, out=delta)
+        # 导数低通: dx += a_d * (delta / dt - dx)
+        np.divide(delta, dt, out=dx)
+        dx -= self._dx
+        dx *= _alpha(p["d_cutoff"], self._dt_2pi_col, cutoff)
+        dx += self._dx
+        np.multiply(dx, dx, out=sq)
+        np.add.reduce(sq, axis=1, keepdims=True, out=speed)
+        np.sqrt(speed, out=speed)
+        # 自适应截止频率
+        np.multiply(p["beta"], speed, out=cutoff)
+        cutoff += p["min_cutoff"]
+        delta *= _alpha(cutoff, self._dt_2pi_col, cutoff)
+        np.add(prev, delta, out=prev, where=rows)
+        np.copyto(self._dx, dx, where=rows)
+
+    def _kalman_position(self):
+        q, r = self.params["q"], self.params["r"]
+        dt, rows = self._dt_col, self._rows
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        x, m00, m01, m11, k0, k1, y, tmp = self._w3
+        c = self._col[0]
+        # 预测
+        np.multiply(self._v, dt, out=x)
+        x += self._fpos
+        np.multiply(dt, p11, out=m00)  # p00 + dt * (2 p01 + dt p11) + q dt³ / 3
+        m00 += p01
+        m00 += p01
+        m00 *= dt
+        m00 += p00
+        np.power(dt, 3, out=c)
+        c *= q
+        c /= 3.0
+        m00 += c
+        np.multiply(dt, p11, out=m01)  # p01 + dt p11 + q dt² / 2
+        m01 += p01
+        np.multiply(dt, dt, out=c)
+        c *= q
+        c *= 0.5
+        m01 += c
+        np.multiply(q, dt, out=c)  # p11 + q dt
+        np.add(p11, c, out=m11)
+        # 更新
+        np.add(m00, r, out=k1)  # s
+        np.divide(m00, k1, out=k0)
+        np.divide(m01, k1, out=k1)
+        np.subtract(self._pos, x, out=y)
+        np.multiply(k0, y, out=tmp)
+        tmp += x
+        np.copyto(self._fpos, tmp, where=rows)
+        np.multiply(k1, y, out=tmp)
+        np.add(self._v, tmp, out=self._v, where=rows)
+        np.multiply(k1, m01, out=tmp)
+        np.subtract(m11, tmp, out=tmp)
+        np.copyto(p11, tmp, where=rows)
+        np.subtract(1.0, k0, out=k0)
+        np.multiply(k0, m00, out=tmp)
+        np.copyto(p00, tmp, where=rows)
+        np.multiply(k0, m01, out=tmp)
+        np.copyto(p01, tmp, where=rows)
+
+    # ---- 朝向
+
+    def _smooth_orientation(self):
+        """
+        位置有效时四元数仍可能全为 0: 这些设备跳过朝向平滑，保持原朝向；
+        朝向还没有初始化过的设备，在第一个非零四元数到来时直接取它
+        """
+        p = self.params
+        dt, dt_2pi = self._dt, self._dt_2pi
+        prev, quat = self._fquat, self._quat
+        out, sq = self._w4
+        dot, rate, a, norm = self._w1
+        turn = self._turn
+        if self._unseeded:
+            self._seed_orientation()
+        np.multiply(prev, quat, out=sq)
+        np.add.reduce(sq, axis=1, out=dot)
+        # 两个非零单位四元数点积恰为 0 只在一帧内转 180° 时出现，
+        # 这里把它与输入（或尚未初始化的 prev）为 0 一样跳过
+        np.not_equal(dot, 0.0, out=turn)
+        turn &= self._step
+        # q 与 -q 表示同一旋转: 对齐到 prev 所在半球
+        np.less(dot, 0.0, out=self._mask)
+        np.negative(quat, out=quat, where=self._mask_col)
+        # 角速度 2 arccos|dot| / dt，再做导数低通: dq += a_d * (rate - dq)
+        np.abs(dot, out=rate)
+        np.minimum(rate, 1.0, out=rate)
+        np.arccos(rate, out=rate)
+        rate *= 2.0
+        rate /= dt
+        rate -= self._dq
+        rate *= _alpha(p["rot_d_cutoff"], dt_2pi, a)
+        rate += self._dq
+        # nlerp: prev + a * (quat - prev)，a 随角速度自适应
+        np.multiply(p["rot_beta"], rate, out=a)
+        a += p["rot_min_cutoff"]
+        _alpha(a, dt_2pi, a)
+        np.subtract(quat, prev, out=out)
+        out *= self._col[2]
+        out += prev
+        np.multiply(out, out, out=sq)
+        np.add.reduce(sq, axis=1, out=norm)
+        np.sqrt(norm, out=norm)
+        # 只在推进的行上归一化并提交，其余行（含四元数为 0 的行）保持原朝向
+        np.divide(out, self._col[3], out=prev, where=self._turn_col)
+        np.copyto(self._dq, rate, where=turn)
+
+    def _seed_orientation(self):
+        quat, sq, norm = self._quat, self._w4[0], self._w1[3]
+        np.multiply(quat, quat, out=sq)
+        np.add.reduce(sq, axis=1, out=norm)
+        seed = np.greater(norm, 1e-12, out=self._mask)
+        seed &= self._step
+        seed &= ~self._has_orientation
+        np.copyto(self._fquat, quat, where=self._mask_col)
+        self._dq[seed] = 0
+        self._has_orientation |= seed
+        self._unseeded = bool((self._initialized & ~self._has_orientation).any())
+
+    # ---- 初始化
+
+    def _initialize(self, fresh):
+        rows = fresh[:, None]
+        np.copyto(self._fpos, self._pos, where=rows)
+        np.copyto(self._fquat, self._quat, where=rows)
+        # 四元数为 0 的设备，朝向留待第一个非零四元数初始化（见 _smooth_orientation）
+        sq, norm = self._w4[1], self._w1[3]
+        np.multiply(self._quat, self._quat, out=sq)
+        np.add.reduce(sq, axis=1, out=norm)
+        np.greater(norm, 1e-12, out=self._mask)
+        np.copyto(self._has_orientation, self._mask, where=fresh)
+        self._dx[fresh] = 0
+        self._dq[fresh] = 0
+        self._raw_velocity[fresh] = 0
+        if self.method == "kalman":
+            self._v[fresh] = 0
+            self._p00[fresh] = self.params["r"][fresh]
+            self._p01[fresh] = 0
+            self._p11[fresh] = 1.0  # 初始速度不确定 (m/s)²
+        self._initialized |= fresh
+        self._unseeded = bool((self._initialized & ~self._has_orientation).any())
+
+    # ---- 延迟估计
+
+    def _measure_lag(self):
+        dt, rows = self._dt_col, self._rows
+        velocity, sq = self._w3[:2]
+        speed_sq, lag, weight = self._w1[:3]
+        c = self._col[3]
+        # 原始速度做 ~100 ms 的平滑，避免测量噪声被当成运动
+        raw_velocity = self._raw_velocity
+        np.subtract(self._pos, self._raw_prev, out=velocity)
+        velocity /= dt
+        velocity -= raw_velocity
+        np.multiply(dt, 1 / 0.1, out=c)
+        np.minimum(c, 1.0, out=c)
+        velocity *= c
+        np.add(raw_velocity, velocity, out=raw_velocity, where=rows)
+        np.multiply(raw_velocity, raw_velocity, out=sq)
+        np.add.reduce(sq, axis=1, out=speed_sq)
+        moving = np.greater(speed_sq, self.min_speed ** 2, out=self._mask)
+        moving &= self._step
+        if not moving.any():
+            return
+        # 滤波输出落后于原始位姿的时间: (原始 - 滤波) 在速度方向上的投影 / 速度
+        np.subtract(self._pos, self._fpos, out=sq)
+        sq *= raw_velocity
+        np.add.reduce(sq, axis=1, out=lag)
+        np.maximum(speed_sq, 1e-12, out=speed_sq)
+        lag /= speed_sq
+        # 前 100 个样本取算术平均，之后 EWMA (0.01)
+        n = self.lag_samples
+        np.add(n, 1, out=weight)
+        np.reciprocal(weight, out=weight)
+        np.maximum(weight, 0.01, out=weight)
+        lag -= self.lag_s
+        lag *= weight
+        np.add(self.lag_s, lag, out=self.lag_s, where=moving)
+        np.add(n, 1, out=n, where=moving)
+
+    def stats(self):
+        """计算耗时 (µs) 与每个设备的估计滞后 (ms)"""
+        n = max(self.updates, 1)
+        return {
+            "method": self.method,
+            "updates": self.updates,
+            "update_mean_us": round(self.update_ns_sum / n / 1e3, 2),
+            "update_max_us": round(self.update_ns_max / 1e3, 2),
+            "reseeds": self.reseeds,
+            "lag_ms": (self.lag_s * 1e3).round(2).tolist(),
+            "lag_samples": self.lag_samples.tolist(),
+        }
+
+
+class FilteredTracker:
+    """
+    给 XRControllerTracker / ReplayTracker 加一级滤波: poll_batch() 之后更新 self.filtered
+
+    poses / valid / last_time 仍是原始数据（广播、录制不受影响），
+    filtered_pose(i) 给 UI 用；其余属性转发给原 tracker。
+    """
+
+    def __init__(self, tracker, pose_filter):
+        self.tracker = tracker
+        self.filter = pose_filter
+        self.filtered = pose_filter.filtered
+
+    def poll_batch(self):
+        tracker = self.tracker
+        poses = tracker.poll_batch()
+        self.filter.update(poses, tracker.valid, tracker.last_time)
+        return poses
+
+    def poll(self):
+        self.poll_batch()
+        return [self.pose(i) if self.valid[i] else None for i in range(len(self.valid))]
+
+    def rebind(self):
+        """原 tracker 重建之后调用: 转发 rebind，并丢弃旧会话的滤波状态"""
+        self.tracker.rebind()
+        self.filter.reset()
+
+    def filtered_pose(self, i):
+        """self.filtered 第 i 行 → xr.Posef（供 UI 使用）"""
+        return to_posef(self.filtered[i])
+
+    def __getattr__(self, name):
+        return getattr(self.tracker, name)
+
+
+def to_posef(row):
+    """位姿数组的一行 (qx qy qz qw px py pz) → xr.Posef"""
+    qx, qy, qz, qw, px, py, pz = row.tolist()
+    return xr.Posef(
+        orientation=xr.Quaternionf(qx, qy, qz, qw),
+        position=xr.Vector3f(px, py, pz),
+    )
@@ -0,0 +1,298 @@
+"""
+UDP 单播/组播位姿广播
+
+每个 tracker 采样一个数据报，小端定长布局:
+
+    偏移  类型        字段
+    0     char[4]     magic "XRPB"
+    4     u8          version
+    5     u8          n_devices (N <= 32)
+    6     -           保留 2 字节
+    8     u64         seq        发送序号，每个数据报 +1
+    16    i64         xr_time    采样时刻 (XrTime, ns)
+    24    u32         valid_mask 第 i 位 = 第 i 个设备位置有效
+    28    f32[N][7]   poses      每行 qx qy qz qw px py pz (同 xr_tracker.POSE_COLUMNS)
+
+双手 (N=2) 时每个数据报 84 字节。
+"""
+
+import ipaddress
+import logging
+import socket
+import struct
+
+import numpy as np
+
+MAGIC = b"XRPB"
+VERSION = 1
+MAX_DEVICES = 32
+
+HEADER = struct.Struct("<4sBBxxQqI")
+
+DEFAULT_GROUP = "239.255.42.99"
+DEFAULT_PORT = 50042
+
+log = logging.getLogger(__name__)
+
+
+def wire_dtype(n_devices=2):
+    """与数据报布局一致的 NumPy 结构化 dtype"""
+    dtype = np.dtype([
+        ("magic", "S4"),
+        ("version", "u1"),
+        ("n_devices", "u1"),
+        ("_reserved", "V2"),
+        ("seq", "<u8"),
+        ("xr_time", "<i8"),
+        ("valid_mask", "<u4"),
+        ("poses", "<f4", (n_devices, 7)),
+    ])
+    assert dtype.itemsize == HEADER.size + 28 * n_devices
+    return dtype
+
+
+def decode(data, n_devices=2):
+    """把一个或多个首尾相接的数据报解码为结构化数组（零拷贝视图）"""
+    records = np.frombuffer(data, dtype=wire_dtype(n_devices))
+    if len(records) and (records["magic"] != MAGIC).any():
+        raise ValueError("not a pose datagram")
+    return records
+
+
+def valid_flags(valid_mask, n_devices=2):
+    """valid_mask (标量或数组) → bool 数组 (..., N)"""
+    mask = np.asarray(valid_mask, dtype=np.uint32)[..., None]
+    return (mask >> np.arange(n_devices, dtype=np.uint32)) & 1 == 1
+
+
+def _is_multicast(host):
+    try:
+        return ipaddress.ip_address(host).is_multicast
+    except ValueError:
+        return False
+
+
+class PoseBroadcaster:
+    """
+    把 tracker 采样打包成定长数据报发送（非阻塞，发送缓冲区满时丢弃）
+
+    网络不可达、网卡断开等发送错误不抛出: 计入 errors 并丢弃该数据报，
+    网络恢复后自动继续发送（错误码变化时记一条日志）
+    """
+
+    def __init__(self, host=DEFAULT_GROUP, port=DEFAULT_PORT, n_devices=2,
+                 ttl=1, loopback=True, interface=None):
+        """
+        参数:
+        host: 目标地址，组播地址 (224.0.0.0/4) 会自动设置组播选项
+        ttl: 组播 TTL，1 表示不出本网段
+        loopback: 本机是否也能收到自己发的组播
+        interface: 发送组播使用的本地网卡 IP
+        """
+        if not 0 < n_devices <= MAX_DEVICES:
+            raise ValueError(f"n_devices must be in 1..{MAX_DEVICES}, got {n_devices}")
+
+        self.addr = (host, port)
+        self.n_devices = n_devices
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if _is_multicast(host):
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, int(loopback))
+            if interface:
+                self.sock.setsockopt(
+                    socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface)
+                )
+        self.sock.setblocking(False)
+
+        # 预分配的数据报缓冲区，poses 部分直接映射为 NumPy 视图
+        self._buf = bytearray(HEADER.size + 28 * n_devices)
+        self._poses = np.ndarray(
+            (n_devices, 7), "<f4", buffer=self._buf, offset=HEADER.size
+        )
+
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    def publish(self, poses, valid, xr_time):
+        """
+        poses: (N, 7) float32，valid: (N,) bool，xr_time: int 或 xr.Time
+        """
+        np.copyto(self._poses, poses, casting="same_kind")
+
+        mask = 0
+        for i in range(self.n_devices):
+            if valid[i]:
+                mask |= 1 << i
+
+        HEADER.pack_into(
+            self._buf, 0, MAGIC, VERSION, self.n_devices,
+            self.seq, getattr(xr_time, "value", xr_time), mask,
+        )
+        self.seq += 1
+
+        try:
+            self.sock.sendto(self._buf, self.addr)
+            self.sent += 1
+        except (BlockingIOError, InterruptedError):
+            self.dropped += 1
+        except OSError as e:
+            # ENETUNREACH / EHOSTUNREACH / EPERM 等: 丢弃本帧，保持发送循环
+            self.errors += 1
+            if self.last_error is None or e.errno != self.last_error.errno:
+                log.warning("pose broadcast to %s:%d failed: %s", *self.addr, e)
+            self.last_error = e
+
+    def stats(self):
+        return {
+            "seq": self.seq,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_error": None if self.last_error is None else str(self.last_error),
+        }
+
+    def close(self):
+        self.sock.close()
+
+
+class PoseReceiver:
+    """
+    接收 PoseBroadcaster 的数据报
+
+    recv_into 直接写入预分配结构化数组的槽位，不额外拷贝；
+    根据 seq 统计丢包 (lost) 与乱序/重复 (reordered)。
+    """
+
+    def __init__(self, host=DEFAULT_GROUP, port=DEFAULT_PORT, n_devices=2,
+                 capacity=1024, interface="0.0.0.0", rcvbuf=1 << 20):
+        self.n_devices = n_devices
+        self.dtype = wire_dtype(n_devices)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        if _is_multicast(host):
+            self.sock.bind(("", port))
+            mreq = socket.inet_aton(host) + socket.inet_aton(interface)
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        else:
+            self.sock.bind((host, port))
+
+        self.records = np.zeros(capacity, self.dtype)
+        self._slots = [
+            memoryview(row) for row in self.records.view(np.uint8).reshape(capacity, -1)
+        ]
+
+        self.expected_seq = None
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.bad = 0
+
+    def _check(self, i, nbytes):
+        rec = self.records[i]
+        if nbytes != self.dtype.itemsize or rec["magic"] != MAGIC \
+                or rec["n_devices"] != self.n_devices:
+            self.bad += 1
+            return False
+
+        seq = int(rec["seq"])
+        if self.expected_seq is not None:
+            if seq > self.expected_seq:
+                self.lost += seq - self.expected_seq
+            elif seq < self.expected_seq:
+                self.reordered += 1
+                return True
+        self.expected_seq = seq + 1
+        return True
+
+    def recv(self, timeout=None):
+        """
+        阻塞接收一个数据报，返回 records 中对应行的视图（下次调用会被覆盖）
+        超时返回 None
+        """
+        self.sock.settimeout(timeout)
+        try:
+            while True:
+                nbytes = self.sock.recv_into(self._slots[0])
+                if self._check(0, nbytes):
+                    self.received += 1
+                    return self.records[0]
+        except (socket.timeout, BlockingIOError):
+            return None
+
+    def recv_batch(self):
+        """
+        非阻塞地取出当前所有已到达的数据报（最多 capacity 个）
+        返回 records[:n] 视图
+        """
+        self.sock.setblocking(False)
+        n = 0
+        capacity = len(self._slots)
+        while n < capacity:
+            try:
+                nbytes = self.sock.recv_into(self._slots[n])
+            except (BlockingIOError, InterruptedError):
+                break
+            if self._check(n, nbytes):
+                n += 1
+        self.received += n
+        return self.records[:n]
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "lost": self.lost,
+            "reordered": self.reordered,
+            "bad": self.bad,
+        }
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    # 回环自测: 以 2 kHz 发送 5 秒，统计丢包与 CPU 占用
+    import threading
+    import time
+
+    from xr_broadcaster.rate_loop import FixedRateLoop
+
+    rate_hz, seconds = 2000, 5
+    rx = PoseReceiver("127.0.0.1", DEFAULT_PORT)
+    tx = PoseBroadcaster("127.0.0.1", DEFAULT_PORT)
+
+    poses = np.zeros((2, 7), np.float32)
+    valid = np.array([True, True])
+
+    def send():
+        loop = FixedRateLoop(rate_hz=rate_hz, spin_s=0.0002)
+        cpu0 = time.thread_time()
+        for tick in loop:
+            poses[:, 4] = tick * 1e-3
+            tx.publish(poses, valid, time.monotonic_ns())
+            if tick >= rate_hz * seconds:
+                break
+        cpu = time.thread_time() - cpu0
+        print(f"发送: {tx.stats()}, 循环 {loop.stats()}")
+        print(f"发送线程 CPU: {cpu / seconds * 100:.1f}%")
+
+    sender = threading.Thread(target=send)
+    sender.start()
+
+    last = None
+    while sender.is_alive():
+        batch = rx.recv_batch()
+        if len(batch):
+            last = batch[-1]
+        time.sleep(0.005)
+    time.sleep(0.05)
+    rx.recv_batch()
+
+    print(f"接收: {rx.stats()}")
+    if last is not None:
+        print(f"最后一帧 seq={last['seq']} valid={valid_flags(last['valid_mask'])}")
@@ -0,0 +1,192 @@
+"""
+基于速度的位姿外推，以及预测误差统计
+
+位姿数组布局同 xr_tracker.POSE_COLUMNS: qx qy qz qw px py pz
+OpenXR 的线速度 / 角速度都表示在 base space 中，因此:
+
+    p(t + dt) = p + v * dt
+    q(t + dt) = exp(ω * dt / 2) ⊗ q
+"""
+
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def quat_multiply(a, b, out=None):
+    """四元数乘法 a ⊗ b，(..., 4) 数组，(x, y, z, w) 顺序"""
+    av, aw = a[..., :3], a[..., 3:4]
+    bv, bw = b[..., :3], b[..., 3:4]
+    if out is None:
+        out = np.empty(np.broadcast_shapes(a.shape, b.shape), np.result_type(a, b))
+    out[..., :3] = aw * bv + bw * av + np.cross(av, bv)
+    out[..., 3:4] = aw * bw - np.sum(av * bv, axis=-1, keepdims=True)
+    return out
+
+
+def rotvec_to_quat(r):
+    """旋转向量 (..., 3) → 单位四元数 (..., 4)"""
+    angle = np.linalg.norm(r, axis=-1, keepdims=True)
+    half = 0.5 * angle
+    # sin(θ/2)/θ，θ→0 时用泰勒展开避免除零
+    with np.errstate(invalid="ignore", divide="ignore"):
+        k = np.where(angle > 1e-8, np.sin(half) / angle, 0.5 - angle * angle / 48.0)
+    return np.concatenate([r * k, np.cos(half)], axis=-1)
+
+
+def quat_angle(a, b):
+    """两组四元数之间的夹角 (rad)"""
+    dot = np.abs(np.sum(a * b, axis=-1))
+    return 2.0 * np.arccos(np.clip(dot, 0.0, 1.0))
+
+
+def extrapolate(poses, linear_velocity, angular_velocity, dt_s, out=None):
+    """
+    把 poses (N, 7) 外推 dt_s 秒
+    linear_velocity / angular_velocity: (N, 3)，无效的设备应传 0
+    未跟踪设备的四元数可能全为 0，这些行的朝向输出单位四元数
+    """
+    if out is None:
+        out = np.empty_like(poses)
+    out[:, 4:] = poses[:, 4:] + linear_velocity * dt_s
+    dq = rotvec_to_quat(angular_velocity * dt_s)
+    q = quat_multiply(dq, poses[:, :4], out=out[:, :4])
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+    ok = norm > 0
+    np.divide(q, norm, out=q, where=ok)
+    if not ok.all():
+        # dq 是单位四元数，积为 0 只可能是输入为 0
+        q[~ok[:, 0]] = (0.0, 0.0, 0.0, 1.0)
+    return out
+
+
+class PredictionErrorStats:
+    """
+    把 “对时刻 T 的预测” 与之后采到的真实位姿比较
+
+    每次预测调用 expect(T, predicted, current, valid)，每个新采样调用 observe(t, poses, valid)。
+    真值由 T 两侧的相邻采样 t0 <= T <= t1 插值得到（位置线性插值，朝向 nlerp）；
+    两次采样间隔超过 max_skew_ns（丢帧、暂停）或 T 之前没有采样的预测直接丢弃。
+    只统计做预测时与两次真值采样时都有效的设备。
+    同时记录不做预测（直接用 current）的误差作为基线，便于调整预测时长。
+    """
+
+    def __init__(self, n_devices, capacity=256, max_skew_ns=50_000_000,
+                 log_interval=1000):
+        self.n_devices = n_devices
+        self.max_skew_ns = max_skew_ns
+        self.log_interval = log_interval
+
+        self._target = np.zeros(capacity, np.int64)
+        self._predicted = np.zeros((capacity, n_devices, 7), np.float32)
+        self._baseline = np.zeros((capacity, n_devices, 7), np.float32)
+        self._valid = np.zeros((capacity, n_devices), np.bool_)
+        self._mask = np.zeros(n_devices, np.bool_)
+        # 上一次采样，与本次采样一起夹住目标时刻
+        self._prev_time = None
+        self._prev_poses = np.zeros((n_devices, 7), np.float32)
+        self._prev_valid = np.zeros(n_devices, np.bool_)
+        self._truth = np.zeros((n_devices, 7), np.float32)
+        self._head = 0  # 下一个写入位置
+        self._tail = 0  # 最旧的待比较预测
+        self.overflow = 0
+        self.reset()
+
+    def reset(self):
+        n = self.n_devices
+        self.count = np.zeros(n, np.int64)
+        self.skipped = 0
+        self.pos_sq_sum = np.zeros(n)
+        self.pos_max = np.zeros(n)
+        self.ang_sum = np.zeros(n)
+        self.ang_max = np.zeros(n)
+        self.base_pos_sq_sum = np.zeros(n)
+        self.base_ang_sum = np.zeros(n)
+        self._next_log = self.log_interval
+
+    def expect(self, target_time, predicted, current, valid=True):
+        """valid: 做预测时各设备是否有效 ((N,) 或标量)"""
+        cap = len(self._target)
+        i = self._head % cap
+        if self._head - self._tail == cap:
+            self._tail += 1
+            self.overflow += 1
+        self._target[i] = target_time
+        self._predicted[i] = predicted
+        self._baseline[i] = current
+        self._valid[i] = valid
+        self._head += 1
+
+    def observe(self, xr_time, poses, valid):
+        cap = len(self._target)
+        t0 = self._prev_time
+        while self._tail < self._head:
+            i = self._tail % cap
+            target = self._target[i]
+            if target > xr_time:
+                break
+            self._tail += 1
+            if t0 is None or target < t0 or xr_time - t0 > self.max_skew_ns:
+                self.skipped += 1
+                continue
+            m = np.logical_and(self._valid[i], valid, out=self._mask)
+            m &= self._prev_valid
+            truth = self._interpolate(t0, xr_time, target, poses)
+            self._accumulate(self._predicted[i], self._baseline[i], truth, m)
+
+        self._prev_time = xr_time
+        self._prev_poses[:] = poses
+        self._prev_valid[:] = valid
+
+    def _interpolate(self, t0, t1, target, poses):
+        """上一次采样 (t0) 与本次采样 (t1) 之间 target 时刻的位姿"""
+        if t1 == t0:
+            self._truth[:] = poses
+            return self._truth
+        w = (target - t0) / (t1 - t0)
+        a, b, out = self._prev_poses, poses, self._truth
+        out[:, 4:] = a[:, 4:] + (b[:, 4:] - a[:, 4:]) * w
+        # nlerp: 先把 b 翻到与 a 同一半球，插值后归一化
+        sign = np.where(np.sum(a[:, :4] * b[:, :4], axis=-1, keepdims=True) < 0, -1.0, 1.0)
+        q = out[:, :4]
+        q[:] = a[:, :4] * (1 - w) + b[:, :4] * sign * w
+        norm = np.linalg.norm(q, axis=-1, keepdims=True)
+        np.divide(q, norm, out=q, where=norm > 0)
+        return out
+
+    def _accumulate(self, predicted, baseline, truth, m):
+        pos_err = np.linalg.norm(predicted[:, 4:] - truth[:, 4:], axis=-1)
+        ang_err = quat_angle(predicted[:, :4], truth[:, :4])
+        base_pos = np.linalg.norm(baseline[:, 4:] - truth[:, 4:], axis=-1)
+        base_ang = quat_angle(baseline[:, :4], truth[:, :4])
+
+        if not m.any():
+            return
+        self.count += m
+        self.pos_sq_sum += np.where(m, pos_err * pos_err, 0)
+        self.ang_sum += np.where(m, ang_err, 0)
+        self.base_pos_sq_sum += np.where(m, base_pos * base_pos, 0)
+        self.base_ang_sum += np.where(m, base_ang, 0)
+        np.maximum(self.pos_max, np.where(m, pos_err, 0), out=self.pos_max)
+        np.maximum(self.ang_max, np.where(m, ang_err, 0), out=self.ang_max)
+
+        total = int(self.count.max())
+        if self.log_interval and total >= self._next_log:
+            self._next_log = (total // self.log_interval + 1) * self.log_interval
+            log.info("prediction error: %s", self.summary())
+
+    def summary(self):
+        """每个设备: 位置 RMS / 最大 (mm)，角度平均 / 最大 (deg)，以及基线"""
+        n = np.maximum(self.count, 1)
+        return {
+            "count": self.count.tolist(),
+            "pos_rms_mm": (np.sqrt(self.pos_sq_sum / n) * 1e3).round(2).tolist(),
+            "pos_max_mm": (self.pos_max * 1e3).round(2).tolist(),
+            "ang_mean_deg": np.degrees(self.ang_sum / n).round(3).tolist(),
+            "ang_max_deg": np.degrees(self.ang_max).round(3).tolist(),
+            "baseline_pos_rms_mm": (np.sqrt(self.base_pos_sq_sum / n) * 1e3).round(2).tolist(),
+            "baseline_ang_mean_deg": np.degrees(self.base_ang_sum / n).round(3).tolist(),
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,122 @@
+import time
+
+
+class FixedRateLoop:
+    """
+    固定频率循环驱动
+
+    以绝对单调时钟截止时间排程 (deadline_k = start + k * period)，
+    单次迭代的耗时不会累积成漂移；等待采用 “先 sleep 再自旋” 的混合方式，
+    以获得亚毫秒级的唤醒精度。
+
+    用法:
+        loop = FixedRateLoop(rate_hz=120)
+        for tick in loop:
+            ...
+    """
+
+    def __init__(self, rate_hz=90.0, spin_s=0.001, max_lag_periods=4):
+        """
+        参数:
+        rate_hz: float, 目标频率；None 或 0 表示不限速（只计数）
+        spin_s: float, 截止时间前改为自旋等待的时长（秒），0 表示只 sleep
+        max_lag_periods: int, 落后超过这么多个周期时放弃追赶，直接重新对齐
+        """
+        if rate_hz is not None and rate_hz < 0:
+            raise ValueError(f"rate_hz must not be negative, got {rate_hz}")
+
+        self.rate_hz = rate_hz or 0
+        self.period_ns = int(round(1e9 / rate_hz)) if rate_hz else 0
+        self.spin_ns = int(spin_s * 1e9)
+        self.max_lag_ns = max_lag_periods * self.period_ns
+
+        self._deadline = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0  # 到达截止时间时上一轮还没做完
+        self.skipped = 0  # 因落后过多而被丢弃的周期数
+        self.jitter_last_ns = 0  # 实际唤醒时刻 - 截止时间
+        self.jitter_max_ns = 0
+        self._jitter_sum_ns = 0
+
+    def reset(self):
+        """以当前时刻重新对齐截止时间"""
+        self._deadline = time.monotonic_ns() + self.period_ns
+
+    def wait(self):
+        """
+        等待到下一个截止时间，返回截止时间 (monotonic ns)
+        """
+        now = time.monotonic_ns()
+        if not self.period_ns:
+            self.ticks += 1
+            return now
+        if self._deadline is None:
+            self._deadline = now
+
+        deadline = self._deadline
+        late = now - deadline
+
+        if late > 0:
+            # 超时：不等待，直接进入下一轮
+            self.overruns += 1
+            if late > self.max_lag_ns:
+                # 落后太多（如被调试器暂停），不再逐周期追赶
+                missed = late // self.period_ns
+                self.skipped += missed
+                deadline += missed * self.period_ns
+        else:
+            remaining = -late - self.spin_ns
+            if remaining > 0:
+                time.sleep(remaining * 1e-9)
+            while time.monotonic_ns() < deadline:
+                pass
+
+        wake = time.monotonic_ns()
+        jitter = wake - deadline
+        self.jitter_last_ns = jitter
+        if jitter > self.jitter_max_ns:
+            self.jitter_max_ns = jitter
+        self._jitter_sum_ns += jitter
+        self.ticks += 1
+
+        self._deadline = deadline + self.period_ns
+        return deadline
+
+    def __iter__(self):
+        self.reset()
+        while True:
+            self.wait()
+            yield self.ticks
+
+    def stats(self):
+        """统计信息 (时间单位: 微秒)"""
+        mean = self._jitter_sum_ns / self.ticks if self.ticks else 0
+        return {
+            "rate_hz": self.rate_hz,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_last_us": self.jitter_last_ns / 1e3,
+            "jitter_mean_us": mean / 1e3,
+            "jitter_max_us": self.jitter_max_ns / 1e3,
+        }
+
+
+if __name__ == "__main__":
+    import random
+
+    loop = FixedRateLoop(rate_hz=250)
+    t0 = time.monotonic()
+
+    for tick in loop:
+        # 模拟耗时不稳定的工作负载
+        time.sleep(random.uniform(0, 0.003))
+        if tick >= 1000:
+            break
+
+    elapsed = time.monotonic() - t0
+    print(f"实际频率: {loop.ticks / elapsed:.1f} Hz")
+    print(loop.stats())
@@ -0,0 +1,169 @@
+"""
+回放录制的会话，替代 XRSystem + XRTimeProvider + XRControllerTracker
+
+    replay = ReplaySession("session.xrrec", speed=1.0)
+    xr_sys, timer, tracker = replay.system, replay.time, replay.tracker
+
+speed: 1.0 实时，N 表示 N 倍速，None / 0 表示尽快（每次 poll 前进一条记录）。
+ReplaySystem.poll_events 会依次产生 IDLE → READY → SYNCHRONIZED → VISIBLE → FOCUSED，
+录制结束后产生 VISIBLE → SYNCHRONIZED → STOPPING → IDLE → EXITING，
+不需要头显即可在普通 Linux 机器上跑通整条处理链路。
+"""
+
+import time
+
+import numpy as np
+import xr
+
+from xr_broadcaster.recorder import SessionReader
+from xr_broadcaster.xr_tracker import XRControllerTracker
+
+_STARTUP = (
+    xr.SessionState.IDLE,
+    xr.SessionState.READY,
+    xr.SessionState.SYNCHRONIZED,
+    xr.SessionState.VISIBLE,
+    xr.SessionState.FOCUSED,
+)
+_SHUTDOWN = (
+    xr.SessionState.VISIBLE,
+    xr.SessionState.SYNCHRONIZED,
+    xr.SessionState.STOPPING,
+    xr.SessionState.IDLE,
+    xr.SessionState.EXITING,
+)
+
+
+class ReplaySystem:
+    """与 XRSystem 接口一致：state / poll_events()"""
+
+    def __init__(self, session):
+        self._replay = session
+        self.instance = None
+        self.session = None
+        self.state = xr.SessionState.UNKNOWN
+        self._pending = list(_STARTUP)
+        self.transitions = []  # [(monotonic_ns, state)]
+
+    def poll_events(self):
+        # 每次轮询最多推进一个状态，与真实运行时逐帧送达事件的节奏相近
+        if not self._pending and self._replay.finished \
+                and self.state == xr.SessionState.FOCUSED:
+            self._pending = list(_SHUTDOWN)
+        if self._pending:
+            self.state = self._pending.pop(0)
+            self.transitions.append((time.monotonic_ns(), self.state))
+            if self.state == xr.SessionState.FOCUSED:
+                self._replay.start()
+
+    def add_hooks(self, setup=None, teardown=None):
+        pass  # 回放不会丢失运行时
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        self._replay.close()
+
+
+class ReplayTimeProvider:
+    """与 XRTimeProvider 接口一致，返回回放时间轴上的 XrTime"""
+
+    def __init__(self, session):
+        self._replay = session
+
+    def now_ns(self):
+        return self._replay.clock()
+
+    now = now_ns
+
+    def now_many(self, offsets_ns, out=None):
+        return np.add(offsets_ns, self.now_ns(), out=out, dtype=np.int64)
+
+
+class ReplayTracker:
+    """与 XRControllerTracker 接口一致：poll() / poll_batch() / poses / valid / last_time"""
+
+    pose = XRControllerTracker.pose
+
+    def __init__(self, session):
+        self._replay = session
+        n = session.n_devices
+        self.poses = np.zeros((n, 7), np.float32)
+        self.poses[:, 3] = 1.0
+        self.valid = np.zeros(n, np.bool_)
+        self.inputs = None
+        if session.has_inputs:
+            self.inputs = np.zeros((), session.reader.dtype["inputs"])
+        self.last_time = 0
+
+    def poll_batch(self):
+        rec = self._replay.advance()
+        if rec is not None:
+            np.copyto(self.poses, rec["poses"])
+            np.copyto(self.valid, rec["valid"])
+            if self.inputs is not None:
+                self.inputs[...] = rec["inputs"]
+            self.last_time = int(rec["xr_time"])
+        return self.poses
+
+    def poll(self):
+        self.poll_batch()
+        return [self.pose(i) if self.valid[i] else None for i in range(len(self.valid))]
+
+
+class ReplaySession:
+    def __init__(self, path, speed=1.0):
+        self.reader = SessionReader(path)
+        if not len(self.reader):
+            raise ValueError(f"{path} contains no records")
+
+        self.speed = speed or 0
+        self.n_devices = self.reader.dtype["valid"].shape[0]
+        self.has_inputs = "inputs" in self.reader.dtype.names
+        # 记录是结构化数组，xr_time 字段视图带步长，searchsorted 每次都会拷贝剩余部分；
+        # 这里一次性拷成连续数组（每条 8 字节），之后切片都是零拷贝视图
+        self._times = np.ascontiguousarray(self.reader.records["xr_time"])
+        self._t0 = int(self._times[0])
+
+        self.cursor = -1  # 当前记录序号
+        self.finished = False
+        self._wall0 = None
+
+        self.system = ReplaySystem(self)
+        self.time = ReplayTimeProvider(self)
+        self.tracker = ReplayTracker(self)
+
+    def start(self):
+        if self._wall0 is None:
+            self._wall0 = time.monotonic_ns()
+
+    def clock(self):
+        """回放时间轴上的当前 XrTime"""
+        if not self.speed:
+            return int(self._times[max(self.cursor, 0)])
+        if self._wall0 is None:
+            return self._t0
+        return self._t0 + int((time.monotonic_ns() - self._wall0) * self.speed)
+
+    def advance(self):
+        """推进到当前回放时刻，返回对应记录（0 维视图），结束后返回 None"""
+        n = len(self._times)
+        if self.finished:
+            return None
+        if not self.speed:
+            cursor = self.cursor + 1
+        else:
+            # 取 xr_time <= 当前回放时刻的最后一条
+            target = self.clock()
+            start = max(self.cursor, 0)
+            cursor = start + int(np.searchsorted(self._times[start:], target, side="right")) - 1
+            cursor = max(cursor, 0)
+        if cursor >= n - 1:
+            cursor = n - 1
+            self.finished = True
+        self.cursor = cursor
+        return self.reader.records[cursor]
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,188 @@
+"""
+独立的高频采样线程
+
+采样线程按自己的频率 sync + locate（以及可选的按键采样），每次生成一个
+不可变的 Snapshot，通过一次属性赋值发布到 self.latest。CPython 中引用赋值
+是原子的，读者直接取 thread.latest 即可拿到完整一致的一帧，无需加锁；
+面板 / 可视化再慢也不会拖慢采样。
+
+    sampler = SamplingThread(tracker, rate_hz=500, inputs=input_sampler)
+    sampler.start()
+    ...
+    snap = sampler.latest          # 可能为 None（尚未采到）
+    if snap is not None and snap.seq != last_seq: ...
+    sampler.stop()
+"""
+
+import logging
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from xr_broadcaster.pose_filter import to_posef
+from xr_broadcaster.rate_loop import FixedRateLoop
+from xr_broadcaster.xr_tracker import XRControllerTracker
+
+log = logging.getLogger(__name__)
+
+
+class Snapshot(NamedTuple):
+    seq: int  # 从 1 开始递增
+    xr_time: int
+    sampled_ns: int  # 采样完成时的 time.monotonic_ns()
+    poses: np.ndarray  # (N, 7)，只读
+    valid: np.ndarray  # (N,)，只读
+    predicted: Optional[np.ndarray] = None  # 开启预测时的外推位姿，只读
+    predicted_time: int = 0
+    inputs: Optional[np.ndarray] = None  # InputSampler.record 的只读拷贝
+    filtered: Optional[np.ndarray] = None  # FilteredTracker 的滤波后位姿，只读
+
+    pose = XRControllerTracker.pose
+
+    def filtered_pose(self, i):
+        return to_posef(self.filtered[i])
+
+
+def _frozen(array):
+    out = array.copy()
+    out.flags.writeable = False
+    return out
+
+
+class SamplingThread:
+    """
+    tracker: XRControllerTracker / ReplayTracker，poll_batch() 负责 sync + locate
+    inputs: 可选的 InputSampler，应以 active_set=None 构造（由 tracker 负责同步）
+    sinks: 在采样线程中对每个 Snapshot 调用的回调（UDP / 共享内存 / 录制等轻量发布）
+    active: 为 False 时线程空转不采样（如会话未 FOCUSED），由调用方切换
+
+    FixedRateLoop 默认不自旋: 自旋会一直持有 GIL，拖慢其他线程。
+    switch_interval_s: 启动时把解释器的 GIL 切换间隔（进程全局，默认 5 ms）
+        降到不超过该值，否则主线程做纯 Python 计算时采样线程醒来后要等
+        一个完整间隔才能拿到 GIL；stop() 时恢复原值。None 表示不修改
+    """
+
+    def __init__(self, tracker, rate_hz=500, inputs=None, sinks=(), spin_s=0.0,
+                 switch_interval_s=0.0005):
+        self.tracker = tracker
+        self.switch_interval_s = switch_interval_s
+        self.inputs = inputs
+        self.sinks = list(sinks)
+        self.loop = FixedRateLoop(rate_hz=rate_hz, spin_s=spin_s)
+
+        self.latest = None
+        self.active = True
+        self.errors = 0
+        self.last_error = None
+
+        self._stop = threading.Event()
+        self._busy = threading.Lock()  # 采样进行中持有
+        self._thread = None
+        self._saved_switch_interval = None  # start() 改动前的值，stop() 时恢复
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.loop.reset_stats()
+        self.samples = 0
+        self.sample_ns_last = 0
+        self.sample_ns_max = 0
+        self._sample_ns_sum = 0
+        self._t_start = time.monotonic_ns()
+
+    def start(self):
+        if self.switch_interval_s and sys.getswitchinterval() > self.switch_interval_s:
+            self._saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(self.switch_interval_s)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="xr-sampling", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._saved_switch_interval is not None:
+            # 期间若被别处改过就不再覆盖
+            if sys.getswitchinterval() == self.switch_interval_s:
+                sys.setswitchinterval(self._saved_switch_interval)
+            self._saved_switch_interval = None
+
+    def pause(self):
+        """停止采样并等待进行中的一次结束（如运行时丢失、句柄即将销毁前）"""
+        self.active = False
+        with self._busy:
+            pass
+
+    def run(self):
+        self.loop.reset()
+        while not self._stop.is_set():
+            self.loop.wait()
+            if not self.active:
+                continue
+            try:
+                with self._busy:
+                    if self.active:
+                        self.sample()
+            except Exception as e:
+                # 运行时短暂出错（如会话切换中）不应让线程退出
+                self.errors += 1
+                if self.errors == 1 or str(e) != str(self.last_error):
+                    log.warning("sampling failed: %r", e)
+                self.last_error = e
+
+    def sample(self):
+        """采样一次并发布，返回新的 Snapshot（也可在不启动线程时直接调用）"""
+        t0 = time.monotonic_ns()
+        tracker = self.tracker
+        tracker.poll_batch()
+        inputs = None
+        if self.inputs is not None:
+            self.inputs.sample()
+            inputs = _frozen(self.inputs.record)
+
+        predicted, predicted_time = None, 0
+        if getattr(tracker, "predict_ns", 0) > 0:
+            predicted, predicted_time = _frozen(tracker.predicted), tracker.predicted_time
+        filtered = getattr(tracker, "filtered", None)
+        if filtered is not None:
+            filtered = _frozen(filtered)
+
+        t1 = time.monotonic_ns()
+        seq = self.samples + 1
+        snap = Snapshot(
+            seq, int(getattr(tracker.last_time, "value", tracker.last_time)), t1,
+            _frozen(tracker.poses), _frozen(tracker.valid),
+            predicted, predicted_time, inputs, filtered,
+        )
+        self.latest = snap  # 原子发布
+
+        for sink in self.sinks:
+            sink(snap)
+
+        elapsed = time.monotonic_ns() - t0
+        self.samples = seq
+        self.sample_ns_last = elapsed
+        if elapsed > self.sample_ns_max:
+            self.sample_ns_max = elapsed
+        self._sample_ns_sum += elapsed
+        return snap
+
+    def stats(self):
+        """采样线程自身的统计 (时间单位: 微秒)"""
+        elapsed = (time.monotonic_ns() - self._t_start) / 1e9
+        n = max(self.samples, 1)
+        stats = self.loop.stats()
+        stats.update({
+            "samples": self.samples,
+            "sample_rate_hz": self.samples / elapsed if elapsed > 0 else 0.0,
+            "sample_last_us": self.sample_ns_last / 1e3,
+            "sample_mean_us": self._sample_ns_sum / n / 1e3,
+            "sample_max_us": self.sample_ns_max / 1e3,
+            "errors": self.errors,
+        })
+        return stats
@@ -0,0 +1,293 @@
+"""
+共享内存 seqlock 环形缓冲区：跟踪循环写，任意数量的本机进程读
+
+内存布局 (multiprocessing.shared_memory):
+
+    header (64 字节): magic, version, capacity, n_devices, write_count, writer_pid
+    records[2 * capacity]: 结构化记录，见 record_dtype()
+
+每条记录同时写到槽位 p 和镜像槽位 p + capacity，因此 “最近 N 条”
+(N <= capacity) 在内存中总是连续的，可以直接返回 NumPy 视图。
+
+每条记录有自己的 seqlock 计数 lock：写入前 +1 (奇数)，写完再 +1 (偶数)。
+读者拷贝前后读到相同的偶数 lock 即为一致的快照，否则重试。
+写者只有一个，读者不加锁、不通信，也不需要 pickle / 管道。
+create() 遇到同名共享内存时，仅当记录的写者进程已不存在（上次异常退出遗留）
+才删除重建；写者仍在运行则抛出 FileExistsError，不会抢占别的实例的缓冲区。
+"""
+
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = 0x58525052  # "XRPR"
+VERSION = 2
+DEFAULT_NAME = "xr_broadcaster_poses"
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("capacity", "<u4"),
+    ("n_devices", "<u4"),
+    ("write_count", "<u8"),
+    ("writer_pid", "<u4"),
+], align=True)
+HEADER_SIZE = 64
+
+
+def record_dtype(n_devices=2):
+    return np.dtype([
+        ("lock", "<u8"),
+        ("index", "<u8"),  # 第几条记录 (从 0 开始)
+        ("xr_time", "<i8"),
+        ("valid", "?", (n_devices,)),
+        ("poses", "<f4", (n_devices, 7)),  # 列顺序同 xr_tracker.POSE_COLUMNS
+    ], align=True)
+
+
+def _attach(name):
+    """打开已有的共享内存，读者进程退出时不应把它删除"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # 3.13 之前 attach 也会向 resource_tracker 登记，进程退出时被 unlink
+        # (bpo-39959)，打开后立即撤销登记。spawn 出来的读者与创建者共用同一个
+        # tracker，这也会撤掉创建者的登记，所以写者在 unlink 前重新登记
+        # （见 PoseRing.close）；写者异常退出遗留的共享内存由 create() 清理。
+        # Windows 没有 resource_tracker，句柄全部关闭后系统自动回收。
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 存在但属于其他用户
+    return True
+
+
+def _check_stale(name):
+    """同名共享内存的写者已退出则删除它，仍在运行则抛出 FileExistsError"""
+    existing = _attach(name)
+    try:
+        pid = 0
+        if existing.size >= HEADER_SIZE:
+            header = np.ndarray((), HEADER_DTYPE, buffer=existing.buf)
+            if header["magic"] == MAGIC and header["version"] == VERSION:
+                pid = int(header["writer_pid"])
+            del header
+        if os.name != "posix" or _pid_alive(pid):
+            # Windows 上同名对象存在就说明仍有进程打开着它
+            raise FileExistsError(
+                f"shared memory {name!r} is in use by a running writer"
+                + (f" (pid {pid})" if pid else "")
+            )
+    finally:
+        existing.close()
+    # 用正常登记的句柄删除，unlink 里的 unregister 才有对应的 register
+    stale = shared_memory.SharedMemory(name=name)
+    stale.close()
+    stale.unlink()
+
+
+class PoseRing:
+    """
+    写者: ring = PoseRing.create(); ring.publish(poses, valid, xr_time)
+    读者: ring = PoseRing.attach(); ring.latest(); ring.last(64)
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+
+        self._header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        if self._header["magic"] != MAGIC or self._header["version"] != VERSION:
+            raise ValueError(f"shared memory {shm.name!r} is not a PoseRing")
+        self.capacity = int(self._header["capacity"])
+        self.n_devices = int(self._header["n_devices"])
+        self.dtype = record_dtype(self.n_devices)
+
+        self.records = np.ndarray(
+            (2 * self.capacity,), self.dtype, buffer=shm.buf, offset=HEADER_SIZE
+        )
+        # 按字段的跨步视图，避免热路径中反复按字段名索引
+        self._lock = self.records["lock"]
+        self._index = self.records["index"]
+        self._time = self.records["xr_time"]
+        self._valid = self.records["valid"]
+        self._poses = self.records["poses"]
+        self._write_count = self._header["write_count"]
+
+        self.count = int(self._write_count)
+        self.retries = 0
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, capacity=1024, n_devices=2):
+        dtype = record_dtype(n_devices)
+        size = HEADER_SIZE + 2 * capacity * dtype.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 可能是上次异常退出遗留的，也可能属于另一个正在运行的实例
+            _check_stale(name)
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        header[...] = (MAGIC, VERSION, capacity, n_devices, 0, os.getpid())
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        return cls(_attach(name), owner=False)
+
+    # -------------------- 写者 --------------------
+
+    def publish(self, poses, valid, xr_time):
+        k = self.count
+        a = k % self.capacity
+        b = a + self.capacity
+        lock = self._lock
+
+        lock[a] += 1
+        lock[b] += 1
+        for j in (a, b):
+            self._poses[j] = poses
+            self._valid[j] = valid
+            self._time[j] = xr_time
+            self._index[j] = k
+        lock[a] += 1
+        lock[b] += 1
+
+        self.count = k + 1
+        self._write_count[...] = k + 1
+
+    # -------------------- 读者 --------------------
+
+    def write_count(self):
+        return int(self._write_count)
+
+    def latest(self, out=None, max_retries=1000):
+        """
+        拷贝最新一条记录到 out (0 维结构化数组)，返回 out
+        尚无数据或一直被写者覆盖时返回 None
+        """
+        if out is None:
+            out = np.empty((), self.dtype)
+        lock = self._lock
+
+        for _ in range(max_retries):
+            n = int(self._write_count)
+            if n == 0:
+                return None
+            j = (n - 1) % self.capacity + self.capacity
+            s1 = int(lock[j])
+            if s1 & 1:
+                self.retries += 1
+                continue
+            out[...] = self.records[j]
+            if int(lock[j]) == s1 and int(out["index"]) == n - 1:
+                return out
+            self.retries += 1
+        return None
+
+    def last(self, n):
+        """
+        最近 n 条记录的零拷贝视图（按时间顺序）
+
+        视图直接指向共享内存，写者会持续覆盖最旧的记录；
+        用完后可调用 is_intact(view) 确认期间没有被覆盖。
+        """
+        count = int(self._write_count)
+        n = min(n, count, self.capacity)
+        if n == 0:
+            return self.records[:0]
+        end = (count - 1) % self.capacity + self.capacity + 1
+        return self.records[end - n:end]
+
+    def is_intact(self, view):
+        """view 中最旧的记录是否仍未被覆盖"""
+        if len(view) == 0:
+            return True
+        first = int(view["index"][0])
+        # 写者下一条会覆盖 index == write_count - capacity 的记录
+        return int(self._write_count) - first < self.capacity and not (view["lock"] & 1).any()
+
+    # -------------------- 生命周期 --------------------
+
+    def close(self):
+        # 先释放所有 NumPy 视图，否则 SharedMemory.close() 会报错
+        del self._lock, self._index, self._time, self._valid, self._poses
+        del self._write_count, self.records, self._header
+        self.shm.close()
+        if self.owner:
+            if os.name == "posix" and sys.version_info < (3, 13):
+                # 同一 tracker 上的读者 attach 时可能撤销了登记，补上后
+                # unlink 里的 unregister 才有对应项（重复登记无副作用）
+                resource_tracker.register(self.shm._name, "shared_memory")
+            self.shm.unlink()
+
+
+def _bench_reader(name, seconds, mode, result):
+    ring = PoseRing.attach(name)
+    out = np.empty((), ring.dtype)
+    reads = 0
+    torn = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if mode == "latest":
+            if ring.latest(out) is not None:
+                reads += 1
+        else:
+            view = ring.last(64)
+            total = float(view["poses"][:, :, 4].sum())  # 模拟对 64 条记录做一次运算
+            if ring.is_intact(view):
+                reads += 1
+            else:
+                torn += 1
+    result.put((mode, reads / seconds, ring.retries, torn))
+    del out
+    ring.close()
+
+
+if __name__ == "__main__":
+    # 跨进程吞吐基准：1 个写者 + 若干读者
+    import multiprocessing as mp
+    import sys
+
+    n_readers = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    seconds = 3.0
+
+    ring = PoseRing.create(capacity=1024)
+    result = mp.Queue()
+    modes = ["latest" if i % 2 == 0 else "last64" for i in range(n_readers)]
+    readers = [
+        mp.Process(target=_bench_reader, args=(DEFAULT_NAME, seconds, mode, result))
+        for mode in modes
+    ]
+    for p in readers:
+        p.start()
+
+    poses = np.zeros((2, 7), np.float32)
+    valid = np.ones(2, bool)
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < seconds:
+        poses[:, 4] += 1e-3
+        ring.publish(poses, valid, time.monotonic_ns())
+    writer_rate = ring.count / (time.monotonic() - t0)
+
+    for _ in readers:
+        mode, rate, retries, torn = result.get()
+        print(f"读者 {mode:>7}: {rate / 1e3:8.1f} k次/秒, seqlock 重试 {retries}, 被覆盖 {torn}")
+    for p in readers:
+        p.join()
+    print(f"写者: {writer_rate / 1e3:.1f} k条/秒")
+    ring.close()
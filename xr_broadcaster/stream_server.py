@@ -0,0 +1,370 @@
+"""
+asyncio 扇出服务器：把采样推送给多个 TCP / WebSocket 客户端
+
+- TCP: 每个采样一行 JSON (以 \\n 结尾)
+- WebSocket: 每个采样一个文本帧 (RFC 6455，仅服务端 → 客户端推送)
+
+跟踪循环调用 publish() 只是把对象放进收件箱，不接触 socket；
+编码在事件循环线程中每个采样只做一次，所有客户端共享同一份字节。
+每个客户端有独立的有界队列，队列满时丢弃最旧的采样（最新值优先），
+慢客户端只会丢自己的数据，不会拖慢跟踪循环。
+"""
+
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import struct
+import threading
+import time
+
+DEFAULT_TCP_PORT = 50043
+DEFAULT_WS_PORT = 50044
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _json_default(obj):
+    # NumPy 数组 / 标量、ctypes 结构等
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "value"):
+        return obj.value
+    return str(obj)
+
+
+def encode_json(sample):
+    return json.dumps(sample, separators=(",", ":"), default=_json_default).encode()
+
+
+def ws_frame(payload, opcode=0x1):
+    """服务端帧（不加掩码）"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class _Client:
+    def __init__(self, kind, peer, writer, maxsize):
+        self.kind = kind
+        self.peer = peer
+        self.writer = writer
+        self.queue = collections.deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+
+        self.sent = 0
+        self.dropped = 0
+        self.send_rate = 0.0
+        self._sent_last = 0
+
+    def push(self, payload):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(payload)
+        self.ready.set()
+
+
+class StreamServer:
+    """
+    用法:
+        server = StreamServer(); server.start()
+        server.publish({"t": ..., "poses": ...})   # 任意线程，非阻塞
+        server.stats()
+        server.stop()
+    """
+
+    def __init__(self, host="0.0.0.0", tcp_port=DEFAULT_TCP_PORT,
+                 ws_port=DEFAULT_WS_PORT, queue_size=8, encoder=encode_json):
+        """
+        参数:
+        tcp_port / ws_port: 端口，None 表示不启用该协议
+        queue_size: 每个客户端队列长度
+        encoder: 采样 → bytes
+        """
+        self.host = host
+        self.tcp_port = tcp_port
+        self.ws_port = ws_port
+        self.queue_size = queue_size
+        self.encoder = encoder
+
+        self.clients = []
+        self.published = 0
+        self.coalesced = 0  # 事件循环来不及处理、在收件箱里被覆盖的采样
+
+        self._loop = None
+        self._thread = None
+        self._stopping = None
+        self._started = threading.Event()
+        self._error = None
+
+        # 收件箱：发布线程写，事件循环线程读；只保留最新一个
+        self._inbox = collections.deque(maxlen=1)
+        self._wake_pending = False
+
+    # -------------------- 发布（跟踪线程） --------------------
+
+    def publish(self, sample, merge=False):
+        """
+        交给事件循环线程发送；sample 之后不应再被修改
+        没有客户端时直接返回
+
+        merge=True: sample 是增量 dict，收件箱里尚未发送的增量会与它合并
+        （新值优先），而不是被直接覆盖丢失
+        """
+        if not self.clients or self._loop is None:
+            return
+        self.published += 1
+        if merge:
+            try:
+                pending = self._inbox.pop()
+            except IndexError:
+                pass
+            else:
+                sample = {**pending, **sample}
+                self.coalesced += 1
+        elif self._inbox:
+            self.coalesced += 1
+        self._inbox.append(sample)
+        if not self._wake_pending:
+            self._wake_pending = True
+            self._loop.call_soon_threadsafe(self._fanout)
+
+    def _fanout(self):
+        self._wake_pending = False
+        try:
+            sample = self._inbox.popleft()
+        except IndexError:
+            return
+
+        payload = self.encoder(sample)
+        tcp_payload = ws_payload = None
+        for client in self.clients:
+            if client.kind == "ws":
+                if ws_payload is None:
+                    ws_payload = ws_frame(payload)
+                client.push(ws_payload)
+            else:
+                if tcp_payload is None:
+                    tcp_payload = payload + b"\n"
+                client.push(tcp_payload)
+
+    # -------------------- 客户端 --------------------
+
+    async def _serve_client(self, client, reader):
+        self.clients.append(client)
+        self._handlers.add(asyncio.current_task())
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            if client.kind == "ws":
+                await self._ws_read_loop(client, reader)
+            else:
+                # TCP 客户端只接收；读到 EOF 即断开
+                while await reader.read(4096):
+                    pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            sender.cancel()
+            self.clients.remove(client)
+            self._handlers.discard(asyncio.current_task())
+            client.writer.close()
+
+    async def _send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.queue:
+                    writer.write(client.queue.popleft())
+                    client.sent += 1
+                    await writer.drain()
+        except ConnectionError:
+            writer.close()
+
+    async def _on_tcp(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        client = _Client("tcp", peer, writer, self.queue_size)
+        await self._serve_client(client, reader)
+
+    async def _on_ws(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        key = None
+        for line in request.split(b"\r\n")[1:]:
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        client = _Client("ws", peer, writer, self.queue_size)
+        await self._serve_client(client, reader)
+
+    async def _ws_read_loop(self, client, reader):
+        """处理客户端发来的控制帧（close / ping），其余帧忽略"""
+        while True:
+            b0, b1 = await reader.readexactly(2)
+            opcode = b0 & 0x0F
+            n = b1 & 0x7F
+            if n == 126:
+                n, = struct.unpack("!H", await reader.readexactly(2))
+            elif n == 127:
+                n, = struct.unpack("!Q", await reader.readexactly(8))
+            mask = await reader.readexactly(4) if b1 & 0x80 else None
+            data = await reader.readexactly(n)
+            if mask:
+                data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+            if opcode == 0x8:
+                client.writer.write(ws_frame(data[:2], opcode=0x8))
+                return
+            if opcode == 0x9:
+                client.writer.write(ws_frame(data, opcode=0xA))
+
+    # -------------------- 统计 --------------------
+
+    async def _rate_loop(self, interval=1.0):
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            dt = now - last
+            last = now
+            for client in self.clients:
+                client.send_rate = (client.sent - client._sent_last) / dt
+                client._sent_last = client.sent
+
+    def stats(self):
+        """每个客户端的发送速率 (条/秒)、累计发送数和丢弃数"""
+        return {
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "clients": [
+                {
+                    "kind": c.kind,
+                    "peer": c.peer,
+                    "send_rate": round(c.send_rate, 1),
+                    "sent": c.sent,
+                    "dropped": c.dropped,
+                    "queued": len(c.queue),
+                }
+                for c in list(self.clients)
+            ],
+        }
+
+    # -------------------- 生命周期 --------------------
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._handlers = set()
+
+        servers = []
+        try:
+            if self.tcp_port is not None:
+                servers.append(await asyncio.start_server(self._on_tcp, self.host, self.tcp_port))
+            if self.ws_port is not None:
+                servers.append(await asyncio.start_server(self._on_ws, self.host, self.ws_port))
+        except Exception as e:
+            # 如端口已被占用: 交给 start() 在调用线程抛出
+            for server in servers:
+                server.close()
+            self._loop = None
+            self._error = e
+            self._started.set()
+            return
+        rate_task = asyncio.ensure_future(self._rate_loop())
+        self._started.set()
+
+        await self._stopping.wait()
+
+        rate_task.cancel()
+        for server in servers:
+            server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        # 关闭连接后处理协程会读到 EOF 并自行退出
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._loop = None
+
+    def start(self, timeout=5.0):
+        """在后台线程中运行事件循环；监听失败（如端口被占用）时抛出对应异常"""
+        self._error = None
+        self._started.clear()
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._main(),), daemon=True
+        )
+        self._thread.start()
+        if not self._started.wait(timeout):
+            raise TimeoutError(f"stream server did not start within {timeout} s")
+        if self._error is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+            raise self._error
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+
+if __name__ == "__main__":
+    # 本地演示：以 500 Hz 发布，一个正常客户端 + 一个不读数据的慢客户端
+    import socket
+
+    server = StreamServer(host="127.0.0.1")
+    server.start()
+
+    fast = socket.create_connection(("127.0.0.1", DEFAULT_TCP_PORT))
+    slow = socket.create_connection(("127.0.0.1", DEFAULT_TCP_PORT))
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    time.sleep(0.2)
+
+    received = [0]
+
+    def drain():
+        buf = b""
+        while True:
+            chunk = fast.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            received[0] += len(lines)
+
+    threading.Thread(target=drain, daemon=True).start()
+
+    worst = 0.0
+    for i in range(2500):
+        t0 = time.perf_counter()
+        server.publish({"seq": i, "poses": [[0.0] * 7] * 2, "pad": "x" * 4000})
+        worst = max(worst, time.perf_counter() - t0)
+        time.sleep(0.002)
+
+    time.sleep(1.2)
+    print(f"publish 最长耗时: {worst * 1e6:.1f} µs, 正常客户端收到 {received[0]} 条")
+    print(server.stats())
+    server.stop()
@@ -1,20 +1,52 @@
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-from scipy.spatial.transform import Rotation as R
+
+AXIS_COLORS = ('red', 'green', 'blue')  # 控制器自身的 X / Y / Z 轴
+
+
+def quat_axes(orientation, length=0.1):
+    """
+    四元数 → 旋转后的三根坐标轴向量
+
+    参数:
+    orientation: (x, y, z, w) 四元数，不要求归一化
+    length: float, 坐标轴长度
+
+    返回: (3, 3) 数组，第 i 行为第 i 根轴旋转后的向量
+    """
+    x, y, z, w = orientation
+    n = x * x + y * y + z * z + w * w
+    s = 2.0 / n if n > 0 else 0.0
+    # 旋转矩阵的三列即三根轴的方向
+    return length * np.array([
+        [1 - s * (y * y + z * z), s * (x * y + z * w), s * (x * z - y * w)],
+        [s * (x * y - z * w), 1 - s * (x * x + z * z), s * (y * z + x * w)],
+        [s * (x * z + y * w), s * (y * z - x * w), 1 - s * (x * x + y * y)],
+    ])
+
 
 class ControllerVisualizer:
-    def __init__(self, range_meters=1.0):
+    def __init__(self, range_meters=1.0, max_fps=60):
         """
         初始化控制器可视化器
-        
+
         参数:
         range_meters: float, 可视化范围(以米为单位)，默认为1.0米
                      控制器将在[-range_meters, range_meters]的立方体空间内显示
+        max_fps: float, 最高重绘频率；两次重绘之间的 update 只记录最新位姿，
+                 0 表示每次 update 都重绘
+
+        散点与轴线在构造时创建一次（animated），之后 update 只就地修改数据；
+        坐标轴、刻度、图例等静态部分画一次后缓存为背景，每次重绘只恢复背景、
+        画 8 个动态对象并 blit。窗口缩放 / 拖动旋转视角引起完整重绘时重新缓存背景。
         """
         # 保存范围参数
         self.range_meters = range_meters
-        
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
         # 创建图形和3D轴
         self.fig = plt.figure(figsize=(10, 8))
         self.ax = self.fig.add_subplot(111, projection='3d')
@@ -22,153 +54,139 @@ class ControllerVisualizer:
         self.ax.set_xlabel('X (meters)')
         self.ax.set_ylabel('Y (meters)')
         self.ax.set_zlabel('Z (meters)')
-        
+
         # 设置固定的坐标轴范围
         self.ax.set_xlim(-self.range_meters, self.range_meters)
         self.ax.set_ylim(0, 2 * self.range_meters)  # Y轴从0开始到2倍范围
         self.ax.set_zlim(-self.range_meters, self.range_meters)
-        
-        # 初始化图形元素
-        self.left_controller_scatter = None
-        self.right_controller_scatter = None
-        self.left_axes_lines = [[], [], []]  # X, Y, Z轴线条
-        self.right_axes_lines = [[], [], []]  # X, Y, Z轴线条
-        
+
+        # 持久的图形元素: 位置点 + 每个控制器 X, Y, Z 三条轴线
+        self.left_controller_scatter = self._make_scatter('blue', 'Left Controller')
+        self.right_controller_scatter = self._make_scatter('red', 'Right Controller')
+        self.left_axes_lines = self._make_axes_lines()
+        self.right_axes_lines = self._make_axes_lines()
+        self._artists = [
+            self.left_controller_scatter, self.right_controller_scatter,
+            *self.left_axes_lines, *self.right_axes_lines,
+        ]
+        self.ax.legend()
+
+        self._background = None
+        self._pending = False
+        self._next_draw = 0.0  # 重绘截止时间按 min_interval 等距排列
+        self.updates = 0
+        self.draws = 0
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
         # 显示图形
         plt.ion()  # 开启交互模式
         plt.show()
+        self.fig.canvas.draw()
+
+    def _make_scatter(self, color, label):
+        scatter = self.ax.scatter([0], [0], [0], c=color, s=100, label=label, animated=True)
+        scatter.set_visible(False)
+        return scatter
+
+    def _make_axes_lines(self):
+        lines = []
+        for color in AXIS_COLORS:
+            line, = self.ax.plot([0, 0], [0, 0], [0, 0], color=color, linewidth=2, animated=True)
+            line.set_visible(False)
+            lines.append(line)
+        return lines
+
+    def _on_draw(self, event):
+        """完整重绘之后（首次显示、缩放、旋转视角）重新缓存背景并补画动态对象"""
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        ax = self.ax
+        for artist in self._artists:
+            if not artist.get_visible():
+                continue
+            if hasattr(artist, 'do_3d_projection'):
+                artist.do_3d_projection()  # 散点需要先按当前视角投影
+            ax.draw_artist(artist)
 
     def update(self, left_controller, right_controller):
         """
         更新可视化界面
-        
+
         参数:
         left_controller: xr.Posef 对象，包含orientation和position属性
         right_controller: xr.Posef 对象，包含orientation和position属性
         """
-        # 清除旧的轴向线条
-        for i in range(3):
-            # 删除左控制器的轴线
-            for line in self.left_axes_lines[i][:]:  # 使用[:]创建副本以避免迭代时修改列表
-                if line in self.ax.lines:
-                    line.remove()
-            self.left_axes_lines[i].clear()
-            
-            # 删除右控制器的轴线
-            for line in self.right_axes_lines[i][:]:  # 使用[:]创建副本以避免迭代时修改列表
-                if line in self.ax.lines:
-                    line.remove()
-            self.right_axes_lines[i].clear()
-        
-        # 更新左控制器
-        left_pos = left_controller.position
-        left_ori = left_controller.orientation
-        
-        # 绘制左控制器位置点
-        if self.left_controller_scatter:
-            self.left_controller_scatter.remove()
-        self.left_controller_scatter = self.ax.scatter(
-            left_pos.x, left_pos.y, left_pos.z, 
-            c='blue', s=100, label='Left Controller'
-        )
-        
-        # 绘制左控制器坐标轴
-        self._draw_coordinate_system(
-            (left_pos.x, left_pos.y, left_pos.z),
-            (left_ori.x, left_ori.y, left_ori.z, left_ori.w),
-            self.left_axes_lines,
-            length=0.1
-        )
-        
-        # 更新右控制器
-        right_pos = right_controller.position
-        right_ori = right_controller.orientation
-        
-        # 绘制右控制器位置点
-        if self.right_controller_scatter:
-            self.right_controller_scatter.remove()
-        self.right_controller_scatter = self.ax.scatter(
-            right_pos.x, right_pos.y, right_pos.z, 
-            c='red', s=100, label='Right Controller'
-        )
-        
-        # 绘制右控制器坐标轴
-        self._draw_coordinate_system(
-            (right_pos.x, right_pos.y, right_pos.z),
-            (right_ori.x, right_ori.y, right_ori.z, right_ori.w),
-            self.right_axes_lines,
-            length=0.1
-        )
-        
-        # 添加图例
-        # 只在第一次添加图例，避免重复
-        if not self.ax.get_legend():
-            self.ax.legend()
-        
-        # 更新图形
-        self.fig.canvas.draw()
-        self.fig.canvas.flush_events()
+        self._set_pose(left_controller, self.left_controller_scatter, self.left_axes_lines)
+        self._set_pose(right_controller, self.right_controller_scatter, self.right_axes_lines)
+        self.updates += 1
+        self._pending = True
 
-    def _draw_coordinate_system(self, position, orientation, axes_lines, length=0.1):
-        """
-        绘制坐标系
-        
-        参数:
-        position: tuple, (x, y, z) 位置坐标
-        orientation: tuple, (x, y, z, w) 四元数方向
-        axes_lines: list, 存储轴线的列表
-        length: float, 坐标轴长度
-        """
-        # 使用scipy处理四元数旋转
-        rotation = R.from_quat(orientation)  # scipy使用(x, y, z, w)格式
-        
-        # 定义坐标轴方向 (X, Y, Z)
-        axes = [
-            np.array([length, 0, 0]),  # X轴 - 红色
-            np.array([0, length, 0]),  # Y轴 - 绿色
-            np.array([0, 0, length])   # Z轴 - 蓝色
-        ]
-        
-        # 旋转坐标轴向量
-        rotated_axes = rotation.apply(axes)
-        
-        # 绘制每条轴线
-        colors = ['red', 'green', 'blue']
-        for i, (axis, color) in enumerate(zip(rotated_axes, colors)):
-            line = self.ax.plot(
-                [position[0], position[0] + axis[0]],
-                [position[1], position[1] + axis[1]],
-                [position[2], position[2] + axis[2]],
-                color=color, linewidth=2
-            )[0]
-            axes_lines[i].append(line)
+        now = time.perf_counter()
+        if now >= self._next_draw:
+            self.redraw()
+            if now - self._next_draw > self.min_interval:
+                self._next_draw = now  # 空闲过后重新对齐，不补画
+            self._next_draw += self.min_interval
+
+    def _set_pose(self, pose, scatter, axes_lines, length=0.1):
+        """就地修改位置点和三条轴线的数据"""
+        pos = pose.position
+        ori = pose.orientation
+        p = (pos.x, pos.y, pos.z)
+        scatter._offsets3d = ([p[0]], [p[1]], [p[2]])
+        scatter.set_visible(True)
+        for line, axis in zip(axes_lines, quat_axes((ori.x, ori.y, ori.z, ori.w), length)):
+            line.set_data_3d(
+                [p[0], p[0] + axis[0]],
+                [p[1], p[1] + axis[1]],
+                [p[2], p[2] + axis[2]],
+            )
+            line.set_visible(True)
+
+    def redraw(self):
+        """把最新位姿画出来: 恢复背景 → 画动态对象 → blit（有未画出的更新时才做）"""
+        if not self._pending:
+            return
+        canvas = self.fig.canvas
+        if self._background is None:
+            canvas.draw()  # 由 _on_draw 缓存背景并画出动态对象
+        else:
+            canvas.restore_region(self._background)
+            self._draw_artists()
+            canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+        self._pending = False
+        self.draws += 1
 
 # 示例用法
 if __name__ == "__main__":
     # 创建可视化器实例，设置范围为1米
     visualizer = ControllerVisualizer(range_meters=1.0)
-    
+
     # 示例数据
     from collections import namedtuple
-    
+
     Vector3f = namedtuple('Vector3f', ['x', 'y', 'z'])
     Quaternionf = namedtuple('Quaternionf', ['x', 'y', 'z', 'w'])
     Posef = namedtuple('Posef', ['orientation', 'position'])
-    
+
     # 创建示例Posef对象
     left_pose = Posef(
         orientation=Quaternionf(x=0.435, y=-0.074, z=-0.450, w=0.777),
         position=Vector3f(x=0.151, y=0.909, z=-0.752)
     )
-    
+
     right_pose = Posef(
         orientation=Quaternionf(x=0.493, y=0.330, z=0.317, w=0.740),
         position=Vector3f(x=0.309, y=0.905, z=-0.823)
     )
-    
+
     # 更新可视化
     visualizer.update(left_pose, right_pose)
-    
+
     # 保持窗口开启
     plt.ioff()
-    plt.show()
\ No newline at end of file
+    plt.show()
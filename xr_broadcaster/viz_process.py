@@ -0,0 +1,120 @@
+"""
+在独立进程中运行 ControllerVisualizer
+
+跟踪循环只把要显示的位姿写进一个小的 PoseRing（共享内存 seqlock 槽位，
+一次 publish 就是几次数组拷贝），可视化进程按自己的频率读取最新一条并重绘。
+matplotlib 绘制、GUI 事件处理都不在跟踪进程里；关闭窗口只会结束可视化进程，
+跟踪进程继续照常写共享内存。跟踪进程退出时可视化进程随之退出。
+
+    viz = VisualizerProcess(n_devices=2)
+    viz.publish(poses, valid, xr_time)   # 跟踪循环中，每帧一次
+    viz.update(l_pose, r_pose)           # 或者沿用 ControllerVisualizer 的接口
+    viz.close()
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from xr_broadcaster.shm_ring import PoseRing
+
+VIZ_SHM_PREFIX = "xr_broadcaster_viz"
+
+
+def viz_shm_name(pid=None):
+    """可视化共享内存的名称，按跟踪进程的 pid 区分，多个实例互不干扰"""
+    return f"{VIZ_SHM_PREFIX}_{os.getpid() if pid is None else pid}"
+
+
+def run_viewer(name, stop, rate_hz=60, range_meters=1.0, left=0, right=1):
+    """可视化进程入口: 读取共享内存中最新的位姿，按 rate_hz 重绘"""
+    import matplotlib.pyplot as plt
+    from xr_broadcaster.pose_filter import to_posef
+    from xr_broadcaster.visualizer import ControllerVisualizer
+
+    ring = PoseRing.attach(name)
+    viz = ControllerVisualizer(range_meters=range_meters, max_fps=0)
+    out = np.empty((), ring.dtype)
+    parent = mp.parent_process()
+    period = 1.0 / rate_hz
+    last_index = -1
+    next_frame = time.monotonic()
+    try:
+        # 窗口被关闭、收到停止信号或跟踪进程退出时结束
+        while plt.fignum_exists(viz.fig.number) and not stop.is_set():
+            if parent is not None and not parent.is_alive():
+                break
+            record = ring.latest(out)
+            if record is not None and int(record["index"]) != last_index:
+                last_index = int(record["index"])
+                valid = record["valid"]
+                if valid[left] and valid[right]:
+                    poses = record["poses"]
+                    viz.update(to_posef(poses[left]), to_posef(poses[right]))
+            # 处理窗口事件并等待下一帧（扣除本帧绘制耗时）
+            next_frame = max(next_frame + period, time.monotonic())
+            viz.fig.canvas.start_event_loop(max(next_frame - time.monotonic(), 0.001))
+    finally:
+        plt.close(viz.fig)
+        ring.close()
+
+
+class VisualizerProcess:
+    """
+    跟踪进程侧: 创建共享内存并启动可视化进程（spawn，不继承跟踪进程的
+    XR 句柄和线程）；publish / update 只写共享内存，从不阻塞在绘制上
+
+    n_devices: 每条记录的设备数；left / right 为要显示的两个设备的下标
+    rate_hz: 可视化进程的重绘频率
+    name: 共享内存名称，默认 viz_shm_name()（含本进程 pid），传给可视化进程
+    """
+
+    def __init__(self, n_devices=2, rate_hz=60, range_meters=1.0, left=0, right=1,
+                 name=None):
+        if name is None:
+            name = viz_shm_name()
+        self.name = name
+        self.ring = PoseRing.create(name=name, capacity=8, n_devices=n_devices)
+        self.left = left
+        self.right = right
+        self._poses = np.zeros((n_devices, 7), np.float32)
+        self._valid = np.zeros(n_devices, np.bool_)
+
+        ctx = mp.get_context("spawn")
+        self._stop = ctx.Event()
+        self.process = ctx.Process(
+            target=run_viewer,
+            args=(name, self._stop, rate_hz, range_meters, left, right),
+            name="xr-visualizer",
+            daemon=True,
+        )
+        self.process.start()
+
+    @property
+    def alive(self):
+        """可视化窗口是否还开着"""
+        return self.process.is_alive()
+
+    def publish(self, poses, valid, xr_time=0):
+        """写入一帧位姿 (N, 7) 与有效标志 (N,)"""
+        self.ring.publish(poses, valid, xr_time)
+
+    def update(self, left_controller, right_controller):
+        """与 ControllerVisualizer.update 相同的接口（xr.Posef），只写共享内存"""
+        poses = self._poses
+        for i, pose in ((self.left, left_controller), (self.right, right_controller)):
+            o, p = pose.orientation, pose.position
+            poses[i] = (o.x, o.y, o.z, o.w, p.x, p.y, p.z)
+            self._valid[i] = True
+        self.ring.publish(poses, self._valid, time.monotonic_ns())
+
+    def close(self, timeout=2.0):
+        """通知可视化进程退出并释放共享内存"""
+        self._stop.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.ring.close()
@@ -1,19 +1,30 @@
 import xr
 import ctypes
 
+from xr_broadcaster.action_manifest import HANDS, load_manifest
+
+# 清单中的手柄 pose 动作
+POSE_ACTION = "pose"
+
 
 class XRControllerActions:
-    """ActionSet、ActionSpace、绑定、ReferenceSpace"""
+    """
+    ActionSet、ActionSpace、绑定、ReferenceSpace
 
-    def __init__(self, instance, session):
+    pose 动作及其在各交互配置下的绑定来自动作清单 (默认 actions.json)
+    注意: 动作名随清单为 "pose"（早先版本为 "hand_pose"），运行时按动作名
+    保存的用户自定义绑定需要重新设置
+    """
+
+    def __init__(self, instance, session, manifest=None):
         self.instance = instance
         self.session = session
 
         self.action_set = self._make_action_set()
-        self.paths = self._make_paths()
-        self.pose_action = self._make_pose_action()
+        self.compiled = self._compile(manifest or load_manifest())
+        self.paths = [self.compiled.paths[f"/user/hand/{h}"] for h in HANDS]
+        self.pose_action = self.compiled.actions[POSE_ACTION]
 
-        self._bind_oculus_touch()
         self._attach()
 
         self.spaces = self._make_spaces()
@@ -34,48 +45,8 @@ class XRControllerActions:
             ),
         )
 
-    def _make_paths(self):
-        return [
-            xr.string_to_path(self.instance, "/user/hand/left"),
-            xr.string_to_path(self.instance, "/user/hand/right"),
-        ]
-
-    def _make_pose_action(self):
-        return xr.create_action(
-            action_set=self.action_set,
-            create_info=xr.ActionCreateInfo(
-                action_type=xr.ActionType.POSE_INPUT,
-                action_name="hand_pose",
-                localized_action_name="Hand Pose",
-                count_subaction_paths=2,
-                subaction_paths=(xr.Path * 2)(*self.paths),
-            )
-        )
-
-    def _bind_oculus_touch(self):
-        binds = []
-        for side in ["left", "right"]:
-            binds.append(
-                xr.ActionSuggestedBinding(
-                    action=self.pose_action,
-                    binding=xr.string_to_path(
-                        self.instance,
-                        f"/user/hand/{side}/input/grip/pose",
-                    ),
-                )
-            )
-
-        xr.suggest_interaction_profile_bindings(
-            instance=self.instance,
-            suggested_bindings=xr.InteractionProfileSuggestedBinding(
-                interaction_profile=xr.string_to_path(
-                    self.instance,
-                    "/interaction_profiles/oculus/touch_controller",
-                ),
-                count_suggested_bindings=2,
-                suggested_bindings=(xr.ActionSuggestedBinding * 2)(*binds),
-            ),
-        )
+    def _compile(self, manifest):
+        return manifest.subset([POSE_ACTION]).compile(self.instance, self.action_set)
 
     def _attach(self):
         xr.attach_session_action_sets(
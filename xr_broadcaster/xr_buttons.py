@@ -1,91 +1,31 @@
-import xr
+from xr_broadcaster.action_manifest import load_manifest
+
+# 本类管理的按键，定义及各交互配置下的绑定见动作清单
+BUTTON_ACTIONS = ("trigger", "grip", "a_click", "b_click", "thumbstick")
 
 
 class XRButtonActions:
     """
     管理所有手柄按键（Boolean / Float / Vector2）
+
+    动作和绑定由动作清单 (默认 actions.json) 编译，
+    清单中列出的每个交互配置都会建议绑定
+
+    与早先手写 Oculus Touch 绑定的版本相比: trigger / grip / thumbstick 为
+    带左右手 subaction 的动作（按 NULL_PATH 查询时由运行时合并两只手），
+    thumbstick 也绑定了左手摇杆；只需要右手时按 /user/hand/right 查询
     """
 
-    def __init__(self, instance, action_set):
+    def __init__(self, instance, action_set, manifest=None):
         self.instance = instance
         self.action_set = action_set
 
-        # ------ 创建 Actions ------
-        self.trigger = self._make_float_action("trigger")
-        self.grip = self._make_float_action("grip")
-        self.a_click = self._make_bool_action("a_click")
-        self.b_click = self._make_bool_action("b_click")
-        self.thumbstick = self._make_vec2_action("thumbstick")
-
-        # ------ 绑定路径 ------
-        self._bind_oculus_touch()
-
-    # -------------------- 工具：创建 action --------------------
-
-    def _make_bool_action(self, name):
-        return xr.create_action(
-            action_set=self.action_set,
-            create_info=xr.ActionCreateInfo(
-                action_type=xr.ActionType.BOOLEAN_INPUT,
-                action_name=name,
-                localized_action_name=name,
-            ),
-        )
-
-    def _make_float_action(self, name):
-        return xr.create_action(
-            action_set=self.action_set,
-            create_info=xr.ActionCreateInfo(
-                action_type=xr.ActionType.FLOAT_INPUT,
-                action_name=name,
-                localized_action_name=name,
-            ),
-        )
-
-    def _make_vec2_action(self, name):
-        return xr.create_action(
-            action_set=self.action_set,
-            create_info=xr.ActionCreateInfo(
-                action_type=xr.ActionType.VECTOR2F_INPUT,
-                action_name=name,
-                localized_action_name=name,
-            ),
-        )
-
-    # -------------------- 绑定 Oculus Touch --------------------
-
-    def _bind_oculus_touch(self):
-        binds = []
-
-        # ------ Trigger 扳机 ------
-        binds.append(self._binding(self.trigger, "/user/hand/right/input/trigger/value"))
-        binds.append(self._binding(self.trigger, "/user/hand/left/input/trigger/value"))
-
-        # ------ Grip 扳机 ------
-        binds.append(self._binding(self.grip, "/user/hand/right/input/squeeze/value"))
-        binds.append(self._binding(self.grip, "/user/hand/left/input/squeeze/value"))
-
-        # ------ A/B 按钮 ------
-        binds.append(self._binding(self.a_click, "/user/hand/right/input/a/click"))
-        binds.append(self._binding(self.b_click, "/user/hand/right/input/b/click"))
-
-        # ------ 摇杆（vector2） ------
-        binds.append(self._binding(self.thumbstick, "/user/hand/right/input/thumbstick"))
-
-        xr.suggest_interaction_profile_bindings(
-            instance=self.instance,
-            suggested_bindings=xr.InteractionProfileSuggestedBinding(
-                interaction_profile=xr.string_to_path(
-                    self.instance,
-                    "/interaction_profiles/oculus/touch_controller",
-                ),
-                count_suggested_bindings=len(binds),
-                suggested_bindings=(xr.ActionSuggestedBinding * len(binds))(*binds),
-            ),
-        )
+        # ------ 创建 Actions 并绑定路径 ------
+        manifest = (manifest or load_manifest()).subset(BUTTON_ACTIONS)
+        self.compiled = manifest.compile(instance, action_set)
 
-    def _binding(self, action, path):
-        return xr.ActionSuggestedBinding(
-            action=action,
-            binding=xr.string_to_path(self.instance, path),
-        )
+        self.trigger = self.compiled.actions["trigger"]
+        self.grip = self.compiled.actions["grip"]
+        self.a_click = self.compiled.actions["a_click"]
+        self.b_click = self.compiled.actions["b_click"]
+        self.thumbstick = self.compiled.actions["thumbstick"]
@@ -0,0 +1,240 @@
+import logging
+
+import xr
+
+from xr_broadcaster.action_manifest import HANDS, load_manifest
+from xr_broadcaster.xr_paths import path_cache
+
+log = logging.getLogger(__name__)
+
+# 角色列表同 xr_examples/vive_tracker.py
+VIVE_TRACKER_ROLES = (
+    "handheld_object",
+    "left_foot",
+    "right_foot",
+    "left_shoulder",
+    "right_shoulder",
+    "left_elbow",
+    "right_elbow",
+    "left_knee",
+    "right_knee",
+    "waist",
+    "chest",
+    "camera",
+    "keyboard",
+)
+
+HAND_POSE_KINDS = ("grip", "aim")
+
+
+class XRDeviceRegistry:
+    """
+    任意数量可跟踪设备的注册表（HMD、手柄 grip/aim、Vive Tracker）
+
+    先声明设备，每个设备得到一个稳定的整数 id（按声明顺序），再 build()
+    一次性创建 ActionSet / Action / 绑定 / Space。接口与 XRControllerActions
+    一致 (session / spaces / ref_space / active_set)，可直接交给
+    XRControllerTracker，每帧批量采样到 poses[id] / valid[id]。
+
+    各类设备在哪些交互配置下绑定到哪个分量由动作清单的 devices 一节给出
+    (默认 actions.json)，运行时不支持的交互配置记录后跳过。
+
+        reg = XRDeviceRegistry(instance, session)
+        hmd = reg.add_view()
+        left, right = reg.add_hands()
+        reg.add_vive_trackers()          # 需要 HTCX_vive_tracker_interaction 扩展
+        reg.build()
+        tracker = XRControllerTracker(reg, timer)
+    """
+
+    def __init__(self, instance, session,
+                 base_space_type=xr.ReferenceSpaceType.STAGE, manifest=None):
+        self.instance = instance
+        self.session = session
+        self.base_space_type = base_space_type
+        self.manifest = manifest or load_manifest()
+
+        self.names = []  # id → 名称
+        self.kinds = []  # id → "view" / "grip" / "aim" / "vive_tracker"
+        self.ids = {}  # 名称 → id，仅供初始化时查找
+        self._targets = []  # id → 子动作路径字符串（view 为 None）
+
+        self.action_set = None
+        self.active_set = None
+        self.spaces = []
+        self.ref_space = None
+        self.built = False
+        self.rejected = {}  # 交互配置 → 错误
+
+    # -------------------- 声明 --------------------
+
+    def _add(self, name, kind, target):
+        if self.built:
+            raise RuntimeError("cannot add devices after build()")
+        if name in self.ids:
+            raise ValueError(f"device {name!r} already registered")
+        if kind != "view" and kind not in self.manifest.devices:
+            raise ValueError(f"no bindings for device kind {kind!r} in {self.manifest.source}")
+        device_id = len(self.names)
+        self.names.append(name)
+        self.kinds.append(kind)
+        self._targets.append(target)
+        self.ids[name] = device_id
+        return device_id
+
+    def add_view(self, name="hmd"):
+        """头显，使用 VIEW 参考空间"""
+        return self._add(name, "view", None)
+
+    def add_hand(self, side, kind="grip"):
+        if side not in HANDS or kind not in HAND_POSE_KINDS:
+            raise ValueError(f"unknown hand pose {side}/{kind}")
+        return self._add(f"{side}_{kind}", kind, f"/user/hand/{side}")
+
+    def add_hands(self, kinds=("grip",)):
+        return [self.add_hand(side, kind) for kind in kinds for side in HANDS]
+
+    def add_vive_tracker(self, role):
+        if role not in VIVE_TRACKER_ROLES:
+            raise ValueError(f"unknown vive tracker role {role!r}")
+        return self._add(role, "vive_tracker", f"/user/vive_tracker_htcx/role/{role}")
+
+    def add_vive_trackers(self, roles=VIVE_TRACKER_ROLES):
+        return [self.add_vive_tracker(role) for role in roles]
+
+    def id_of(self, name):
+        return self.ids[name]
+
+    def __len__(self):
+        return len(self.names)
+
+    # -------------------- 创建 --------------------
+
+    def build(self, attach=True):
+        """
+        attach=False 时由调用方把 self.action_set 与其他 ActionSet 一起 attach，
+        然后再调用 create_spaces()
+        """
+        self.action_set = xr.create_action_set(
+            instance=self.instance,
+            create_info=xr.ActionSetCreateInfo(
+                action_set_name="device_registry",
+                localized_action_set_name="Device Registry",
+                priority=0,
+            ),
+        )
+        self.active_set = xr.ActiveActionSet(
+            action_set=self.action_set,
+            subaction_path=xr.NULL_PATH, # type: ignore
+        )
+
+        self._paths = path_cache(self.instance)
+        self._actions = {}
+        for kind in sorted(set(self.kinds) - {"view"}):
+            subactions = sorted({t for t, k in zip(self._targets, self.kinds) if k == kind})
+            self._actions[kind] = self._make_pose_action(kind, subactions)
+
+        self._bind()
+        self.built = True
+
+        if attach:
+            xr.attach_session_action_sets(
+                session=self.session,
+                attach_info=xr.SessionActionSetsAttachInfo(action_sets=[self.action_set]),
+            )
+            self.create_spaces()
+        return self
+
+    def rebuild(self, instance, session):
+        """
+        在新的 instance / session 上按原有声明重新创建（运行时恢复后），
+        设备 id 不变；路径经 path_cache 解析，预热过的缓存不再访问运行时
+        """
+        self.instance = instance
+        self.session = session
+        self.spaces = []
+        self.ref_space = None
+        self.built = False
+        return self.build()
+
+    def _path(self, s):
+        return self._paths.to_path(s)
+
+    def _make_pose_action(self, kind, subactions):
+        paths = (xr.Path * len(subactions))(*[self._path(s) for s in subactions])
+        return xr.create_action(
+            action_set=self.action_set,
+            create_info=xr.ActionCreateInfo(
+                action_type=xr.ActionType.POSE_INPUT,
+                action_name=f"{kind}_pose",
+                localized_action_name=self.manifest.devices[kind]["localized"],
+                count_subaction_paths=len(subactions),
+                subaction_paths=paths,
+            ),
+        )
+
+    def _bind(self):
+        # 交互配置 → [(设备类型, 绑定路径)]，每个交互配置一次建议绑定
+        binds = {}
+        for target, kind in zip(self._targets, self.kinds):
+            if kind == "view":
+                continue
+            for profile, path in self.manifest.device_bindings(kind, target).items():
+                binds.setdefault(profile, []).append((kind, path))
+
+        self.rejected = {}
+        for profile, pairs in binds.items():
+            try:
+                self._suggest(profile, pairs)
+            except xr.XrException as e:
+                log.warning("interaction profile %s rejected: %r", profile, e)
+                self.rejected[profile] = repr(e)
+        if binds and len(self.rejected) == len(binds):
+            raise RuntimeError(f"no interaction profile accepted: {self.rejected}")
+
+    def _suggest(self, profile, binds):
+        bindings = (xr.ActionSuggestedBinding * len(binds))(*[
+            xr.ActionSuggestedBinding(action=self._actions[kind], binding=self._path(path))
+            for kind, path in binds
+        ])
+        xr.suggest_interaction_profile_bindings(
+            instance=self.instance,
+            suggested_bindings=xr.InteractionProfileSuggestedBinding(
+                interaction_profile=self._path(profile),
+                count_suggested_bindings=len(bindings),
+                suggested_bindings=bindings,
+            ),
+        )
+
+    def create_spaces(self):
+        self.ref_space = xr.create_reference_space(
+            session=self.session,
+            create_info=xr.ReferenceSpaceCreateInfo(
+                reference_space_type=self.base_space_type
+            ),
+        )
+
+        self.spaces = []
+        for name, target, kind in zip(self.names, self._targets, self.kinds):
+            if kind == "view":
+                space = xr.create_reference_space(
+                    session=self.session,
+                    create_info=xr.ReferenceSpaceCreateInfo(
+                        reference_space_type=xr.ReferenceSpaceType.VIEW
+                    ),
+                )
+            else:
+                try:
+                    space = xr.create_action_space(
+                        session=self.session,
+                        create_info=xr.ActionSpaceCreateInfo(
+                            action=self._actions[kind],
+                            subaction_path=self._path(target),
+                        ),
+                    )
+                except xr.exception.PathUnsupportedError:
+                    # 保留 id，该设备的 valid 始终为 False
+                    log.info(f"Skipping unsupported device {name}")
+                    space = None
+            self.spaces.append(space)
+        return self.spaces
@@ -0,0 +1,110 @@
+"""
+XrPath 驻留缓存: string_to_path / path_to_string 双向缓存，每个 instance 一份
+
+同一路径字符串在 instance 生命周期内对应的 XrPath 不变，因此只需向运行时
+解析一次。缓存按 instance 句柄登记在进程级的表中，instance 销毁时必须失效
+（句柄值可能被新 instance 复用）: 用本模块的 destroy_instance() 代替
+xr.destroy_instance()，或在销毁前调用 forget(instance)。
+
+    paths = path_cache(instance)
+    paths.preload(["/user/hand/left", "/user/hand/right"])   # 启动时批量解析
+    left = paths.to_path("/user/hand/left")                  # 命中，不再调用运行时
+    paths.to_string(left)
+    paths.stats()
+"""
+
+import ctypes
+import threading
+
+import xr
+
+_caches = {}  # instance 句柄值 → PathCache
+_lock = threading.Lock()
+
+
+def _key(instance):
+    return ctypes.cast(instance, ctypes.c_void_p).value or 0
+
+
+def _int(path):
+    # xr.Path 是 c_uint64；也接受普通整数
+    return getattr(path, "value", path)
+
+
+def path_cache(instance):
+    """返回 instance 对应的 PathCache（不存在时创建）"""
+    key = _key(instance)
+    cache = _caches.get(key)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = _caches[key] = PathCache(instance)
+    return cache
+
+
+def forget(instance):
+    """使 instance 的缓存失效并移出进程级登记表"""
+    with _lock:
+        cache = _caches.pop(_key(instance), None)
+    if cache is not None:
+        cache.clear()
+
+
+def destroy_instance(instance):
+    """先让路径缓存失效，再销毁 instance"""
+    forget(instance)
+    xr.destroy_instance(instance)
+
+
+class PathCache:
+    def __init__(self, instance):
+        self.instance = instance
+        self._paths = {}  # 字符串 → xr.Path
+        self._strings = {}  # int(path) → 字符串
+        self.hits = 0
+        self.misses = 0
+
+    def to_path(self, path_string):
+        path = self._paths.get(path_string)
+        if path is not None:
+            self.hits += 1
+            return path
+        self.misses += 1
+        path = xr.string_to_path(self.instance, path_string)
+        self._paths[path_string] = path
+        self._strings[_int(path)] = path_string
+        return path
+
+    def to_string(self, path):
+        path_string = self._strings.get(_int(path))
+        if path_string is not None:
+            self.hits += 1
+            return path_string
+        self.misses += 1
+        path_string = xr.path_to_string(self.instance, path)
+        self._strings[_int(path)] = path_string
+        self._paths.setdefault(path_string, xr.Path(_int(path)))
+        return path_string
+
+    def preload(self, path_strings):
+        """批量解析（启动时调用），返回与输入顺序一致的 xr.Path 列表"""
+        return [self.to_path(s) for s in path_strings]
+
+    def to_paths(self, path_strings):
+        """与 preload 相同，返回 {字符串: xr.Path}"""
+        return dict(zip(path_strings, self.preload(path_strings)))
+
+    def strings(self):
+        """已缓存的全部路径字符串（用于在新 instance 上批量预热）"""
+        return list(self._paths)
+
+    def clear(self):
+        self._paths.clear()
+        self._strings.clear()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,123 @@
+"""
+基准测试用的 OpenXR 运行时桩
+
+把 xr.raw_functions 中的运行时入口替换为 ctypes 回调，参数转换开销与
+真实调用一致，无需头显或运行时即可测量 Python 侧的每帧开销。
+
+注意: 需要在创建被测对象之前进入 stub_runtime()，
+因为批量采样类会在构造时缓存函数指针。
+"""
+
+import contextlib
+import ctypes
+import itertools
+import platform
+
+import xr
+
+
+def _locate_space(space, base_space, time, location):
+    location[0]._location_flags = 0xF
+    return 0
+
+
+def _sync_actions(session, sync_info):
+    return 0
+
+
+def _action_state(session, get_info, state):
+    state[0].is_active = 1
+    return 0
+
+
+def _string_to_path(instance, path_string, path):
+    # 不同字符串得到不同的非零 Path
+    path[0] = hash(path_string) & 0xFFFFFFFF or 1
+    return 0
+
+
+_handles = itertools.count(0x1000)
+
+
+def _create_handle(parent, create_info, handle):
+    # 句柄类型都是不透明指针，写入一个唯一的非零值
+    ctypes.cast(handle, ctypes.POINTER(ctypes.c_void_p))[0] = next(_handles)
+    return 0
+
+
+def _suggest_bindings(instance, suggested_bindings):
+    return 0
+
+
+STUBS = {
+    "xrLocateSpace": (xr.PFN_xrLocateSpace, _locate_space),
+    "xrSyncActions": (xr.PFN_xrSyncActions, _sync_actions),
+    "xrGetActionStateBoolean": (xr.PFN_xrGetActionStateBoolean, _action_state),
+    "xrGetActionStateFloat": (xr.PFN_xrGetActionStateFloat, _action_state),
+    "xrGetActionStateVector2f": (xr.PFN_xrGetActionStateVector2f, _action_state),
+    "xrStringToPath": (xr.PFN_xrStringToPath, _string_to_path),
+    "xrCreateActionSet": (xr.PFN_xrCreateActionSet, _create_handle),
+    "xrCreateAction": (xr.PFN_xrCreateAction, _create_handle),
+    "xrSuggestInteractionProfileBindings": (
+        xr.PFN_xrSuggestInteractionProfileBindings, _suggest_bindings
+    ),
+}
+
+
+def _native_noop():
+    """
+    C 库的 labs: 返回第一个参数。FakeActions 的句柄都是 NULL，
+    因此对这些入口来说就是一个立即返回 XR_SUCCESS、不写输出的原生函数，
+    测得的只剩 Python / ctypes 侧的开销
+    """
+    libc = ctypes.cdll.msvcrt if platform.system() == "Windows" else ctypes.CDLL(None)
+    return ctypes.cast(libc.labs, ctypes.c_void_p).value
+
+
+@contextlib.contextmanager
+def stub_runtime(native=False, **overrides):
+    """
+    临时替换运行时函数:
+    with stub_runtime(xrGetActionStateFloat=my_fn): ...
+
+    native=True 时默认入口改用原生空函数（见 _native_noop），不再经过 Python 回调
+    """
+    stubs = dict(STUBS)
+    if native:
+        noop = _native_noop()
+        stubs = {name: (proto, noop) for name, (proto, _) in stubs.items()}
+    for name, fn in overrides.items():
+        stubs[name] = (getattr(xr, f"PFN_{name}"), fn)
+
+    saved = {}
+    # 回调对象必须保持引用，否则会被回收
+    keep = []
+    try:
+        for name, (proto, fn) in stubs.items():
+            saved[name] = getattr(xr.raw_functions, name)
+            cb = proto(fn)
+            keep.append(cb)
+            setattr(xr.raw_functions, name, cb)
+        yield
+    finally:
+        for name, fn in saved.items():
+            setattr(xr.raw_functions, name, fn)
+
+
+class FakeActions:
+    """与 XRControllerActions 接口一致的假对象"""
+
+    def __init__(self, n_spaces=2):
+        self.session = xr.Session()
+        self.spaces = [xr.Space() for _ in range(n_spaces)]
+        self.ref_space = xr.Space()
+        self.active_set = xr.ActiveActionSet()
+
+
+class FakeTimeProvider:
+    def __init__(self):
+        self.t = 0
+
+    def now(self):
+        self.t += 1_000_000
+        return xr.Time(self.t)
@@ -1,27 +1,141 @@
 import ctypes
+import logging
+import time
+
 import xr
 
+from xr_broadcaster.xr_paths import destroy_instance, path_cache
+
+log = logging.getLogger(__name__)
+
+# 运行时丢失时 XR 调用抛出的异常
+LOSS_ERRORS = (xr.InstanceLostError, xr.SessionLostError)
+
 
 class XRSystem:
-    """管理 instance / system / session / state"""
+    """
+    管理 instance / system / session / state，以及运行时丢失后的自动恢复
+
+    会话状态:
+        READY          → begin_session
+        STOPPING       → end_session
+        LOSS_PENDING   → 运行时即将丢失会话: 拆除并重建
+        EXITING        → 拆除 session；restart_on_exit=True 时按丢失处理重建，
+                         否则停留在 EXITING，由调用方退出
+    另外处理 EVENT_DATA_INSTANCE_LOSS_PENDING，以及任何调用抛出的
+    InstanceLostError / SessionLostError（调用方捕获后交给 handle_loss()）。
 
-    def __init__(self, extensions):
+    丢失后 poll_events() 按指数退避重建 instance + session（backoff_s 起，
+    每次失败翻倍，不超过 backoff_max_s；上限取得短，运行时回来后最多再等这么久），
+    成功后依次调用 add_hooks 注册的 setup(xr_sys)，由上层重建动作 / 空间 / 时间换算等。
+    某个 setup 失败时先调用 teardown 钩子（前面的 setup 可能已启动使用新句柄的线程）
+    再销毁，之后照常退避重试。旧 instance 的
+    路径字符串会在新 instance 上批量预解析，重建时的 string_to_path 全部命中缓存。
+
+    恢复耗时见 stats(): recover_s 为丢失 → 重建完成，downtime_s 为丢失 → 重新 FOCUSED。
+    """
+
+    def __init__(self, extensions, restart_on_exit=False, backoff_s=0.05, backoff_max_s=0.5):
+        self.extensions = list(extensions)
+        self.restart_on_exit = restart_on_exit
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+
+        self.instance = None
+        self.system = None
+        self.session = None
+        self.state = xr.SessionState.UNKNOWN
+        self.lost = False  # 等待重建中
+        self.exit_requested = False
+
+        self._setup_hooks = []
+        self._teardown_hooks = []
+        self._path_strings = []
+        self._retry_at = 0.0
+        self._retry_delay = backoff_s
+        self._lost_at = None  # 本次丢失的 monotonic 时间，重新 FOCUSED 后清空
+        self._loss_attempts = 0
+
+        self.losses = 0
+        self.recoveries = 0
+        self.attempts = 0
+        self.last_error = None
+        self.recover_s_last = 0.0
+        self.recover_s_max = 0.0
+        self.downtime_s_last = 0.0
+        self.downtime_s_max = 0.0
+
+        self._create()
+
+    # -------------------- 创建 / 拆除 --------------------
+
+    def _create(self):
         self.instance = xr.create_instance(
-            xr.InstanceCreateInfo(enabled_extension_names=extensions)
-        )
-        self.system = xr.get_system(
-            self.instance,
-            xr.SystemGetInfo(form_factor=xr.FormFactor.HEAD_MOUNTED_DISPLAY),
-        )
-        self.session = xr.create_session(
-            self.instance,
-            xr.SessionCreateInfo(system_id=self.system)
+            xr.InstanceCreateInfo(enabled_extension_names=self.extensions)
         )
+        try:
+            if self._path_strings:
+                path_cache(self.instance).preload(self._path_strings)
+            self.system = xr.get_system(
+                self.instance,
+                xr.SystemGetInfo(form_factor=xr.FormFactor.HEAD_MOUNTED_DISPLAY),
+            )
+            self.session = xr.create_session(
+                self.instance,
+                xr.SessionCreateInfo(system_id=self.system)
+            )
+        except Exception:
+            self._destroy()
+            raise
         self.state = xr.SessionState.UNKNOWN
 
+    def _destroy(self):
+        if self.session is not None:
+            try:
+                xr.destroy_session(self.session)
+            except xr.XrException as e:
+                log.debug("destroy_session: %r", e)
+            self.session = None
+        if self.instance is not None:
+            self._path_strings = path_cache(self.instance).strings()
+            try:
+                destroy_instance(self.instance)
+            except xr.XrException as e:
+                log.debug("destroy_instance: %r", e)
+            self.instance = None
+
+    def add_hooks(self, setup=None, teardown=None):
+        """
+        setup(xr_sys): 每次重建 instance / session 之后调用（首次创建不调用）
+        teardown(xr_sys): 每次拆除之前调用，用于暂停仍在使用旧句柄的线程
+        """
+        if setup is not None:
+            self._setup_hooks.append(setup)
+        if teardown is not None:
+            self._teardown_hooks.append(teardown)
+
+    def _teardown(self):
+        for hook in self._teardown_hooks:
+            try:
+                hook(self)
+            except Exception as e:
+                log.warning("teardown hook failed: %r", e)
+        self._destroy()
+
+    # -------------------- 事件 / 状态机 --------------------
+
     def poll_events(self):
-        """事件轮询 + 自动状态管理"""
-        while True:
+        """事件轮询 + 自动状态管理；丢失期间负责按退避节奏重建"""
+        if self.lost:
+            self._try_recover()
+            return
+        try:
+            self._drain_events()
+        except LOSS_ERRORS as e:
+            self.handle_loss(e)
+
+    def _drain_events(self):
+        while self.instance is not None:
             try:
                 evbuf = xr.poll_event(self.instance)
             except xr.EventUnavailable:
@@ -29,20 +143,115 @@ class XRSystem:
 
             etype = xr.StructureType(evbuf.type)
 
+            if etype == xr.StructureType.EVENT_DATA_INSTANCE_LOSS_PENDING:
+                self.handle_loss("instance loss pending")
+                break
+
             if etype == xr.StructureType.EVENT_DATA_SESSION_STATE_CHANGED:
                 event = ctypes.cast(
                     ctypes.byref(evbuf),
                     ctypes.POINTER(xr.EventDataSessionStateChanged)
                 ).contents
+                if self._on_state(xr.SessionState(event.state)):
+                    break
+
+    def _on_state(self, state):
+        """处理一次会话状态变化；返回 True 表示 session 已被拆除"""
+        self.state = state
+        if state == xr.SessionState.READY:
+            xr.begin_session(
+                self.session,
+                xr.SessionBeginInfo(
+                    primary_view_configuration_type=xr.ViewConfigurationType.PRIMARY_MONO
+                ),
+            )
+        elif state == xr.SessionState.STOPPING:
+            xr.end_session(self.session)
+        elif state == xr.SessionState.FOCUSED:
+            if self._lost_at is not None:
+                self.downtime_s_last = time.monotonic() - self._lost_at
+                self.downtime_s_max = max(self.downtime_s_max, self.downtime_s_last)
+                self._lost_at = None
+                log.info("tracking resumed %.3f s after runtime loss", self.downtime_s_last)
+        elif state == xr.SessionState.LOSS_PENDING:
+            self.handle_loss("session loss pending")
+            return True
+        elif state == xr.SessionState.EXITING:
+            if self.restart_on_exit and not self.exit_requested:
+                self.handle_loss("session exiting")
+            else:
+                self._teardown()
+                self.state = xr.SessionState.EXITING
+            return True
+        return False
+
+    def handle_loss(self, reason):
+        """拆除 instance / session 并进入重建流程（调用方捕获到 LOSS_ERRORS 时也应调用）"""
+        if self.lost:
+            return
+        log.warning("XR runtime lost (%s), tearing down", reason)
+        self.losses += 1
+        self.last_error = reason
+        if self._lost_at is None:
+            self._lost_at = time.monotonic()
+        self._teardown()
+        self.lost = True
+        self.state = xr.SessionState.UNKNOWN
+        self._retry_delay = self.backoff_s
+        self._retry_at = time.monotonic()  # 立即尝试一次
+        self._loss_attempts = 0
+
+    def _try_recover(self):
+        now = time.monotonic()
+        if now < self._retry_at:
+            return
+        self.attempts += 1
+        self._loss_attempts += 1
+        try:
+            self._create()  # 失败时自己销毁已创建的部分
+        except Exception as e:
+            self._retry_later(now, e)
+            return
+        try:
+            for hook in self._setup_hooks:
+                hook(self)
+        except Exception as e:
+            self._teardown()
+            self._retry_later(now, e)
+            return
+
+        self.lost = False
+        self.recoveries += 1
+        self.recover_s_last = time.monotonic() - self._lost_at
+        self.recover_s_max = max(self.recover_s_max, self.recover_s_last)
+        log.info("XR runtime recovered in %.3f s (%d attempts)",
+                 self.recover_s_last, self._loss_attempts)
+
+    def _retry_later(self, now, error):
+        self.last_error = error
+        self._retry_at = now + self._retry_delay
+        log.info("XR recreate failed (%r), retrying in %.2f s", error, self._retry_delay)
+        self._retry_delay = min(self._retry_delay * 2, self.backoff_max_s)
+
+    def request_exit(self):
+        """主动结束会话；随后的 EXITING 不会触发重建"""
+        self.exit_requested = True
+        if self.session is not None and not self.lost:
+            xr.request_exit_session(self.session)
+
+    def stats(self):
+        """丢失 / 恢复次数与耗时 (秒)"""
+        return {
+            "losses": self.losses,
+            "recoveries": self.recoveries,
+            "attempts": self.attempts,
+            "lost": self.lost,
+            "recover_s_last": round(self.recover_s_last, 3),
+            "recover_s_max": round(self.recover_s_max, 3),
+            "downtime_s_last": round(self.downtime_s_last, 3),
+            "downtime_s_max": round(self.downtime_s_max, 3),
+        }
 
-                self.state = xr.SessionState(event.state)
-
-                if self.state == xr.SessionState.READY:
-                    xr.begin_session(
-                        self.session,
-                        xr.SessionBeginInfo(
-                            primary_view_configuration_type=xr.ViewConfigurationType.PRIMARY_MONO
-                        ),
-                    )
-                elif self.state == xr.SessionState.STOPPING:
-                    xr.end_session(self.session)
+    def close(self):
+        """销毁 session 和 instance（同时使该 instance 的路径缓存失效）"""
+        self._destroy()
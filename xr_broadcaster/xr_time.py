@@ -1,14 +1,53 @@
 import ctypes
 import platform
 import time
+
+import numpy as np
 import xr
 
 
 class XRTimeProvider:
-    def __init__(self, instance):
-        self.instance = instance
+    """
+    当前时刻 → XrTime
+
+    calibrated=False: 每次都通过转换扩展计算（精确，但有 ctypes 调用开销）
+    calibrated=True: 启动时测量 XrTime 与 time.perf_counter_ns() 的偏移，
+                     之后只做整数加法；定期重新校准，检测到漂移时缩短校准间隔。
+                     perf_counter 在 Windows 上即 QPC、在 Linux 上即 CLOCK_MONOTONIC，
+                     与两条转换扩展使用的时钟相同（monotonic_ns 在 Windows 3.13 之前
+                     只有约 15.6 ms 的分辨率）。
+                     定期重新校准分摊到之后的 calibration_samples 次 now() 中，
+                     每次只多做一次转换调用
+
+    now() / now_ns() 都返回 int 纳秒，可直接传给 xr.locate_space 等接口
+    """
+
+    def __init__(self, instance, calibrated=False, recalibrate_s=10.0,
+                 drift_tolerance_ns=20_000, calibration_samples=16):
         self.platform = platform.system()
+        self._bind(instance)
 
+        # 校准状态
+        self.calibrated = calibrated
+        self.recalibrate_ns = int(recalibrate_s * 1e9)
+        self.drift_tolerance_ns = drift_tolerance_ns
+        self.calibration_samples = calibration_samples
+        self.offset_ns = 0
+        self.calibrations = 0
+        self.drift_events = 0
+        self.last_drift_ns = 0
+        self._interval_ns = self.recalibrate_ns
+        self._next_calibration_ns = 0
+        # 分摊中的重新校准: 已取样本数、其中耗时最短一次的耗时与偏移
+        self._pending = 0
+        self._best_span = 0
+        self._best_offset = 0
+
+        if self.calibrated:
+            self.calibrate()
+
+    def _bind(self, instance):
+        self.instance = instance
         if self.platform == "Windows":
             import ctypes.wintypes
             self.kernel32 = ctypes.WinDLL("kernel32")
@@ -31,7 +70,14 @@ class XRTimeProvider:
                 xr.PFN_xrConvertTimespecTimeToTimeKHR,
             )
 
-    def now(self):
+    def rebind(self, instance):
+        """换到新的 instance（运行时恢复后）；新 instance 的时间基准可能不同，重新校准"""
+        self._bind(instance)
+        if self.calibrated:
+            self._interval_ns = self.recalibrate_ns
+            self.calibrate()
+
+    def _now_exact(self):
         if self.platform == "Windows":
             self.kernel32.QueryPerformanceCounter(ctypes.byref(self.pc))
             xr_time = xr.Time()
@@ -39,9 +85,70 @@ class XRTimeProvider:
             return xr_time
 
         else:
-            sec, frac = divmod(time.clock_gettime(time.CLOCK_MONOTONIC), 1) # type: ignore
-            self.ts.tv_sec = int(sec)
-            self.ts.tv_nsec = int(frac * 1e9)
+            sec, nsec = divmod(time.clock_gettime_ns(time.CLOCK_MONOTONIC), 1_000_000_000) # type: ignore
+            self.ts.tv_sec = sec
+            self.ts.tv_nsec = nsec
             xr_time = xr.Time()
             self.fn(self.instance, ctypes.byref(self.ts), ctypes.byref(xr_time))
             return xr_time
+
+    def _sample(self):
+        """一次 “读 perf_counter → 转换 → 再读 perf_counter”，记下耗时最短的一次"""
+        t0 = time.perf_counter_ns()
+        xr_ns = self._now_exact().value
+        t1 = time.perf_counter_ns()
+        span = t1 - t0
+        if not self._pending or span < self._best_span:
+            self._best_span = span
+            self._best_offset = xr_ns - (t0 + t1) // 2
+        self._pending += 1
+
+    def calibrate(self):
+        """
+        测量 XrTime - perf_counter_ns 的偏移（一次取完全部样本）
+
+        取若干次 “读时钟 → 转换 → 再读时钟”，
+        用耗时最短的一次的中点作为对应时刻。
+        """
+        self._pending = 0
+        for _ in range(self.calibration_samples):
+            self._sample()
+        return self._commit()
+
+    def _commit(self):
+        offset = self._best_offset
+        self._pending = 0
+        if self.calibrations:
+            self.last_drift_ns = offset - self.offset_ns
+            if abs(self.last_drift_ns) > self.drift_tolerance_ns:
+                # 出现漂移：缩短校准间隔（最短 1 秒）
+                self.drift_events += 1
+                self._interval_ns = max(self._interval_ns // 2, 1_000_000_000)
+            else:
+                self._interval_ns = min(self._interval_ns * 2, self.recalibrate_ns)
+
+        self.offset_ns = offset
+        self.calibrations += 1
+        self._next_calibration_ns = time.perf_counter_ns() + self._interval_ns
+        return offset
+
+    def now_ns(self):
+        """当前 XrTime (int 纳秒)"""
+        if self.calibrated:
+            t = time.perf_counter_ns()
+            if t >= self._next_calibration_ns:
+                # 到期后每次调用取一个样本，取满后更新偏移
+                self._sample()
+                if self._pending >= self.calibration_samples:
+                    self._commit()
+            return t + self.offset_ns
+        return self._now_exact().value
+
+    now = now_ns
+
+    def now_many(self, offsets_ns, out=None):
+        """
+        只读一次时钟，返回 now + offsets_ns (int64 数组)
+        适合每帧需要多个时间点（如不同预测时长）的调用方
+        """
+        return np.add(offsets_ns, self.now_ns(), out=out, dtype=np.int64)
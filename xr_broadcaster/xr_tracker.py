@@ -1,12 +1,179 @@
+import ctypes
+
+import numpy as np
 import xr
 
+from xr_broadcaster.prediction import extrapolate, PredictionErrorStats
+
+
+# poses 每行的列顺序，与 xr.Posef 的内存布局一致
+POSE_COLUMNS = ("qx", "qy", "qz", "qw", "px", "py", "pz")
+
+_POSE_OFFSET = xr.SpaceLocation.pose.offset
+_FLAGS_OFFSET = xr.SpaceLocation._location_flags.offset
+_VEL_FLAGS_OFFSET = xr.SpaceVelocity._velocity_flags.offset
+_LINEAR_OFFSET = xr.SpaceVelocity.linear_velocity.offset
+_ANGULAR_OFFSET = xr.SpaceVelocity.angular_velocity.offset
+
+
+class SpaceBatchLocator:
+    """
+    批量 locate_space
+
+    结果由运行时直接写入预分配的 SpaceLocation 数组，再通过 NumPy 视图
+    一次性拷贝到 poses (N, 7) / valid (N,)，热循环中不创建 Python 对象。
+
+    spaces 中可以有 None（如运行时不支持的设备），对应行始终无效。
+    velocity=True 时在每个 SpaceLocation 的 next 上挂接 SpaceVelocity，
+    额外输出 linear_velocity / angular_velocity (N, 3)，无效分量置 0。
+    """
+
+    def __init__(self, spaces, base_space, velocity=False):
+        self.spaces = list(spaces)
+        self.base_space = base_space
+        n = len(self.spaces)
+
+        self._locations = (xr.SpaceLocation * n)()
+        for i in range(n):
+            self._locations[i] = xr.SpaceLocation()
+        self._calls = self._make_calls()
+        self._locate = xr.raw_functions.xrLocateSpace
+
+        # 指向 SpaceLocation 数组内部的跨步视图
+        stride = ctypes.sizeof(xr.SpaceLocation)
+        self._pose_view = np.ndarray(
+            (n, 7), np.float32, buffer=self._locations,
+            offset=_POSE_OFFSET, strides=(stride, 4),
+        )
+        self._flag_view = np.ndarray(
+            (n,), np.uint64, buffer=self._locations,
+            offset=_FLAGS_OFFSET, strides=(stride,),
+        )
+
+        # 对外的连续缓冲区
+        self.poses = np.zeros((n, 7), np.float32)
+        self.poses[:, 3] = 1.0
+        self.valid = np.zeros(n, np.bool_)
+        self._flags = np.zeros(n, np.uint64)
+        self._valid_bit = np.uint64(xr.SPACE_LOCATION_POSITION_VALID_BIT)
+
+        self.velocity = velocity
+        if velocity:
+            self._init_velocity(n)
+
+    def _init_velocity(self, n):
+        self._velocities = (xr.SpaceVelocity * n)()
+        for i in range(n):
+            self._velocities[i] = xr.SpaceVelocity()
+            self._locations[i]._next = ctypes.cast(
+                ctypes.pointer(self._velocities[i]), ctypes.c_void_p
+            )
+
+        stride = ctypes.sizeof(xr.SpaceVelocity)
+        self._linear_view = np.ndarray(
+            (n, 3), np.float32, buffer=self._velocities,
+            offset=_LINEAR_OFFSET, strides=(stride, 4),
+        )
+        self._angular_view = np.ndarray(
+            (n, 3), np.float32, buffer=self._velocities,
+            offset=_ANGULAR_OFFSET, strides=(stride, 4),
+        )
+        self._vel_flag_view = np.ndarray(
+            (n,), np.uint64, buffer=self._velocities,
+            offset=_VEL_FLAGS_OFFSET, strides=(stride,),
+        )
+
+        self.linear_velocity = np.zeros((n, 3), np.float32)
+        self.angular_velocity = np.zeros((n, 3), np.float32)
+        self._linear_bit = np.uint64(xr.SPACE_VELOCITY_LINEAR_VALID_BIT)
+        self._angular_bit = np.uint64(xr.SPACE_VELOCITY_ANGULAR_VALID_BIT)
+        self._vel_valid = np.zeros(n, np.bool_)
+
+    def _make_calls(self):
+        return [
+            (space, ctypes.pointer(self._locations[i]))
+            for i, space in enumerate(self.spaces)
+            if space is not None
+        ]
+
+    def rebind(self, spaces, base_space):
+        """
+        换成新 session 上的同一组设备（运行时恢复后），
+        保留 poses / valid 等输出数组，持有它们引用的消费者不受影响
+        """
+        spaces = list(spaces)
+        if len(spaces) != len(self.spaces):
+            raise ValueError(f"expected {len(self.spaces)} spaces, got {len(spaces)}")
+        self.spaces = spaces
+        self.base_space = base_space
+        self._calls = self._make_calls()
+        self.valid[:] = False
+
+    def locate(self, time):
+        locate = self._locate
+        base = self.base_space
+        for space, location in self._calls:
+            result = locate(space, base, time, location)
+            if result < 0:
+                raise xr.check_result(result)
+
+        np.copyto(self.poses, self._pose_view)
+        np.bitwise_and(self._flag_view, self._valid_bit, out=self._flags)
+        np.not_equal(self._flags, 0, out=self.valid)
+
+        if self.velocity:
+            np.bitwise_and(self._vel_flag_view, self._linear_bit, out=self._flags)
+            np.not_equal(self._flags, 0, out=self._vel_valid)
+            np.multiply(self._linear_view, self._vel_valid[:, None], out=self.linear_velocity)
+            np.bitwise_and(self._vel_flag_view, self._angular_bit, out=self._flags)
+            np.not_equal(self._flags, 0, out=self._vel_valid)
+            np.multiply(self._angular_view, self._vel_valid[:, None], out=self.angular_velocity)
+        return self.poses
+
 
 class XRControllerTracker:
-    """负责 locate_space"""
+    """
+    负责 locate_space
 
-    def __init__(self, actions, time_provider):
+    actions 可以是 XRControllerActions 或 XRDeviceRegistry，
+    只需提供 session / spaces / ref_space / active_set。
+    """
+
+    def __init__(self, actions, time_provider, predict_ns=0):
+        """
+        predict_ns: >0 时开启预测模式，poll_batch 额外读取速度，
+                    并把位姿外推到 last_time + predict_ns，结果在 self.predicted
+        """
         self.actions = actions
         self.time = time_provider
+        self.predict_ns = predict_ns
+
+        # 批量模式预分配
+        self._bind_sync()
+        self._sync = xr.raw_functions.xrSyncActions
+        self.batch = SpaceBatchLocator(
+            self.actions.spaces, self.actions.ref_space, velocity=predict_ns > 0
+        )
+        self.poses = self.batch.poses  # (N, 7)，列顺序见 POSE_COLUMNS
+        self.valid = self.batch.valid  # (N,)
+        self.last_time = 0
+
+        if predict_ns > 0:
+            n = len(self.actions.spaces)
+            self.predicted = np.zeros((n, 7), np.float32)
+            self.predicted_time = 0
+            self.prediction_errors = PredictionErrorStats(n)
+
+    def _bind_sync(self):
+        self._sync_info = xr.ActionsSyncInfo(
+            active_action_sets=[self.actions.active_set]
+        )
+        self._sync_info_ptr = ctypes.pointer(self._sync_info)
+
+    def rebind(self):
+        """actions 重建之后（新的 session / active_set / spaces）调用，输出数组保持不变"""
+        self._bind_sync()
+        self.batch.rebind(self.actions.spaces, self.actions.ref_space)
 
     def poll(self):
         xr.sync_actions(
@@ -20,6 +187,9 @@ class XRControllerTracker:
         poses = []
 
         for space in self.actions.spaces:
+            if space is None:
+                poses.append(None)
+                continue
             loc = xr.locate_space(
                 space=space,
                 base_space=self.actions.ref_space,
@@ -30,4 +200,39 @@ class XRControllerTracker:
             else:
                 poses.append(None)
 
-        return poses  # [left_pose, right_pose]
+        return poses  # 与 actions.spaces 一一对应，如 [left_pose, right_pose]
+
+    def poll_batch(self):
+        """
+        批量模式：结果就地写入 self.poses / self.valid，返回 self.poses
+
+        每次调用都会覆盖上一帧的数据，需要保留时请自行拷贝。
+        """
+        result = self._sync(self.actions.session, self._sync_info_ptr)
+        if result < 0:
+            raise xr.check_result(result)
+
+        self.last_time = self.time.now()
+        self.batch.locate(self.last_time)
+        if self.predict_ns > 0:
+            self._predict()
+        return self.poses
+
+    def _predict(self):
+        now = getattr(self.last_time, "value", self.last_time)
+        self.prediction_errors.observe(now, self.poses, self.valid)
+
+        self.predicted_time = now + self.predict_ns
+        extrapolate(
+            self.poses, self.batch.linear_velocity, self.batch.angular_velocity,
+            self.predict_ns * 1e-9, out=self.predicted,
+        )
+        self.prediction_errors.expect(self.predicted_time, self.predicted, self.poses, self.valid)
+
+    def pose(self, i):
+        """把 self.poses 第 i 行转换为 xr.Posef（供 UI 等非热路径使用）"""
+        qx, qy, qz, qw, px, py, pz = self.poses[i].tolist()
+        return xr.Posef(
+            orientation=xr.Quaternionf(qx, qy, qz, qw),
+            position=xr.Vector3f(px, py, pz),
+        )
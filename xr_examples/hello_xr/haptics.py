@@ -0,0 +1,225 @@
+"""
+Coalescing haptic feedback scheduler.
+
+Requests are queued per hand as [start, end) spans in XrTime nanoseconds and
+dispatched from update(). Overlapping requests with the same amplitude and
+frequency merge into one span, and a request already covered by the vibration
+that is currently playing is dropped, so holding a pulse request every frame
+costs one runtime call per span instead of one per frame.
+"""
+
+from ctypes import cast, pointer, POINTER
+import logging
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import xr.raw_functions
+
+logger = logging.getLogger("hello_xr.haptics")
+
+# Segment layout: [start, end, amplitude, frequency]
+_START, _END, _AMPLITUDE, _FREQUENCY = range(4)
+
+
+def _check(result: int) -> None:
+    """Raise for a failed raw call; extension and vendor codes are not in xr.Result."""
+    try:
+        code = xr.Result(result)
+    except ValueError:
+        if result < 0:
+            raise xr.ErrorResult(f"XrResult {result}") from None
+        return
+    exception = xr.check_result(code)
+    if exception.is_exception():
+        raise exception
+
+
+def _split(spans: List[list]) -> List[list]:
+    """
+    Flatten overlapping spans into sorted, non-overlapping ones.
+
+    Each sub-interval takes the loudest span covering it (earlier spans win ties);
+    touching pieces with equal amplitude and frequency are joined.
+    """
+    bounds = sorted({t for span in spans for t in (span[_START], span[_END])})
+    pieces: List[list] = []
+    for start, end in zip(bounds, bounds[1:]):
+        loudest = None
+        for span in spans:
+            if span[_START] <= start and end <= span[_END] \
+                    and (loudest is None or span[_AMPLITUDE] > loudest[_AMPLITUDE]):
+                loudest = span
+        if loudest is None:
+            continue
+        last = pieces[-1] if pieces else None
+        if last is not None and last[_END] == start and last[_AMPLITUDE] == loudest[_AMPLITUDE] \
+                and last[_FREQUENCY] == loudest[_FREQUENCY]:
+            last[_END] = end
+        else:
+            pieces.append([start, end, loudest[_AMPLITUDE], loudest[_FREQUENCY]])
+    return pieces
+
+
+class HapticsScheduler(object):
+    """
+    Per-hand haptics queue scheduled against XrTime.
+
+    pulse() and pattern() only edit the queue; nothing reaches the runtime
+    until update(xr_time) is called, typically once per frame with the
+    predicted display time.
+
+    Merging rules:
+      * Each hand's queue holds sorted, non-overlapping spans. Where a request
+        overlaps queued spans, every sub-interval plays the loudest amplitude
+        covering it (the queued span wins a tie), so the result is split at
+        the request boundaries; only touching pieces with equal amplitude and
+        frequency are joined into one span.
+      * A request whose span and amplitude are covered by the active vibration
+        is dropped; one that outlasts it at the same or lower amplitude is
+        trimmed to start when the active vibration ends.
+      * A louder request interrupts the active vibration when it starts; the
+        rest of the active vibration is queued to resume after it.
+    """
+
+    def __init__(
+            self,
+            session: xr.Session,
+            action: xr.Action,
+            subaction_paths: Sequence[xr.Path],
+    ) -> None:
+        self.session = session
+        count = len(subaction_paths)
+        # Preallocated per-hand structs; update() only rewrites their fields.
+        self._infos = [xr.HapticActionInfo(action=action, subaction_path=path) for path in subaction_paths]
+        self._vibrations = [
+            xr.HapticVibration(amplitude=0, duration=0, frequency=xr.FREQUENCY_UNSPECIFIED)
+            for _ in range(count)
+        ]
+        self._info_ptrs = [pointer(info) for info in self._infos]
+        self._header_ptrs = [
+            cast(pointer(vibration), POINTER(xr.HapticBaseHeader))
+            for vibration in self._vibrations
+        ]
+        self._apply = xr.raw_functions.xrApplyHapticFeedback
+        self._stop = xr.raw_functions.xrStopHapticFeedback
+
+        self.queues: List[List[list]] = [[] for _ in range(count)]
+        # Currently playing vibration per hand, or None.
+        self.active: List[Optional[list]] = [None] * count
+        self.now = 0
+
+        self.requested = 0
+        self.merged = 0
+        self.dropped = 0
+        self.dispatched = 0
+
+    def pulse(
+            self,
+            hand: int,
+            amplitude: float,
+            duration: int,
+            frequency: float = xr.FREQUENCY_UNSPECIFIED,
+            start_time: Optional[int] = None,
+    ) -> None:
+        """Queue one vibration of `duration` nanoseconds starting at `start_time` (default: last update time)."""
+        start = self.now if start_time is None else int(start_time)
+        self._insert(hand, [start, start + max(int(duration), 1), float(amplitude), float(frequency)])
+
+    def pattern(
+            self,
+            hand: int,
+            steps: Iterable[Tuple[int, float, int]],
+            start_time: Optional[int] = None,
+            frequency: float = xr.FREQUENCY_UNSPECIFIED,
+    ) -> None:
+        """Queue (offset_ns, amplitude, duration_ns) steps relative to `start_time`."""
+        start = self.now if start_time is None else int(start_time)
+        for offset, amplitude, duration in steps:
+            self.pulse(hand, amplitude, duration, frequency, start + int(offset))
+
+    def _insert(self, hand: int, segment: list) -> None:
+        self.requested += 1
+        active = self.active[hand]
+        if active is not None and segment[_START] < active[_END]:
+            if segment[_AMPLITUDE] <= active[_AMPLITUDE]:
+                if segment[_END] <= active[_END]:
+                    self.dropped += 1
+                    return
+                segment[_START] = active[_END]
+            elif segment[_END] < active[_END]:
+                # Applying the louder span replaces the active vibration; resume it afterwards.
+                self._enqueue(hand, [segment[_END], active[_END], active[_AMPLITUDE], active[_FREQUENCY]])
+        self._enqueue(hand, segment)
+
+    def _enqueue(self, hand: int, segment: list) -> None:
+        queue = self.queues[hand]
+        # The queue is sorted and non-overlapping, so the spans touching `segment` are contiguous.
+        lo = 0
+        while lo < len(queue) and queue[lo][_END] < segment[_START]:
+            lo += 1
+        hi = lo
+        while hi < len(queue) and queue[hi][_START] <= segment[_END]:
+            hi += 1
+        if lo == hi:
+            queue.insert(lo, segment)
+            return
+        self.merged += hi - lo
+        queue[lo:hi] = _split(queue[lo:hi] + [segment])
+
+    def update(self, xr_time: int, lead_time: int = 0) -> int:
+        """
+        Dispatch every span that is due at `xr_time`; returns the number of runtime calls made.
+
+        A span that continues the active vibration is dispatched up to `lead_time`
+        nanoseconds early (pass the frame period), since waiting for the first
+        frame at or after its start would leave a gap of up to one frame.
+        """
+        now = self.now = int(xr_time)
+        calls = 0
+        for hand, queue in enumerate(self.queues):
+            active = self.active[hand]
+            if active is not None and active[_END] <= now:
+                active = self.active[hand] = None
+            while queue and queue[0][_END] <= now:
+                # Span already elapsed (e.g. update() was not called in time).
+                queue.pop(0)
+                self.dropped += 1
+            if not queue:
+                continue
+            due = queue[0][_START]
+            if active is not None and due == active[_END]:
+                due -= lead_time
+            if due > now:
+                continue
+            segment = queue.pop(0)
+            segment[_START] = now
+            self._dispatch(hand, segment)
+            self.active[hand] = segment
+            calls += 1
+        self.dispatched += calls
+        return calls
+
+    def _dispatch(self, hand: int, segment: list) -> None:
+        vibration = self._vibrations[hand]
+        vibration.amplitude = segment[_AMPLITUDE]
+        vibration.duration = segment[_END] - segment[_START]
+        vibration.frequency = segment[_FREQUENCY]
+        _check(self._apply(self.session, self._info_ptrs[hand], self._header_ptrs[hand]))
+
+    def stop(self, hand: Optional[int] = None) -> None:
+        """Clear the queue and stop the vibration of one hand, or of all hands."""
+        hands = range(len(self.queues)) if hand is None else (hand,)
+        for h in hands:
+            self.queues[h].clear()
+            if self.active[h] is None:
+                continue
+            self.active[h] = None
+            _check(self._stop(self.session, self._info_ptrs[h]))
+
+    def stats(self) -> dict:
+        return {
+            "requested": self.requested,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "dispatched": self.dispatched,
+            "pending": sum(len(q) for q in self.queues),
+        }
@@ -23,11 +23,15 @@ import xr.raw_functions
 import xr.utils.gl.glfw_util
 
 from .graphics_plugin import Cube, IGraphicsPlugin
+from .haptics import HapticsScheduler
 from .platform_plugin import IPlatformPlugin
 from .options import Options
 
 logger = logging.getLogger("hello_xr.program")
 
+# Length of the grab vibration; re-requested every frame while the grip is squeezed.
+GRAB_PULSE_DURATION = 50_000_000  # nanoseconds
+
 
 class Math(object):
     class Pose(object):
@@ -93,6 +97,10 @@ class OpenXRProgram(object):
 
         self.event_data_buffer = xr.EventDataBuffer()
         self.input = OpenXRProgram.InputState()
+        self.haptics: Optional[HapticsScheduler] = None
+        # Predicted display time and period of the latest frame; haptics are scheduled against them.
+        self.frame_time = 0
+        self.frame_period = 0
 
         self.acceptable_blend_modes = [
             xr.EnvironmentBlendMode.OPAQUE,
@@ -105,6 +113,7 @@ class OpenXRProgram(object):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.input.action_set is not None:
+            self.haptics = None
             for hand in Side:
                 if self.input.hand_space[hand] is not None:
                     xr.destroy_space(self.input.hand_space[hand])
@@ -484,6 +493,11 @@ class OpenXRProgram(object):
                 action_sets=pointer(self.input.action_set),
             ),
         )
+        self.haptics = HapticsScheduler(
+            session=self.session,
+            action=self.input.vibrate_action,
+            subaction_paths=self.input.hand_subaction_path,
+        )
 
     def initialize_session(self) -> None:
         """Create a Session and other basic session-level initialization."""
@@ -653,6 +667,7 @@ class OpenXRProgram(object):
             ),
         )
         # Get pose and grab action state and start haptic vibrate when hand is 90% squeezed.
+        now = self.frame_time
         for hand in Side:
             grab_value = xr.get_action_state_float(
                 self.session,
@@ -665,19 +680,9 @@ class OpenXRProgram(object):
                 # Scale the rendered hand by 1.0f (open) to 0.5f (fully squeezed).
                 self.input.hand_scale[hand] = 1 - 0.5 * grab_value.current_state
                 if grab_value.current_state > 0.9:
-                    vibration = xr.HapticVibration(
-                        amplitude=0.5,
-                        duration=xr.MIN_HAPTIC_DURATION,
-                        frequency=xr.FREQUENCY_UNSPECIFIED,
-                    )
-                    xr.apply_haptic_feedback(
-                        session=self.session,
-                        haptic_action_info=xr.HapticActionInfo(
-                            action=self.input.vibrate_action,
-                            subaction_path=self.input.hand_subaction_path[hand],
-                        ),
-                        haptic_feedback=cast(byref(vibration), POINTER(xr.HapticBaseHeader)).contents,
-                    )
+                    # Re-requested every frame while squeezed; the scheduler
+                    # extends the running vibration instead of re-issuing it.
+                    self.haptics.pulse(hand, 0.5, GRAB_PULSE_DURATION, start_time=now)
             pose_state = xr.get_action_state_pose(
                 session=self.session,
                 get_info=xr.ActionStateGetInfo(
@@ -696,6 +701,7 @@ class OpenXRProgram(object):
         )
         if quit_value.is_active and quit_value.changed_since_last_sync and quit_value.current_state:
             xr.request_exit_session(self.session)
+        self.haptics.update(now, self.frame_period)
 
     def poll_events(self) -> (bool, bool):
         """Process any events in the event queue."""
@@ -739,6 +745,8 @@ class OpenXRProgram(object):
             session=self.session,
             frame_wait_info=xr.FrameWaitInfo(),
         )
+        self.frame_time = frame_state.predicted_display_time
+        self.frame_period = frame_state.predicted_display_period
         xr.begin_frame(self.session, xr.FrameBeginInfo())
 
         layers = []
@@ -0,0 +1,77 @@
+"""
+Merge rules of the haptics scheduler; runs without an OpenXR runtime.
+"""
+
+import xr
+
+from xr_examples.hello_xr.haptics import _END, HapticsScheduler
+
+MS = 1_000_000
+U = xr.FREQUENCY_UNSPECIFIED
+
+
+def make_scheduler():
+    scheduler = HapticsScheduler(session=None, action=None, subaction_paths=[xr.NULL_PATH])
+    scheduler.calls = []
+
+    def apply(session, info, header):
+        vibration = scheduler._vibrations[0]
+        scheduler.calls.append((scheduler.now, vibration.duration, vibration.amplitude))
+        return 0
+
+    scheduler._apply = apply
+    scheduler._stop = lambda session, info: 0
+    return scheduler
+
+
+def test_touching_spans_with_different_amplitude_stay_separate():
+    scheduler = make_scheduler()
+    scheduler.pattern(0, [(0, 1.0, 50 * MS), (50 * MS, 0.3, 50 * MS)], start_time=0)
+    assert scheduler.queues[0] == [[0, 50 * MS, 1.0, U], [50 * MS, 100 * MS, 0.3, U]]
+
+
+def test_short_loud_pulse_splits_long_quiet_one():
+    scheduler = make_scheduler()
+    scheduler.pulse(0, 0.2, 1000 * MS, start_time=0)
+    scheduler.pulse(0, 1.0, 10 * MS, start_time=500 * MS)
+    assert scheduler.queues[0] == [
+        [0, 500 * MS, 0.2, U],
+        [500 * MS, 510 * MS, 1.0, U],
+        [510 * MS, 1000 * MS, 0.2, U],
+    ]
+
+
+def test_equal_spans_merge():
+    scheduler = make_scheduler()
+    scheduler.pulse(0, 0.5, 50 * MS, start_time=0)
+    scheduler.pulse(0, 0.5, 50 * MS, start_time=30 * MS)
+    scheduler.pulse(0, 0.5, 20 * MS, start_time=80 * MS)
+    assert scheduler.queues[0] == [[0, 100 * MS, 0.5, U]]
+    assert scheduler.merged == 2
+
+
+def test_quieter_overlap_keeps_louder_span():
+    scheduler = make_scheduler()
+    scheduler.pulse(0, 0.8, 50 * MS, start_time=0)
+    scheduler.pulse(0, 0.4, 100 * MS, start_time=20 * MS)
+    assert scheduler.queues[0] == [[0, 50 * MS, 0.8, U], [50 * MS, 120 * MS, 0.4, U]]
+
+
+def test_louder_request_resumes_active_vibration():
+    scheduler = make_scheduler()
+    scheduler.pulse(0, 0.3, 100 * MS, start_time=0)
+    scheduler.update(0)
+    scheduler.pulse(0, 1.0, 10 * MS, start_time=40 * MS)
+    assert scheduler.queues[0] == [[40 * MS, 50 * MS, 1.0, U], [50 * MS, 100 * MS, 0.3, U]]
+
+
+def test_held_pulse_continues_one_frame_early():
+    scheduler = make_scheduler()
+    frame = 11 * MS
+    for i in range(10):
+        now = i * frame
+        scheduler.pulse(0, 0.5, 50 * MS, start_time=now)
+        scheduler.update(now, frame)
+    # The first span ends at 50 ms; its continuation goes out on the 44 ms frame, not the 55 ms one.
+    assert [call[0] for call in scheduler.calls] == [0, 44 * MS, 88 * MS]
+    assert scheduler.active[0][_END] == 88 * MS + 50 * MS